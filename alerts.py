@@ -0,0 +1,330 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+import pandas as pd
+
+from data import ALL_STORES, STORES, TARGETS, daily_metric_scores, period_labels
+from registry import REGISTRY, priority_levels, risk_levels, trend_labels
+
+ALERT_STATE_FILE = 'alert_state.json'
+
+
+class FileSink:
+    # One JSON line per alert, appended
+    def __init__(self, path):
+        self.path = path
+        self.name = path
+
+    def send(self, alerts):
+        with open(self.path, 'a', encoding='utf-8') as handle:
+            for alert in alerts:
+                handle.write(json.dumps(alert) + '\n')
+
+
+class WebhookSink:
+    # POSTs {"alerts": [...]} as JSON; a non-2xx reply or a network error
+    # leaves the alerts queued for the next delivery
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.name = url
+        self.timeout = timeout
+
+    def send(self, alerts):
+        request = urllib.request.Request(self.url, data=json.dumps({'alerts': alerts}).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def sinks_from_spec(spec):
+    # Comma-separated sinks: http(s) URLs are webhooks, anything else a file
+    sinks = []
+    for target in filter(None, (part.strip() for part in (spec or '').split(','))):
+        sinks.append(WebhookSink(target) if target.startswith(('http://', 'https://')) else FileSink(target))
+    return sinks
+
+
+def sink_name(sink):
+    # Key of a sink's queue in the state file
+    return getattr(sink, 'name', type(sink).__name__)
+
+
+class AlertEngine:
+    # The Risk Analysis rules (gap to target, risk band, trend since the
+    # first month, priority) evaluated without the dashboard. Score sums and
+    # response counts per metric x store x month are kept in dense arrays; a
+    # batch adds to the months it covers and only the metric/store pairs it
+    # touched (plus their All Stores rows) are re-evaluated. An alert is
+    # delivered when a pair starts alerting, when its month, risk or priority
+    # changes, and once more when it recovers. The alert state and each
+    # sink's undelivered alerts are kept in `state_path`, so restarts neither
+    # repeat alerts nor lose the ones a sink has not accepted yet.
+    def __init__(self, sinks=(), targets=TARGETS, stores=STORES, state_path=None, registry=REGISTRY):
+        self.sinks = list(sinks)
+        self.metrics = {metric: i for i, metric in enumerate(targets)}
+        self.stores = {store: i for i, store in enumerate(list(stores) + [ALL_STORES])}
+        self.targets = np.array(list(targets.values()), dtype=float)
+        self.registry = registry
+        self.first = None
+        self.periods = {}
+        self.period_start = np.zeros(0, dtype='datetime64[ns]')
+        self.score_sum = np.zeros((len(self.metrics), len(self.stores), 0))
+        self.responses = np.zeros((len(self.metrics), len(self.stores), 0))
+        self.state_path = state_path
+        state = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path, encoding='utf-8') as handle:
+                state = json.load(handle)
+        self.active = state.get('active', {})
+        self.pending = [state.get('pending', {}).get(sink_name(sink), []) for sink in self.sinks]
+        self.evaluations = 0
+        self.last_evaluation_seconds = None
+        self.delivery_errors = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def add(self, daily_scores):
+        # Folds daily (date, store, metric) sums into the monthly arrays;
+        # returns the (metric, store) positions touched. Metrics and stores
+        # outside the registry are ignored.
+        store = daily_scores['store'].astype(str)
+        known = store.isin(self.stores) & (store != ALL_STORES)
+        rows = daily_scores[daily_scores['metric'].isin(self.metrics).to_numpy() & known.to_numpy()]
+        if rows.empty:
+            return np.zeros((0, 2), dtype=np.int64)
+        dates = pd.to_datetime(rows['date'])
+        if self.first is None:
+            self.first = dates.min()
+        labels = period_labels(dates, first=self.first).astype(str).to_numpy()
+        starts = pd.Series(dates.to_numpy()).groupby(labels).min()
+        for label, start in starts.items():
+            if label not in self.periods:
+                self.periods[label] = len(self.periods)
+                self.period_start = np.append(self.period_start, np.datetime64(start, 'ns'))
+            else:
+                position = self.periods[label]
+                self.period_start[position] = min(self.period_start[position], np.datetime64(start, 'ns'))
+        grow = len(self.periods) - self.score_sum.shape[2]
+        if grow:
+            padding = np.zeros(self.score_sum.shape[:2] + (grow,))
+            self.score_sum = np.concatenate([self.score_sum, padding], axis=2)
+            self.responses = np.concatenate([self.responses, padding], axis=2)
+
+        metric = rows['metric'].map(self.metrics).to_numpy()
+        store = rows['store'].astype(str).map(self.stores).to_numpy()
+        period = pd.Series(labels).map(self.periods).to_numpy()
+        everywhere = np.full(len(rows), self.stores[ALL_STORES])
+        for totals, column in [(self.score_sum, 'score_sum'), (self.responses, 'responses')]:
+            values = rows[column].to_numpy(dtype=float)
+            np.add.at(totals, (metric, store, period), values)
+            np.add.at(totals, (metric, everywhere, period), values)
+        touched = np.unique(np.column_stack([np.concatenate([metric, metric]), np.concatenate([store, everywhere])]),
+                            axis=0)
+        return touched
+
+    def evaluate(self, touched=None):
+        # Current month score, gap, trend, risk and priority for the given
+        # (metric, store) positions (default: all), as the Risk Analysis tab
+        # computes them
+        if touched is None:
+            touched = np.indices((len(self.metrics), len(self.stores))).reshape(2, -1).T
+        order = np.argsort(self.period_start, kind='stable')
+        metric, store = touched[:, 0], touched[:, 1]
+        sums = self.score_sum[metric, store][:, order]
+        counts = self.responses[metric, store][:, order]
+        present = counts > 0
+        seen = present.any(axis=1)
+        metric, store, sums, counts, present = metric[seen], store[seen], sums[seen], counts[seen], present[seen]
+        rows = np.arange(len(metric))
+        first = present.argmax(axis=1)
+        last = present.shape[1] - 1 - present[:, ::-1].argmax(axis=1)
+        current = sums[rows, last] / counts[rows, last]
+        gap = self.targets[metric] - current
+        trend = current - sums[rows, first] / counts[rows, first]
+        priority, priority_score = priority_levels(gap, trend, self.registry)
+        metric_names = np.array(list(self.metrics), dtype=object)
+        store_names = np.array(list(self.stores), dtype=object)
+        period_names = np.array(list(self.periods), dtype=object)[order]
+        evaluated = pd.DataFrame({
+            'metric': metric_names[metric],
+            'store': store_names[store],
+            'period': period_names[last],
+            'score': current,
+            'target': self.targets[metric],
+            'gap': gap,
+            'trend': trend,
+            'trend_direction': trend_labels(trend, self.registry),
+            'risk': risk_levels(gap, self.registry),
+            'priority': priority,
+            'priority_score': priority_score,
+            'responses': counts[rows, last].astype(np.int64),
+        })
+        # Below target, or any priority rule above the fallback matched
+        evaluated['alerting'] = (gap > 0) | (priority_score > self.registry['priority'][-1]['score'])
+        return evaluated
+
+    def changes(self, evaluated):
+        # Alerts for pairs whose alerting state differs from the one last
+        # delivered; updates the delivered state
+        alerts = []
+        evaluated_at = pd.Timestamp.now().isoformat(timespec='seconds')
+        for row in evaluated.itertuples(index=False):
+            key = f"{row.metric}|{row.store}"
+            fingerprint = [row.period, row.risk, row.priority]
+            held = self.active.get(key)
+            if row.alerting and held != fingerprint:
+                status = 'open' if held is None else 'changed'
+                self.active[key] = fingerprint
+            elif not row.alerting and held is not None:
+                status = 'resolved'
+                del self.active[key]
+            else:
+                continue
+            alert = {'status': status, 'evaluated_at': evaluated_at}
+            alert.update({name: getattr(row, name) for name in evaluated.columns if name != 'alerting'})
+            for name in ['score', 'target', 'gap', 'trend']:
+                alert[name] = round(float(alert[name]), 4)
+            alert['priority_score'] = int(alert['priority_score'])
+            alert['responses'] = int(alert['responses'])
+            alerts.append(alert)
+        return alerts
+
+    def deliver(self, alerts):
+        # Every sink gets its own queue, so one failing webhook neither
+        # blocks the others nor loses alerts
+        for i, sink in enumerate(self.sinks):
+            batch = self.pending[i] + alerts
+            if not batch:
+                continue
+            try:
+                sink.send(batch)
+                self.pending[i] = []
+            except (OSError, ValueError) as error:
+                self.pending[i] = batch
+                self.delivery_errors += 1
+                self.last_error = f"{type(sink).__name__}: {error}"
+
+    def save_state(self):
+        if not self.state_path:
+            return
+        pending = {sink_name(sink): queue for sink, queue in zip(self.sinks, self.pending) if queue}
+        staging = f"{self.state_path}.tmp"
+        with open(staging, 'w', encoding='utf-8') as handle:
+            json.dump({'active': self.active, 'pending': pending}, handle)
+        os.replace(staging, self.state_path)
+
+    def update(self, daily_scores_chunks):
+        # Folds in any number of daily score chunks, evaluates the touched
+        # pairs once and delivers the alerts; returns them
+        with self._lock:
+            started = time.perf_counter()
+            touched = [self.add(chunk) for chunk in daily_scores_chunks]
+            touched = np.unique(np.concatenate(touched), axis=0) if touched else np.zeros((0, 2), dtype=np.int64)
+            alerts = self.changes(self.evaluate(touched)) if len(touched) else []
+            self.last_evaluation_seconds = time.perf_counter() - started
+            self.evaluations += 1
+            # Saved after delivery, with what each sink did not accept
+            had_pending = any(self.pending)
+            self.deliver(alerts)
+            if alerts or had_pending:
+                self.save_state()
+            return alerts
+
+    def undelivered(self):
+        return sum(len(queue) for queue in self.pending)
+
+    def append(self, batch):
+        # Same interface as the backends, so a LiveFeed can feed the engine
+        # raw survey batches
+        return self.update([daily_metric_scores(batch)])
+
+
+class ReceiverHandler(BaseHTTPRequestHandler):
+    # Local stand-in for a webhook endpoint: prints each alert received and
+    # appends it to the server's `output` file, if any
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            alerts = json.loads(body)['alerts']
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400, "expected a JSON object with an 'alerts' list")
+            return
+        for alert in alerts:
+            print(f"[{alert['status']}] {alert['metric']} @ {alert['store']} ({alert['period']}): "
+                  f"{alert['score']:.2f} vs {alert['target']:.2f}, {alert['risk']}, {alert['priority']}", flush=True)
+        if self.server.output:
+            FileSink(self.server.output).send(alerts)
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    from backend import backend_from_env
+    from live import LiveFeed, live_sources_from_env
+
+    parser = argparse.ArgumentParser(description="Evaluate the Risk Analysis alert rules headlessly "
+                                                 "(respects DASHBOARD_DB and the live-mode sources)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    check = subparsers.add_parser('check', help="evaluate the current data once, e.g. after `backend.py build`")
+    watch = subparsers.add_parser('watch', help="evaluate the history, then every batch from DASHBOARD_LIVE_DIR "
+                                                "or DASHBOARD_LIVE_FILE as it arrives")
+    for command in (check, watch):
+        command.add_argument('--sink', default=os.environ.get('DASHBOARD_ALERT_SINKS', 'alerts.jsonl'),
+                             help="comma-separated JSON-lines files and/or webhook URLs "
+                                  "(default: DASHBOARD_ALERT_SINKS or alerts.jsonl)")
+        command.add_argument('--state', default=os.environ.get('DASHBOARD_ALERT_STATE', ALERT_STATE_FILE),
+                             help="where delivered alerts are remembered, so they are not repeated")
+    watch.add_argument('--interval', type=float, default=10.0, help="seconds between polls of the sources")
+    watch.add_argument('--quarantine', default=os.environ.get('DASHBOARD_QUARANTINE_FILE', 'quarantine.csv'))
+    receive = subparsers.add_parser('receive', help="run a local webhook endpoint that prints the alerts it gets")
+    receive.add_argument('--port', type=int, default=8765)
+    receive.add_argument('--output', help="also append the received alerts to this JSON-lines file")
+    args = parser.parse_args()
+
+    if args.command == 'receive':
+        server = HTTPServer(('127.0.0.1', args.port), ReceiverHandler)
+        server.output = args.output
+        print(f"Receiving alerts at http://127.0.0.1:{args.port}/", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        engine = AlertEngine(sinks_from_spec(args.sink), state_path=args.state)
+        backend = backend_from_env()
+        alerts = engine.update(backend.iter_daily_scores())
+        print(f"{len(alerts)} alert(s) from the current data in {engine.last_evaluation_seconds * 1000:.1f} ms", flush=True)
+        if args.command == 'watch':
+            # The engine stands in for the backend, so batches get the same
+            # validation and quarantine as in the dashboard's live mode
+            sources = live_sources_from_env()
+            if not sources:
+                parser.error("watch needs DASHBOARD_LIVE_DIR or DASHBOARD_LIVE_FILE")
+            feed = LiveFeed(engine, sources, min_interval=0, quarantine_path=args.quarantine,
+                            known_dates=backend.daily_timeline()['date'])
+            try:
+                while True:
+                    if feed.poll():
+                        print(f"{feed.rows_ingested:,} rows ingested; {engine.evaluations} evaluations, last "
+                              f"{engine.last_evaluation_seconds * 1000:.1f} ms", flush=True)
+                        if len(feed.missing_days):
+                            print(f"Warning: {len(feed.missing_days)} day(s) without responses, "
+                                  f"last {feed.missing_days[-1]:%Y-%m-%d}", flush=True)
+                    time.sleep(args.interval)
+            except KeyboardInterrupt:
+                pass
+        if engine.delivery_errors:
+            print(f"{engine.delivery_errors} failed deliveries, last: {engine.last_error}", flush=True)
+        if engine.undelivered():
+            print(f"{engine.undelivered()} alert(s) kept in {args.state} for the next run", flush=True)
+            sys.exit(1)
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from registry import REGISTRY
+
+SEVERITY_LEVELS = REGISTRY['severity']['labels']
+
+# Lower bounds for each severity level
+FAILURE_BINS = REGISTRY['severity']['failure_bins']        # % of metrics failing on the day
+ANOMALY_SCORE_BINS = REGISTRY['severity']['score_bins']    # detector score (>= 1 means flagged)
+
+
+def severity_from_failure(failure_percentage):
+    levels = np.digitize(np.asarray(failure_percentage, dtype=float), FAILURE_BINS) - 1
+    return np.clip(levels, 0, len(SEVERITY_LEVELS) - 1)
+
+
+def severity_from_score(score):
+    # Unflagged days (score < 1) map to level -1 so they never raise a severity
+    return np.digitize(np.asarray(score, dtype=float), ANOMALY_SCORE_BINS) - 1
+
+
+class AnomalyMonitor:
+    # Online detector over many daily series (one per metric/store) at once.
+    # Each series keeps an EWMA mean/variance and a two-sided CUSUM, so a new
+    # observation costs O(1) regardless of how much history has been seen.
+    def __init__(self, alpha=0.1, z_threshold=3.5, cusum_k=0.5, cusum_h=8.0, warmup=14, min_std=0.05):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.warmup = warmup
+        self.min_std = min_std
+        self.keys = {}
+        self.mean = np.zeros(0)
+        self.var = np.zeros(0)
+        self.n = np.zeros(0, dtype=np.int64)
+        self.cusum_pos = np.zeros(0)
+        self.cusum_neg = np.zeros(0)
+        self.last_date = None
+
+    def _positions(self, keys):
+        for key in keys:
+            if key not in self.keys:
+                self.keys[key] = len(self.keys)
+        grow = len(self.keys) - len(self.mean)
+        if grow > 0:
+            self.mean = np.concatenate([self.mean, np.zeros(grow)])
+            self.var = np.concatenate([self.var, np.zeros(grow)])
+            self.n = np.concatenate([self.n, np.zeros(grow, dtype=np.int64)])
+            self.cusum_pos = np.concatenate([self.cusum_pos, np.zeros(grow)])
+            self.cusum_neg = np.concatenate([self.cusum_neg, np.zeros(grow)])
+        return np.array([self.keys[key] for key in keys], dtype=np.int64)
+
+    def update(self, date, keys, values):
+        # One observation per key for a single day
+        pos = self._positions(keys)
+        values = np.asarray(values, dtype=float)
+        mean, var, n = self.mean[pos], self.var[pos], self.n[pos]
+
+        std = np.maximum(np.sqrt(var), self.min_std)
+        warm = n >= self.warmup
+        z = np.where(warm, (values - mean) / std, 0.0)
+        cusum_pos = np.maximum(0.0, self.cusum_pos[pos] + z - self.cusum_k)
+        cusum_neg = np.maximum(0.0, self.cusum_neg[pos] - z - self.cusum_k)
+        score = np.maximum(np.abs(z) / self.z_threshold, np.maximum(cusum_pos, cusum_neg) / self.cusum_h)
+        flagged = warm & (score >= 1.0)
+
+        # Flagged days do not move the baseline, and the CUSUM restarts after an alarm
+        alpha = np.maximum(self.alpha, 1.0 / (n + 1))
+        delta = values - mean
+        keep = ~flagged
+        self.mean[pos] = np.where(keep, mean + alpha * delta, mean)
+        self.var[pos] = np.where(keep & (n > 0), (1 - alpha) * (var + alpha * delta ** 2), var)
+        self.n[pos] = n + keep
+        self.cusum_pos[pos] = np.where(flagged, 0.0, cusum_pos)
+        self.cusum_neg[pos] = np.where(flagged, 0.0, cusum_neg)
+        self.last_date = date
+
+        return pd.DataFrame({
+            'date': date,
+            'metric': [key[0] for key in keys],
+            'store': [key[1] for key in keys],
+            'value': values,
+            'z_score': z,
+            'anomaly_score': score,
+            'flagged': flagged,
+            'direction': np.where(z < 0, 'down', 'up')
+        })
+
+    def ingest(self, daily_scores):
+        # Feed a long frame of (date, metric, store, average_score); days already
+        # processed are skipped so the same frame can be replayed after appends
+        if self.last_date is not None:
+            daily_scores = daily_scores[daily_scores['date'] > self.last_date]
+        results = []
+        for date, day in daily_scores.groupby('date', sort=True):
+            keys = list(zip(day['metric'], day['store']))
+            results.append(self.update(date, keys, day['average_score'].to_numpy()))
+        if not results:
+            return pd.DataFrame(columns=['date', 'metric', 'store', 'value', 'z_score', 'anomaly_score', 'flagged', 'direction'])
+        return pd.concat(results, ignore_index=True)
+
+
+def anomaly_events(results, n_metrics, min_metrics=2):
+    # Collapse flagged drops into one event row per day; a day needs at least
+    # `min_metrics` failing metrics so single-series noise is not reported
+    drops = results[results['flagged'] & (results['direction'] == 'down')]
+    if drops.empty:
+        return pd.DataFrame(columns=['date', 'failed_count', 'anomaly_score', 'stores'])
+    events = drops.groupby('date').agg(
+        failed_count=('metric', 'nunique'),
+        anomaly_score=('anomaly_score', 'max'),
+        stores=('store', lambda s: ', '.join(sorted(set(s))))
+    ).reset_index()
+    events['failed_count'] = events['failed_count'].clip(upper=n_metrics)
+    return events[events['failed_count'] >= min_metrics].reset_index(drop=True)
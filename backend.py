@@ -0,0 +1,658 @@
+import argparse
+import glob
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from anomaly import SEVERITY_LEVELS, AnomalyMonitor
+from bootstrap import SCORE_LEVELS
+from cohorts import CohortMatrix
+from comments import CommentIndex, generate_comments
+from cube import CalendarCube, calendar_cells
+from drivers import DriverMoments
+from data import (ALL_STORES, METRICS, STORES, TARGETS, build_daily_df, build_events_df, daily_histograms,
+                  daily_metric_scores, dataset_version, derive_tables, finish_monthly_summary, finish_promotion_uplift,
+                  generate_orders, generate_responses, monthly_intervals, monthly_totals, period_labels,
+                  promotion_uplift)
+from quantiles import merge_histograms
+from ranges import RangeSums
+from validation import missing_days, quarantine, validate_responses
+
+SEVERITY_ORDER = {level: rank for rank, level in enumerate(SEVERITY_LEVELS, 1)}
+
+
+def quoted(name):
+    # Metric names are column names; values are always bound as parameters
+    return '"' + name.replace('"', '""') + '"'
+
+
+class PandasBackend:
+    # Default backend: aggregates live in process memory. Raw responses are
+    # reduced to daily metric/store sums and daily score histograms as they arrive,
+    # so `append` only touches the new rows. Orders (customer_id, date) feed
+    # the purchase cohorts the same way through `append_orders`.
+    def __init__(self, responses, orders=None):
+        self.start = responses['date'].min()
+        self.monitor = AnomalyMonitor()
+        self.anomalies = None
+        self.daily_scores = None
+        self.sketches = None
+        self.cube = CalendarCube(METRICS)
+        self.moments = DriverMoments(METRICS)
+        self.ranges = None
+        self.comments = CommentIndex(first=self.start)
+        self.cohorts = CohortMatrix(first=self.start)
+        if orders is not None:
+            self.cohorts.add(orders)
+        self.batches = 0
+        self._base_version = dataset_version(responses)
+        self._lock = threading.Lock()
+        self.append(responses, complete=True)
+
+    def append(self, batch, complete=False):
+        # Days are handed to the anomaly monitor once a later day has arrived
+        # (or immediately when `complete`); rows arriving late for a day that
+        # was already scored update the aggregates but are not re-scored
+        with self._lock:
+            batch_scores = daily_metric_scores(batch)
+            batch_scores['store'] = batch_scores['store'].astype(str)
+            cube = self.cube.copy()
+            if self.daily_scores is None:
+                daily_scores = batch_scores
+                cube.add(calendar_cells(batch_scores, TARGETS))
+            else:
+                touched = self.daily_scores['date'].isin(batch_scores['date'].unique())
+                merged = pd.concat([self.daily_scores[touched], batch_scores])
+                merged = merged.groupby(['date', 'store', 'metric'], as_index=False)[['score_sum', 'responses']].sum()
+                merged['average_score'] = merged['score_sum'] / merged['responses']
+                daily_scores = pd.concat([self.daily_scores[~touched], merged], ignore_index=True)
+                daily_scores = daily_scores.sort_values(['date', 'metric', 'store']).reset_index(drop=True)
+                # Days that gained rows are replaced in the cube, not double counted
+                cube.add(calendar_cells(self.daily_scores[touched], TARGETS), sign=-1)
+                cube.add(calendar_cells(merged, TARGETS))
+
+            moments = self.moments.copy()
+            moments.add(batch)
+
+            index, counts = daily_histograms(batch)
+            batch_sketches = pd.DataFrame(counts, index=pd.MultiIndex.from_frame(index))
+            if self.sketches is None:
+                sketches = batch_sketches
+            else:
+                sketches = self.sketches.add(batch_sketches, fill_value=0).astype(np.int64)
+
+            through = daily_scores['date'].max()
+            if not complete:
+                through = through - pd.Timedelta(days=1)
+            scored = self.monitor.ingest(daily_scores[daily_scores['date'] <= through])
+            anomalies = scored if self.anomalies is None else pd.concat([self.anomalies, scored], ignore_index=True)
+
+            self.daily_df = build_daily_df(daily_scores)
+            self.events_df = build_events_df(anomalies)
+            self.daily_scores = daily_scores
+            self.sketches = sketches
+            if 'comment' in batch.columns:
+                self.comments.add(batch[['date', 'store', 'comment']])
+            self.cube = cube
+            self.moments = moments
+            self.anomalies = anomalies
+            self.batches += 1
+
+    def append_orders(self, orders):
+        with self._lock:
+            cohorts = self.cohorts.copy()
+            cohorts.add(orders)
+            self.cohorts = cohorts
+            self.batches += 1
+
+    def data_version(self):
+        return f"{self._base_version}.{self.batches}"
+
+    def months(self):
+        return sorted(self.daily_df['month'].unique())
+
+    def daily_timeline(self, month=None):
+        if month is None:
+            return self.daily_df.copy()
+        return self.daily_df[self.daily_df['month'] == month]
+
+    def promotions(self):
+        return list(dict.fromkeys(self.events_df['promotion']))
+
+    def events(self, failure_threshold=0, promotion=None, severities=None, sort_by='date', ascending=True,
+               date_range=None):
+        events = self.events_df[self.events_df['failure_percentage'] >= failure_threshold]
+        if date_range is not None:
+            events = events[events['date'].between(*date_range)]
+        if promotion is not None:
+            events = events[events['promotion'] == promotion]
+        if severities is not None:
+            events = events[events['severity'].isin(severities)]
+        if sort_by == 'severity':
+            events = events.assign(severity_num=events['severity'].map(SEVERITY_ORDER))
+            return events.sort_values('severity_num', ascending=ascending, kind='stable').drop('severity_num', axis=1)
+        return events.sort_values(sort_by, ascending=ascending, kind='stable')
+
+    def monthly_summary(self, targets):
+        return finish_monthly_summary(monthly_totals(self.daily_scores, targets))
+
+    def promotion_uplift(self, calendar):
+        return promotion_uplift(self.daily_scores, calendar)
+
+    def daily_histograms(self):
+        sketches = self.sketches
+        return sketches.index.to_frame(index=False), sketches.to_numpy(dtype=np.int64)
+
+    def score_histograms(self):
+        # Monthly histograms are merged from the daily ones
+        index, counts = self.daily_histograms()
+        index['period'] = period_labels(index['date'], first=self.start).astype(str).to_numpy()
+        return merge_histograms(index, counts, ['metric', 'period', 'store'])
+
+    def calendar_cube(self):
+        return self.cube
+
+    def range_sums(self):
+        # Rebuilt from the daily sketches once per batch, on first use
+        with self._lock:
+            if self.ranges is None or self.ranges[0] != self.batches:
+                self.ranges = (self.batches, RangeSums(*self.daily_histograms(), METRICS, STORES))
+            return self.ranges[1]
+
+    def comment_index(self):
+        return self.comments
+
+    def cohort_matrix(self):
+        return self.cohorts
+
+    def driver_moments(self):
+        return self.moments
+
+    def resident_state(self):
+        # Derived structures kept for the life of the process, by name
+        return {'daily scores': self.daily_scores, 'score histograms': self.sketches, 'calendar cube': self.cube,
+                'range sums': self.ranges, 'comment index': self.comments, 'cohort matrix': self.cohorts,
+                'driver moments': self.moments}
+
+    def iter_daily_scores(self, chunk_size=50000):
+        daily_scores = self.daily_scores
+        for start in range(0, len(daily_scores), chunk_size):
+            yield daily_scores.iloc[start:start + chunk_size]
+
+
+class SQLBackend:
+    # Read-only view over a database file written by `build_database`. Filters
+    # and aggregates run inside the engine; only result sets are pulled.
+    # An .arrow dataset is a directory of Arrow IPC files, memory-mapped and
+    # queried by DuckDB in place, so processes serving the same dataset
+    # share its pages instead of each holding a copy.
+    def __init__(self, path):
+        self.path = path
+        self.engine = os.path.splitext(path.rstrip(os.sep))[1].lstrip('.')
+        if self.engine not in ('duckdb', 'arrow'):
+            self.engine = 'sqlite'
+        self._local = threading.local()
+        self._build = None
+        self._tables = None
+        self._tables_lock = threading.Lock()
+        self._comments_lock = threading.Lock()
+        self._cohorts_lock = threading.Lock()
+        self._moments_lock = threading.Lock()
+        self._reset_derived()
+
+    def _reset_derived(self):
+        # State built from the data on first use, kept until an Arrow dataset
+        # is switched to a new build
+        self._cube = None
+        self._ranges = None
+        self._comments = None
+        self._histogram_cache = {}
+        self._cohorts = None
+        self._moments = None
+
+    def _connection(self):
+        # One connection per thread; Streamlit runs sessions on separate threads.
+        # An Arrow connection is replaced once the dataset link moves to a new build
+        con = getattr(self._local, 'con', None)
+        if self.engine == 'arrow':
+            build, tables = self._arrow_tables()
+            if con is None or self._local.build != build:
+                import duckdb
+                con = duckdb.connect()
+                for name, table in tables.items():
+                    con.register(name, table)
+                self._local.build = build
+        elif con is None:
+            if self.engine == 'duckdb':
+                import duckdb
+                con = duckdb.connect(self.path, read_only=True)
+            else:
+                con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self._local.con = con
+        return con
+
+    def _arrow_tables(self):
+        # Uncompressed IPC files are mapped without copying, and the pages are
+        # shared with every other process. The link is resolved on every
+        # access: when a rebuild has switched it, the new build is mapped and
+        # everything derived from the old one is dropped. All tables of one
+        # mapping come from the same build. Returns (build, tables)
+        build = os.path.realpath(self.path)
+        with self._tables_lock:
+            if build != self._build:
+                import pyarrow as pa
+                self._tables = {
+                    os.path.splitext(os.path.basename(file))[0]: pa.ipc.open_file(pa.memory_map(file)).read_all()
+                    for file in sorted(glob.glob(os.path.join(build, '*.arrow')))
+                }
+                if self._build is not None:
+                    self._reset_derived()
+                self._build = build
+            return self._build, self._tables
+
+    def query(self, sql, params=()):
+        con = self._connection()
+        if self.engine in ('duckdb', 'arrow'):
+            return con.execute(sql, list(params)).fetchdf()
+        return pd.read_sql_query(sql, con, params=list(params))
+
+    def data_version(self):
+        return self.query("SELECT value FROM metadata WHERE key = 'data_version'")['value'].iloc[0]
+
+    def months(self):
+        return self.query("SELECT DISTINCT month FROM daily ORDER BY month")['month'].tolist()
+
+    def daily_timeline(self, month=None):
+        if month is None:
+            daily = self.query("SELECT * FROM daily ORDER BY date")
+        else:
+            daily = self.query("SELECT * FROM daily WHERE month = ? ORDER BY date", [month])
+        daily['date'] = pd.to_datetime(daily['date'])
+        daily['is_weekend'] = daily['is_weekend'].astype(bool)
+        return daily
+
+    def promotions(self):
+        return self.query("SELECT promotion FROM events GROUP BY promotion ORDER BY MIN(rowid)")['promotion'].tolist()
+
+    def events(self, failure_threshold=0, promotion=None, severities=None, sort_by='date', ascending=True,
+               date_range=None):
+        clauses, params = ["failure_percentage >= ?"], [failure_threshold]
+        if date_range is not None:
+            clauses.append("date BETWEEN ? AND ?")
+            params.extend(pd.Timestamp(day).strftime('%Y-%m-%d') for day in date_range)
+        if promotion is not None:
+            clauses.append("promotion = ?")
+            params.append(promotion)
+        if severities is not None:
+            if not severities:
+                clauses.append("1 = 0")
+            else:
+                clauses.append(f"severity IN ({', '.join('?' * len(severities))})")
+                params.extend(severities)
+        if sort_by == 'severity':
+            order = "CASE severity " + " ".join(["WHEN ? THEN ?"] * len(SEVERITY_ORDER)) + " END"
+            params.extend(value for item in SEVERITY_ORDER.items() for value in item)
+        else:
+            order = {'date': 'date', 'failure_percentage': 'failure_percentage'}[sort_by]
+        direction = 'ASC' if ascending else 'DESC'
+        events = self.query(f"SELECT * FROM events WHERE {' AND '.join(clauses)} ORDER BY {order} {direction}, rowid", params)
+        events['date'] = pd.to_datetime(events['date'])
+        # Arrow datasets store rowid as a column
+        return events.drop(columns='rowid', errors='ignore')
+
+    def monthly_summary(self, targets):
+        # Same figures as data.monthly_totals, computed by the engine
+        values = ", ".join("(?, ?)" for _ in targets)
+        params = [v for item in targets.items() for v in item] + [ALL_STORES]
+        totals = self.query(f"""
+            WITH targets(metric, target) AS (VALUES {values}),
+            daily AS (
+                SELECT date, period, store, metric, responses, score_sum FROM daily_scores
+                UNION ALL
+                SELECT date, period, CAST(? AS VARCHAR), metric, SUM(responses), SUM(score_sum)
+                FROM daily_scores GROUP BY date, period, metric
+            )
+            SELECT d.metric, d.period, d.store,
+                   MIN(d.date) AS first_date, MAX(d.date) AS last_date,
+                   COUNT(DISTINCT d.date) AS total_days,
+                   SUM(d.score_sum) AS score_sum, SUM(d.responses) AS responses,
+                   SUM(CASE WHEN d.score_sum * 1.0 / d.responses < t.target THEN 1 ELSE 0 END) AS days_below_target,
+                   t.target
+            FROM daily d JOIN targets t ON t.metric = d.metric
+            GROUP BY d.metric, d.period, d.store, t.target
+        """, params)
+        return finish_monthly_summary(totals)
+
+    def promotion_uplift(self, calendar):
+        # Daily rows are joined to the promotion windows in the database;
+        # only the inside-window and outside-window sums per metric and
+        # store (plus the all-stores rollup) come back
+        if calendar.empty:
+            inside = pd.DataFrame(columns=['promotion', 'metric', 'store', 'score_sum', 'responses', 'days'])
+            return finish_promotion_uplift(inside, inside.drop(columns=['promotion', 'days']), calendar)
+        windows = ', '.join(['(?, ?, ?)'] * len(calendar))
+        params = []
+        for name, start, end in calendar[['name', 'start', 'end']].itertuples(index=False):
+            params += [name, *(self._date_param(day) for day in (start, end))]
+        params.append(ALL_STORES)
+        daily = f"""windows(promotion, first_day, last_day) AS (VALUES {windows}),
+            daily AS (
+                SELECT date, metric, store, score_sum, responses FROM daily_scores
+                UNION ALL
+                SELECT date, metric, CAST(? AS VARCHAR), SUM(score_sum), SUM(responses)
+                FROM daily_scores GROUP BY date, metric
+            )"""
+        inside = self.query(f"""WITH {daily}
+            SELECT w.promotion, d.metric, d.store, SUM(d.score_sum) AS score_sum, SUM(d.responses) AS responses,
+                   COUNT(DISTINCT d.date) AS days
+            FROM daily d JOIN windows w ON d.date BETWEEN w.first_day AND w.last_day
+            GROUP BY w.promotion, d.metric, d.store""", params)
+        outside = self.query(f"""WITH {daily}
+            SELECT d.metric, d.store, SUM(d.score_sum) AS score_sum, SUM(d.responses) AS responses
+            FROM daily d
+            WHERE NOT EXISTS (SELECT 1 FROM windows w WHERE d.date BETWEEN w.first_day AND w.last_day)
+            GROUP BY d.metric, d.store""", params)
+        return finish_promotion_uplift(inside, outside, calendar)
+
+    def _date_param(self, day):
+        # SQLite stores dates as ISO text; DuckDB compares timestamps
+        day = pd.Timestamp(day)
+        return day.to_pydatetime() if self.engine in ('duckdb', 'arrow') else day.strftime('%Y-%m-%d')
+
+    def _histograms(self, group):
+        # One GROUP BY per metric; only (group, score, count) rows come back.
+        # The database is read-only, so each grain is queried once per process
+        if group not in self._histogram_cache:
+            self._histogram_cache[group] = self._query_histograms(group)
+        index, counts = self._histogram_cache[group]
+        return index.copy(), counts
+
+    def _query_histograms(self, group):
+        parts = " UNION ALL ".join(
+            f"""SELECT CAST(? AS VARCHAR) AS metric, {group}, store, {quoted(metric)} AS score, COUNT(*) AS n
+                FROM responses GROUP BY {group}, store, {quoted(metric)}"""
+            for metric in METRICS
+        )
+        counts = self.query(parts, METRICS)
+        counts['score'] = counts['score'].clip(0, SCORE_LEVELS - 1).astype(int)
+        table = counts.pivot_table(index=['metric', group, 'store'], columns='score', values='n', aggfunc='sum', fill_value=0)
+        table = table.reindex(columns=range(SCORE_LEVELS), fill_value=0)
+        return table.index.to_frame(index=False), table.to_numpy(dtype=np.int64)
+
+    def score_histograms(self):
+        return self._histograms('period')
+
+    def daily_histograms(self):
+        index, counts = self._histograms('date')
+        index['date'] = pd.to_datetime(index['date'])
+        return index, counts
+
+    def resident_state(self):
+        # Built on first use and kept for the life of the process, by name
+        return {'score histograms': self._histogram_cache, 'calendar cube': self._cube, 'range sums': self._ranges,
+                'comment index': self._comments, 'cohort matrix': self._cohorts, 'driver moments': self._moments}
+
+    def iter_daily_scores(self, chunk_size=50000):
+        # Streamed with a cursor so long histories are never fully in memory
+        cursor = self._connection().execute(
+            "SELECT date, store, metric, responses, score_sum, average_score FROM daily_scores ORDER BY date, metric, store"
+        )
+        columns = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunk = pd.DataFrame(rows, columns=columns)
+            chunk['date'] = pd.to_datetime(chunk['date'])
+            yield chunk
+
+    def calendar_cube(self):
+        # The database is read-only, so the cube is loaded once per process;
+        # databases written with the older month/week cell layout are summed
+        # from the daily scores instead
+        if self._cube is None:
+            cube = CalendarCube(METRICS)
+            cells = self.query("SELECT * FROM calendar_cells")
+            if 'date' not in cells.columns:
+                cells = calendar_cells(self.query("SELECT date, metric, score_sum, responses FROM daily_scores"), TARGETS)
+            cube.add(cells)
+            self._cube = cube
+        return self._cube
+
+    def range_sums(self):
+        # Prefix sums over the daily histograms, built once per process
+        if self._ranges is None:
+            self._ranges = RangeSums(*self.daily_histograms(), METRICS, STORES)
+        return self._ranges
+
+    def comment_index(self, chunk_size=200000):
+        # Built once per process, streaming comments in batches; databases
+        # written without a comment column give an empty index. The page and
+        # the cache warmer may ask for it at once, so only one thread builds it
+        with self._comments_lock:
+            if self._comments is None:
+                first = self.query("SELECT MIN(date) AS first FROM daily")['first'].iloc[0]
+                index = CommentIndex(first=pd.Timestamp(first))
+                if 'comment' in self.query("SELECT * FROM responses LIMIT 0").columns:
+                    cursor = self._connection().execute(
+                        "SELECT date, store, comment FROM responses WHERE comment IS NOT NULL ORDER BY date"
+                    )
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        index.add(pd.DataFrame(rows, columns=['date', 'store', 'comment']))
+                self._comments = index
+            return self._comments
+
+    def cohort_matrix(self, chunk_size=200000):
+        # Built once per process from the orders table in date order, one
+        # batch at a time; databases without orders give an empty matrix
+        with self._cohorts_lock:
+            if self._cohorts is None:
+                first = self.query("SELECT MIN(date) AS first FROM daily")['first'].iloc[0]
+                cohorts = CohortMatrix(first=pd.Timestamp(first))
+                if self.query("SELECT COUNT(*) AS n FROM metadata WHERE key = 'orders'")['n'].iloc[0]:
+                    cursor = self._connection().execute("SELECT customer_id, date FROM orders ORDER BY date")
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        cohorts.add(pd.DataFrame(rows, columns=['customer_id', 'date']))
+                self._cohorts = cohorts
+            return self._cohorts
+
+    def driver_moments(self, chunk_size=200000):
+        # Loaded once per process from the moments written at build time;
+        # older databases, or ones built for other metrics, are summarised
+        # from the responses in batches instead
+        with self._moments_lock:
+            if self._moments is None:
+                stored = self.query("SELECT value FROM metadata WHERE key = 'driver_moments'")['value']
+                if len(stored) and json.loads(stored.iloc[0]) == METRICS:
+                    moments = DriverMoments.from_frame(self.query("SELECT * FROM driver_moments"), METRICS)
+                else:
+                    moments = DriverMoments(METRICS)
+                    columns = ', '.join(quoted(metric) for metric in METRICS)
+                    cursor = self._connection().execute(f"SELECT date, store, {columns} FROM responses")
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        moments.add(pd.DataFrame(rows, columns=['date', 'store'] + METRICS))
+                self._moments = moments
+            return self._moments
+
+
+def monthly_figures(backend, targets):
+    # Monthly summary with bootstrap confidence intervals, per store and for
+    # all stores
+    summary = backend.monthly_summary(targets)
+    intervals = monthly_intervals(*backend.score_histograms(), targets)
+    return summary.merge(
+        intervals[['metric', 'period', 'store', 'ci_lower', 'ci_upper', 'significantly_below_target']],
+        on=['metric', 'period', 'store']
+    )
+
+
+def build_database(path, responses, orders=None):
+    # Write every table the dashboard reads; existing files are replaced.
+    # `orders` (customer_id, date, store) is optional
+    daily_df, events_df, daily_scores = derive_tables(responses)
+    version = dataset_version(responses)
+    responses = responses.assign(period=period_labels(responses['date']).astype(str).to_numpy(),
+                                 store=responses['store'].astype(str))
+    daily_scores = daily_scores.assign(period=period_labels(daily_scores['date']).astype(str).to_numpy(),
+                                       store=daily_scores['store'].astype(str))
+    moments = DriverMoments(METRICS)
+    moments.add(responses)
+    metadata = {'data_version': version, 'driver_moments': json.dumps(METRICS)}
+    tables = {
+        'responses': responses,
+        'daily': daily_df,
+        'events': events_df,
+        'daily_scores': daily_scores,
+        'calendar_cells': calendar_cells(daily_scores, TARGETS),
+        'driver_moments': moments.to_frame(),
+    }
+    indexes = [
+        "CREATE INDEX idx_responses_group ON responses (period, store)",
+        "CREATE INDEX idx_daily_month ON daily (month)",
+        "CREATE INDEX idx_events_filter ON events (severity, failure_percentage)",
+        "CREATE INDEX idx_daily_scores_date ON daily_scores (date, metric)",
+    ]
+    if orders is not None:
+        tables['orders'] = orders.assign(store=orders['store'].astype(str)) if 'store' in orders else orders
+        metadata['orders'] = str(len(orders))
+        indexes.append("CREATE INDEX idx_orders_date ON orders (date)")
+    tables['metadata'] = pd.DataFrame({'key': list(metadata), 'value': list(metadata.values())})
+
+    if path.rstrip(os.sep).endswith('.arrow'):
+        write_arrow_dataset(path, tables)
+        return
+    if os.path.exists(path):
+        os.remove(path)
+    if path.endswith('.duckdb'):
+        import duckdb
+        con = duckdb.connect(path)
+        for name, frame in tables.items():
+            con.register('frame', frame)
+            con.execute(f"CREATE TABLE {name} AS SELECT * FROM frame")
+            con.unregister('frame')
+    else:
+        con = sqlite3.connect(path)
+        for name, frame in tables.items():
+            frame = frame.copy()
+            for col in frame.columns:
+                if pd.api.types.is_datetime64_any_dtype(frame[col]):
+                    frame[col] = frame[col].dt.strftime('%Y-%m-%d')
+            frame.to_sql(name, con, index=False)
+    for statement in indexes:
+        con.execute(statement)
+    con.commit()
+    con.close()
+
+
+def write_arrow_dataset(path, tables):
+    # One uncompressed Arrow IPC file per table, so readers can map them.
+    # Each build goes to its own `<path>.v<ns>` directory and `path` is a
+    # symlink switched to it with one atomic rename, so a reader always finds
+    # a complete dataset. The previous build is kept for readers that
+    # resolved the link just before the switch; older ones are removed.
+    import pyarrow as pa
+    path = path.rstrip(os.sep)
+    build = f"{path}.v{time.time_ns()}"
+    os.makedirs(build)
+    for name, frame in tables.items():
+        if name == 'events':
+            # DuckDB has no rowid for Arrow scans; events keep their order by it
+            frame = frame.assign(rowid=np.arange(len(frame)))
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        with pa.OSFile(os.path.join(build, f"{name}.arrow"), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    if os.path.isdir(path) and not os.path.islink(path):
+        # A dataset written before builds were versioned; a directory cannot
+        # be replaced by a link in one step, so it is moved aside first
+        os.replace(path, f"{path}.v0")
+    link = f"{path}.link"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(build), link)
+    os.replace(link, path)
+    builds = sorted(glob.glob(f"{glob.escape(path)}.v*"), key=lambda name: int(name.rsplit('.v', 1)[1]))
+    for old in builds[:-2]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def open_backend(path):
+    if path.endswith('.duckdb') or path.rstrip(os.sep).endswith('.arrow'):
+        try:
+            import duckdb  # noqa: F401
+        except ImportError:
+            raise RuntimeError("DuckDB backend requested but the 'duckdb' package is not installed")
+    if path.rstrip(os.sep).endswith('.arrow'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Arrow dataset requested but the 'pyarrow' package is not installed")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Database {path} not found; build it with: python backend.py build {path}")
+    return SQLBackend(path)
+
+
+def backend_from_env():
+    # DASHBOARD_DB points at a store built with `python backend.py build`;
+    # without it everything is held in memory
+    db_path = os.environ.get('DASHBOARD_DB')
+    if db_path:
+        return open_backend(db_path)
+    # Survey responses per store from May 30 to Sept 30, 2025
+    responses = generate_responses()
+    responses['comment'] = generate_comments(responses)
+    return PandasBackend(responses, generate_orders())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the on-disk store used by DASHBOARD_DB")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="write responses and derived tables to a .db (SQLite) or .duckdb "
+                                               "file, or an .arrow directory of memory-mappable tables")
+    build.add_argument('path')
+    build.add_argument('--input', help="CSV or Parquet file of responses (default: generated sample data)")
+    build.add_argument('--responses-per-day', type=int, default=40)
+    build.add_argument('--quarantine', default='quarantine.csv', help="where rows failing validation are written")
+    build.add_argument('--orders', help="CSV or Parquet file of orders: customer_id, date (default: generated "
+                                        "sample orders, none with --input)")
+    args = parser.parse_args()
+
+    if args.input:
+        reader = pd.read_parquet if args.input.endswith('.parquet') else pd.read_csv
+        responses, rejected, report = validate_responses(reader(args.input))
+        print(f"Validated {report['rows']:,} rows: {report['clean']:,} clean, {report['rejected']:,} rejected "
+              f"({report['clean_rows_per_second']:,.0f} clean rows/s)")
+        for code, count in report['by_reason'].items():
+            print(f"  {code}: {count:,}")
+        if not rejected.empty:
+            quarantine(rejected, args.quarantine, source=args.input)
+            print(f"Rejected rows written to {args.quarantine}")
+        gaps = missing_days(responses['date'])
+        if len(gaps):
+            print(f"Warning: {len(gaps)} day(s) without responses, first {gaps[0]:%Y-%m-%d}")
+    else:
+        responses = generate_responses(responses_per_day=args.responses_per_day)
+        responses['comment'] = generate_comments(responses)
+    orders = None if args.input else generate_orders()
+    if args.orders:
+        reader = pd.read_parquet if args.orders.endswith('.parquet') else pd.read_csv
+        orders = reader(args.orders)
+        orders['date'] = pd.to_datetime(orders['date'])
+        orders = orders.sort_values('date', kind='stable')
+    build_database(args.path, responses, orders)
+    print(f"Wrote {len(responses):,} responses{f' and {len(orders):,} orders' if orders is not None else ''} to {args.path}")
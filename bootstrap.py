@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+SCORE_LEVELS = 11  # survey scores are integers 0-10
+BOOTSTRAP_CHUNK_BYTES = 16 * 2 ** 20  # Poisson draws held at once
+
+
+def score_histograms(responses, metrics, groups):
+    # Count of each score per (metric, group) in one bincount per metric, so
+    # the cost is a single O(N) pass no matter how many groups there are.
+    # `groups` is a frame of grouping columns aligned with `responses`.
+    group_cols = list(groups.columns)
+    codes = np.zeros(len(groups), dtype=np.int64)
+    levels = []
+    for col in group_cols:
+        col_codes, col_levels = pd.factorize(groups[col], sort=False)
+        codes = codes * len(col_levels) + col_codes
+        levels.append(col_levels)
+    n_groups = int(np.prod([len(level) for level in levels]))
+
+    counts = np.empty((len(metrics), n_groups, SCORE_LEVELS), dtype=np.int64)
+    for i, metric in enumerate(metrics):
+        scores = responses[metric].to_numpy()
+        if scores.dtype.kind == 'f':
+            scores = np.rint(scores)
+        scores = np.clip(scores, 0, SCORE_LEVELS - 1).astype(np.int64)
+        flat = np.bincount(codes * SCORE_LEVELS + scores, minlength=n_groups * SCORE_LEVELS)
+        counts[i] = flat.reshape(n_groups, SCORE_LEVELS)
+
+    # Drop combinations of group values that never occur
+    keys = pd.MultiIndex.from_product(levels, names=group_cols).to_frame(index=False)
+    present = counts[0].sum(axis=1) > 0
+    keys = keys[present].reset_index(drop=True)
+    index = pd.concat([keys.assign(metric=metric) for metric in metrics], ignore_index=True)
+    return index[['metric'] + group_cols], counts[:, present].reshape(-1, SCORE_LEVELS)
+
+
+def bootstrap_means(counts, n_boot=1000, seed=0, chunk_size=None):
+    # Poisson bootstrap on score histograms: every bin count is redrawn as
+    # Poisson(count), which resamples all groups in one batched draw and is
+    # independent of the number of underlying responses. Groups are drawn
+    # `chunk_size` at a time; by default as many as fit in
+    # BOOTSTRAP_CHUNK_BYTES of int64 draws (about 190 for 1000 resamples).
+    # The draws, and so the means, do not depend on the chunk size.
+    if chunk_size is None:
+        chunk_size = max(1, BOOTSTRAP_CHUNK_BYTES // (n_boot * SCORE_LEVELS * 8))
+    rng = np.random.default_rng(seed)
+    levels = np.arange(SCORE_LEVELS, dtype=np.float64)
+    means = np.empty((len(counts), n_boot), dtype=np.float32)
+    for start in range(0, len(counts), chunk_size):
+        block = counts[start:start + chunk_size].astype(np.float64)
+        draws = rng.poisson(block[:, None, :], size=(len(block), n_boot, SCORE_LEVELS))
+        totals = draws.sum(axis=2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means[start:start + len(block)] = (draws @ levels) / totals
+    return means
+
+
+def confidence_intervals(index, counts, targets, n_boot=1000, confidence=0.95, seed=0):
+    # Percentile intervals for every group plus a flag when the whole interval
+    # sits below the metric's target
+    totals = counts.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        point = (counts @ np.arange(SCORE_LEVELS)) / totals
+    means = bootstrap_means(counts, n_boot=n_boot, seed=seed)
+    tail = (1 - confidence) / 2
+    lower, upper = np.nanquantile(means, [tail, 1 - tail], axis=1)
+
+    result = index.copy()
+    result['responses'] = totals
+    result['average_score'] = point
+    result['ci_lower'] = lower
+    result['ci_upper'] = upper
+    result['target'] = result['metric'].map(targets).astype(float)
+    result['significantly_below_target'] = result['ci_upper'] < result['target']
+    return result
@@ -0,0 +1,202 @@
+import functools
+import inspect
+import threading
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from warmup import freeze, result_bytes
+
+
+def object_bytes(value, seen=None):
+    # Deep size of a resident structure: arrays, frames and indexes by their
+    # buffers, containers and plain objects by their contents. Shared objects
+    # are counted once.
+    seen = set() if seen is None else seen
+    if value is None or id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray) and value.dtype == object:
+        return int(value.nbytes) + sum(sys.getsizeof(item) for item in value.ravel())
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return result_bytes(value)
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(object_bytes(key, seen) + object_bytes(item, seen)
+                                          for key, item in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(object_bytes(item, seen) for item in value)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + object_bytes(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+class CacheBudget:
+    # Byte accounting and one memory budget across every cached view.
+    # Functions decorated with `budget.cache_data(...)` are cached by
+    # st.cache_data as before; each entry's size is measured when it is
+    # computed, and once the total passes `budget_bytes` the least recently
+    # used entries, from any cache, are cleared. Entries past their cache's
+    # ttl or beyond its max_entries are dropped from the books as Streamlit
+    # drops them. Calls from background threads (cache warming, progressive
+    # loading) have no script run to show a spinner in; they go through a
+    # spinner-less st.cache_data wrapper of the same function, which shares
+    # its cache. The budget covers cached views only: st.cache_resource
+    # objects and the backend's own derived state (histograms, comment
+    # index, cohorts, ...) live for the process and are never evicted;
+    # `resident_report` lists their sizes next to the views.
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.caches = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def cache_data(self, ttl=None, max_entries=None):
+        def decorate(function):
+            name = function.__name__
+            signature = inspect.signature(function)
+
+            @functools.wraps(function)
+            def compute(*args, **kwargs):
+                self._local.computed = True
+                return function(*args, **kwargs)
+
+            cached = st.cache_data(ttl=ttl, max_entries=max_entries)(compute)
+            background = st.cache_data(ttl=ttl, max_entries=max_entries, show_spinner=False)(compute)
+
+            @functools.wraps(function)
+            def lookup(*args, **kwargs):
+                # Always called with every argument in position, so
+                # positional, keyword and default-argument calls of the same
+                # view share one entry
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                outer = getattr(self._local, 'computed', False)
+                self._local.computed = False
+                try:
+                    in_script = get_script_run_ctx(suppress_warning=True) is not None
+                    result = (cached if in_script else background)(*bound.args)
+                    computed = self._local.computed
+                finally:
+                    self._local.computed = outer
+                self._record(name, bound.args, result, computed)
+                return result
+
+            lookup.clear = functools.partial(self.clear, name)
+            with self._lock:
+                self.caches[name] = {'cached': cached, 'lookup': lookup, 'signature': signature, 'ttl': ttl,
+                                     'max_entries': max_entries}
+                self.stats.setdefault(name, {'hits': 0, 'misses': 0, 'evictions': 0})
+            return lookup
+        return decorate
+
+    def _record(self, name, args, result, computed):
+        now = time.monotonic()
+        entry = (name, freeze(args))
+        # Sizes are measured outside the lock. ttl and max_entries are
+        # mirrored approximately, so a hit on an entry the books already
+        # dropped is measured again.
+        size = result_bytes(result) if computed or entry not in self.entries else None
+        with self._lock:
+            self.stats[name]['misses' if computed else 'hits'] += 1
+            if size is None and entry in self.entries:
+                self.entries.move_to_end(entry)
+            else:
+                self.entries[entry] = (result_bytes(result) if size is None else size, now, args)
+                self.entries.move_to_end(entry)
+            self._drop_expired(now)
+            self._drop_overflow(name)
+            evicted = self._over_budget(entry)
+        for old_name, old_args in evicted:
+            self.caches[old_name]['cached'].clear(*old_args)
+
+    def _drop_expired(self, now):
+        for entry, (_, computed_at, _) in list(self.entries.items()):
+            ttl = self.caches[entry[0]]['ttl']
+            if ttl is not None and now - computed_at > ttl:
+                del self.entries[entry]
+
+    def _drop_overflow(self, name):
+        max_entries = self.caches[name]['max_entries']
+        if max_entries is None:
+            return
+        own = [entry for entry in self.entries if entry[0] == name]
+        for entry in own[:max(len(own) - max_entries, 0)]:
+            del self.entries[entry]
+
+    def _over_budget(self, keep):
+        # Least recently used first; the entry just used is never evicted
+        evicted = []
+        total = sum(size for size, _, _ in self.entries.values())
+        for entry in list(self.entries):
+            if total <= self.budget_bytes:
+                break
+            if entry == keep:
+                continue
+            size, _, args = self.entries.pop(entry)
+            total -= size
+            self.stats[entry[0]]['evictions'] += 1
+            evicted.append((entry[0], args))
+        return evicted
+
+    def resident(self, function, *args, **kwargs):
+        # Whether function(*args) is still cached: False once its entry was
+        # evicted or has expired. Functions outside the budget always are.
+        cache = self.caches.get(getattr(function, '__name__', None))
+        if cache is None or cache['lookup'] is not function:
+            return True
+        bound = cache['signature'].bind(*args, **kwargs)
+        bound.apply_defaults()
+        with self._lock:
+            self._drop_expired(time.monotonic())
+            return (function.__name__, freeze(bound.args)) in self.entries
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(size for size, _, _ in self.entries.values())
+
+    def clear(self, name=None):
+        # One cache by name, or all of them
+        with self._lock:
+            names = list(self.caches) if name is None else [name]
+            for entry in [entry for entry in self.entries if entry[0] in names]:
+                del self.entries[entry]
+            caches = [self.caches[name]['cached'] for name in names]
+        for cached in caches:
+            cached.clear()
+
+    def report(self):
+        # One row per cache: entries, size, hit rate and evictions
+        with self._lock:
+            sizes = {}
+            for (name, _), (size, _, _) in self.entries.items():
+                count, total = sizes.get(name, (0, 0))
+                sizes[name] = (count + 1, total + size)
+            rows = [{
+                'cache': name,
+                'entries': sizes.get(name, (0, 0))[0],
+                'mb': sizes.get(name, (0, 0))[1] / 2 ** 20,
+                'hits': stats['hits'],
+                'misses': stats['misses'],
+                'hit_rate': stats['hits'] / max(stats['hits'] + stats['misses'], 1),
+                'evictions': stats['evictions'],
+                'ttl': self.caches[name]['ttl'],
+                'max_entries': self.caches[name]['max_entries'],
+            } for name, stats in self.stats.items()]
+        return pd.DataFrame(rows, columns=['cache', 'entries', 'mb', 'hits', 'misses', 'hit_rate', 'evictions',
+                                           'ttl', 'max_entries'])
+
+    def resident_report(self, state):
+        # Rows in the `report` layout for {name: object} held outside the
+        # budget, such as backend.resident_state()
+        return pd.DataFrame([{'cache': f"{name} (resident)", 'entries': len(value) if isinstance(value, dict) else int(value is not None),
+                              'mb': object_bytes(value) / 2 ** 20} for name, value in state.items()],
+                            columns=['cache', 'entries', 'mb'])
@@ -0,0 +1,100 @@
+from functools import lru_cache
+from html import escape
+
+from registry import REGISTRY
+
+# Shared card stylesheet; injected once with the page CSS so each card only
+# carries class names
+CARD_CSS = """
+    .card-grid { display: grid; gap: 0 1rem; }
+    .card { padding: 1rem; margin: 0.5rem 0; border-radius: 10px; border-left: 4px solid #1f77b4; color: #333; }
+    .card h1, .card h2, .card h4 { margin: 0; padding: 0; color: inherit; }
+    .card p { margin: 0.2rem 0; }
+    .card .muted { font-size: 0.8em; color: #666; }
+    .card .note { font-size: 0.9em; margin: 0.5rem 0; }
+    .card .alert { color: #ff4444; }
+
+    .month-card { text-align: center; }
+    .month-card h2 { margin: 0.5rem 0; }
+    .month-card.excellent { background: #d4f7d4; border-left-color: #00aa00; }
+    .month-card.good { background: #fff4d4; border-left-color: #ffaa00; }
+    .month-card.poor { background: #ffd4d4; border-left-color: #ff4444; }
+    .month-card.excellent h1 { color: #00aa00; }
+    .month-card.good h1 { color: #ffaa00; }
+    .month-card.poor h1 { color: #ff4444; }
+
+    .priority-card { background: #f8f9fa; border-radius: 8px; }
+    .priority-card p { margin: 0.5rem 0 0 0; }
+
+    .skeleton {
+        display: flex; align-items: center; justify-content: center; margin: 0.5rem 0; border-radius: 10px;
+        color: #888; background: linear-gradient(90deg, #f0f2f6 25%, #fafbfc 50%, #f0f2f6 75%);
+        background-size: 200% 100%; animation: skeleton-shimmer 1.5s ease-in-out infinite;
+    }
+    @keyframes skeleton-shimmer { from { background-position: 100% 0; } to { background-position: -100% 0; } }
+
+    @media (max-width: 768px) {
+        .card-grid { grid-template-columns: minmax(0, 1fr) !important; }
+    }
+"""
+
+# Month card styles by classification band, best first; lower bands are 'poor'
+CLASSIFICATION_CLASSES = dict(zip(REGISTRY['classification']['labels'], ['excellent', 'good']))
+# Priority card icon and border colour per registry priority score, keyed
+# by the rule's position so any score makes a valid class name; a score
+# with no rule gets the plain card
+PRIORITY_ICONS = {rule['score']: rule.get('icon', '•') for rule in REGISTRY['priority']}
+PRIORITY_CLASSES = {rule['score']: f'priority-{rank}' for rank, rule in enumerate(REGISTRY['priority'])}
+CARD_CSS += ''.join(
+    f"    .priority-{rank} {{ border-left-color: {rule['color']}; }}\n"
+    for rank, rule in enumerate(REGISTRY['priority']) if 'color' in rule
+)
+
+
+# Card markup is cached on the displayed values, so unchanged cards cost a
+# dict lookup on rerun
+@lru_cache(maxsize=4096)
+def month_card(month, period, total_days, metric, score, ci_lower, ci_upper, responses,
+               days_below, days_below_pct, classification, significant, percentiles=None):
+    css_class = CLASSIFICATION_CLASSES.get(classification, 'poor')
+    flag = '<p class="note alert"><strong>⚠️ Significantly below target</strong></p>' if significant else ''
+    spread = f'<p class="muted">P10 / P50 / P90: {escape(percentiles)}</p>' if percentiles else ''
+    return (
+        f'<div class="card month-card {css_class}">'
+        f'<h4>{escape(month)}</h4>'
+        f'<p class="muted">{escape(period)}</p>'
+        f'<p class="muted">Total days: {total_days}</p>'
+        f'<h2>Average {escape(metric)}:</h2>'
+        f'<h1>{score}</h1>'
+        f'<p class="muted">95% CI: {ci_lower} – {ci_upper} (n={responses})</p>'
+        f'{spread}'
+        f'<p class="note"><strong>Days below target:</strong> {days_below} ({days_below_pct:.1f}%)</p>'
+        f'{flag}'
+        f'</div>'
+    )
+
+
+@lru_cache(maxsize=4096)
+def priority_card(metric, priority, priority_score, current, gap, trend):
+    return (
+        f'<div class="card priority-card {PRIORITY_CLASSES.get(priority_score, "")}">'
+        f'<h4>{PRIORITY_ICONS.get(priority_score, "•")} {escape(metric)}</h4>'
+        f'<p><strong>Priority:</strong> {escape(priority)}</p>'
+        f'<p><strong>Current Score:</strong> {current:.2f} | <strong>Gap:</strong> {gap:.2f} | '
+        f'<strong>Trend:</strong> {trend:+.2f}</p>'
+        f'</div>'
+    )
+
+
+def card_grid(cards, columns=1):
+    # All cards in one element; `columns` cards per row
+    return (
+        f'<div class="card-grid" style="grid-template-columns: repeat({columns}, minmax(0, 1fr));">'
+        + ''.join(cards)
+        + '</div>'
+    )
+
+
+def skeleton(label, height=300):
+    # Placeholder shown where a chart or table will appear once its data loads
+    return f'<div class="skeleton" style="height: {height}px">⏳ Loading {escape(label)}…</div>'
@@ -0,0 +1,99 @@
+import copy
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from data import period_labels
+
+
+class CohortMatrix:
+    # Customer x period activity as a sparse 0/1 matrix (CSC, one column per
+    # period) plus each customer's first period. Active customers per
+    # (cohort, period) come from one sparse product, cohorts' x activity, so
+    # millions of customers never go through a Python loop. Orders can be
+    # added in batches; only the periods a batch touches are recounted.
+    # Periods must arrive in time order.
+    def __init__(self, first=None):
+        self.first = first
+        self.periods = []
+        self.customers = pd.Index([])
+        self.cohorts = np.array([], dtype=np.int64)
+        self.activity = sparse.csc_matrix((0, 0), dtype=np.int8)
+        self.active = np.zeros((0, 0), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.customers)
+
+    def copy(self):
+        # `add` replaces arrays rather than changing them, so a shallow copy
+        # can take a batch while readers keep using the original
+        return copy.copy(self)
+
+    def add(self, orders):
+        # orders: customer_id, date
+        if orders.empty:
+            return
+        labels = period_labels(orders['date'], first=self.first).astype(str).to_numpy()
+        periods = self.periods + [label for label in pd.unique(labels) if label not in self.periods]
+        columns = pd.Index(periods).get_indexer(labels)
+
+        ids = pd.Index(orders['customer_id'])
+        new_ids = ids[self.customers.get_indexer(ids) < 0].unique()
+        customers = self.customers.append(new_ids) if len(self.customers) else new_ids
+        rows = customers.get_indexer(ids)
+
+        # A customer's cohort is the first period they ordered in; an order
+        # earlier than that (late data) moves the customer to another cohort
+        cohorts = np.concatenate([self.cohorts, np.full(len(new_ids), len(periods), dtype=np.int64)])
+        np.minimum.at(cohorts, rows, columns)
+        moved = (cohorts[:len(self.cohorts)] != self.cohorts).any()
+
+        shape = (len(customers), len(periods))
+        batch = sparse.csc_matrix((np.ones(len(rows), dtype=np.int8), (rows, columns)), shape=shape)
+        batch.sum_duplicates()
+        batch.data[:] = 1
+        activity = self.activity.copy()
+        activity.resize(shape)
+        activity = activity.maximum(batch).tocsc()
+
+        touched = np.arange(len(periods)) if moved else np.unique(columns)
+        membership = sparse.csr_matrix(
+            (np.ones(len(customers), dtype=np.int64), (cohorts, np.arange(len(customers)))),
+            shape=(len(periods), len(customers))
+        )
+        active = np.zeros((len(periods), len(periods)), dtype=np.int64)
+        active[:self.active.shape[0], :self.active.shape[1]] = self.active
+        active[:, touched] = (membership @ activity[:, touched]).toarray()
+
+        self.periods = periods
+        self.customers = customers
+        self.cohorts = cohorts
+        self.activity = activity
+        self.active = active
+
+    def retention(self):
+        # One row per cohort: its size and the share of it ordering again
+        # 1, 2, ... periods after the first (NaN where that period is not in
+        # the data yet)
+        n = len(self.periods)
+        sizes = np.diag(self.active)
+        offsets = np.arange(n)
+        columns = offsets[None, :] + offsets[:, None]
+        shifted = np.where(columns < n, self.active[offsets[:, None], np.minimum(columns, n - 1)], 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shares = np.where(columns < n, shifted / sizes[:, None], np.nan)
+        table = pd.DataFrame(shares[:, 1:], columns=[f"Month {k}" for k in range(1, n)])
+        table.insert(0, 'customers', sizes)
+        table.insert(0, 'cohort', self.periods)
+        return table
+
+    def repeat_rate(self):
+        # Per period: customers from earlier cohorts who ordered again, as a
+        # share of all customers acquired before that period
+        acquired = np.cumsum(np.diag(self.active))
+        returning = np.triu(self.active, k=1).sum(axis=0)
+        before = np.concatenate([[0], acquired[:-1]])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rate = np.where(before > 0, returning / before, np.nan)
+        return pd.DataFrame({'period': self.periods, 'returning': returning, 'repeat_rate': rate})
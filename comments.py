@@ -0,0 +1,193 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from data import METRICS, period_labels
+from registry import REGISTRY
+
+# Risk factor themes per metric and the comment words that count as a
+# mention, from the metric registry
+THEMES = {metric['name']: metric.get('themes', {}) for metric in REGISTRY['metrics']}
+
+# Sample comment text per theme, used for the generated data
+SAMPLE_COMMENTS = {
+    'Service delays': ["Service was delayed for days", "Had to wait too long for help"],
+    'Product quality issues': ["Sofa arrived damaged", "Poor quality fabric on the chair"],
+    'Delivery problems': ["Delivery window was missed", "Problems with my delivery"],
+    'Competitive pricing': ["Found it cheaper elsewhere", "Prices are too expensive"],
+    'Product availability': ["Item was out of stock", "Sectional on backorder for weeks"],
+    'Customer service experience': ["Staff was unhelpful", "The representative was rude on the phone"],
+    'Word-of-mouth reputation': ["Heard mixed things from friends", "Would not tell family to shop here"],
+    'Social media presence': ["Reviews on Facebook look bad", "Saw complaints on social media"],
+    'Customer advocacy': ["Would not recommend yet", "Hard to recommend after this"],
+    'User interface complexity': ["Website is confusing and cluttered", "Interface felt complicated"],
+    'Mobile responsiveness': ["Site breaks on my phone", "Mobile layout is hard to use"],
+    'Loading speed': ["Pages are slow loading", "Site loads with lag"],
+    'Search functionality': ["Search results were irrelevant", "Searching for a recliner was useless"],
+    'Product categorization': ["Categories make no sense", "Filters do not work"],
+    'Navigation structure': ["Got lost in the menu", "Navigation is hard"],
+    'Product descriptions accuracy': ["Description was inaccurate", "Misleading product description"],
+    'Image quality': ["Photos are blurry", "Color looks different than the pictures"],
+    'Specification completeness': ["Missing dimensions", "No specs for the mattress size"],
+    'Hidden fees': ["Hidden fees at the end", "Surprise surcharge on my order"],
+    'Shipping cost transparency': ["Shipping charge not shown upfront", "Charged more for shipping than quoted"],
+    'Tax calculation accuracy': ["Tax was calculated wrong", "Overcharged on taxes"],
+    'Process complexity': ["Checkout has too many steps", "Tedious checkout forms"],
+    'Payment security': ["Card was declined twice", "Did not feel the payment page was secure"],
+    'Guest checkout availability': ["Forced to create an account", "No guest option, had to register"],
+}
+POSITIVE_COMMENTS = ["Great experience overall", "Love my new sofa", "Everything went smoothly", "Will shop again"]
+
+TOKEN_PATTERN = r"[a-z0-9]+"
+MAX_SEGMENTS = 8
+
+
+def generate_comments(responses, rate=0.12, seed=7):
+    # Free-text comment for a share of responses: a risk factor of the
+    # respondent's lowest-scored metric when it is 8 or less, otherwise praise
+    rng = np.random.default_rng(seed)
+    scores = responses[METRICS].to_numpy()
+    worst = scores.argmin(axis=1)
+    phrases = [[text for factor in THEMES.get(metric, {}) for text in SAMPLE_COMMENTS.get(factor, [])]
+               or [f"Not happy with the {metric.lower()}"] for metric in METRICS]
+    # Ragged phrase lists padded into one table, indexed by (metric, choice)
+    table = np.array([options + [None] * (max(map(len, phrases)) - len(options)) for options in phrases], dtype=object)
+    sizes = np.array([len(options) for options in phrases])
+    text = table[worst, (rng.random(len(scores)) * sizes[worst]).astype(int)]
+    praise = np.array(POSITIVE_COMMENTS, dtype=object)[rng.integers(0, len(POSITIVE_COMMENTS), len(scores))]
+    text = np.where(scores.min(axis=1) <= 8, text, praise)
+    return pd.Series(np.where(rng.random(len(scores)) < rate, text, None), index=responses.index, dtype=object)
+
+
+def tokenize(texts):
+    # (document position, token) pairs in document order
+    tokens = pd.Series(texts, dtype=object).str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    return tokens.index.to_numpy(dtype=np.int64), tokens.to_numpy(dtype=object)
+
+
+class CommentIndex:
+    # Inverted index over survey comments. Each batch becomes a segment of
+    # postings (doc ids per term id, CSR layout); segments are merged once
+    # there are more than MAX_SEGMENTS, so adding a batch never re-tokenizes
+    # earlier comments. Doc ids follow arrival order.
+    def __init__(self, first=None):
+        self.first = first
+        self.terms = {}
+        self.segments = []
+        self.dates = np.array([], dtype='datetime64[ns]')
+        self.stores = np.array([], dtype=object)
+        self.texts = np.array([], dtype=object)
+        self._vocabulary = None
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, frame):
+        # frame: date, store, comment; rows without a comment are skipped
+        frame = frame[frame['comment'].notna()]
+        frame = frame[frame['comment'].astype(str).str.strip() != '']
+        if frame.empty:
+            return
+        first_doc = len(self.texts)
+        docs, tokens = tokenize(frame['comment'].to_numpy())
+
+        codes, uniques = pd.factorize(tokens)
+        terms = dict(self.terms)
+        for token in uniques:
+            terms.setdefault(token, len(terms))
+        term_ids = np.array([terms[token] for token in uniques], dtype=np.int64)[codes]
+        # One posting per (term, doc); sorting the combined key orders by
+        # term, then doc
+        keys = np.unique(term_ids * (len(frame) + 1) + docs)
+        term_ids, docs = np.divmod(keys, len(frame) + 1)
+        offsets = np.searchsorted(term_ids, np.arange(len(terms) + 1))
+        segments = self.segments + [(offsets, docs + first_doc)]
+        if len(segments) > MAX_SEGMENTS:
+            segments = [self._merge(segments, len(terms))]
+
+        # Documents first, then postings, so readers never see a doc id
+        # without its text
+        self.dates = np.concatenate([self.dates, pd.to_datetime(frame['date']).to_numpy(dtype='datetime64[ns]')])
+        self.stores = np.concatenate([self.stores, frame['store'].astype(str).to_numpy(dtype=object)])
+        self.texts = np.concatenate([self.texts, frame['comment'].astype(str).to_numpy(dtype=object)])
+        self.terms = terms
+        self.segments = segments
+        self._vocabulary = None
+
+    @staticmethod
+    def _merge(segments, n_terms):
+        term_ids = np.concatenate([np.repeat(np.arange(len(offsets) - 1), np.diff(offsets)) for offsets, _ in segments])
+        docs = np.concatenate([docs for _, docs in segments])
+        order = np.lexsort((docs, term_ids))
+        return np.searchsorted(term_ids[order], np.arange(n_terms + 1)), docs[order]
+
+    def postings(self, term_id):
+        # Sorted doc ids: segments cover increasing doc id ranges
+        parts = [docs[offsets[term_id]:offsets[term_id + 1]]
+                 for offsets, docs in self.segments if term_id < len(offsets) - 1]
+        return np.concatenate(parts) if parts else np.array([], dtype=np.int64)
+
+    def term_ids(self, word):
+        # 'deliver*' expands to every indexed term with that prefix
+        if not word.endswith('*'):
+            return [self.terms[word]] if word in self.terms else []
+        if self._vocabulary is None:
+            self._vocabulary = np.array(sorted(self.terms), dtype=object)
+        prefix = word[:-1]
+        lo = np.searchsorted(self._vocabulary, prefix, side='left')
+        hi = np.searchsorted(self._vocabulary, prefix + '\uffff', side='left')
+        return [self.terms[term] for term in self._vocabulary[lo:hi]]
+
+    def any_of(self, words):
+        ids = [term_id for word in words for term_id in self.term_ids(word)]
+        if len(ids) == 1:
+            return self.postings(ids[0])
+        return np.unique(np.concatenate([self.postings(term_id) for term_id in ids] or [np.array([], dtype=np.int64)]))
+
+    def match(self, query):
+        # Doc ids containing every word of the query
+        words = re.findall(TOKEN_PATTERN + r"\*?", query.lower())
+        if not words:
+            return np.array([], dtype=np.int64)
+        docs = self.any_of([words[0]])
+        for word in words[1:]:
+            docs = np.intersect1d(docs, self.any_of([word]), assume_unique=True)
+        return docs
+
+    def search(self, query, limit=50, store=None):
+        # Newest matching comments first; returns (total matches, frame)
+        docs = self.match(query)
+        if store is not None:
+            docs = docs[self.stores[docs] == store]
+        total = len(docs)
+        dates = self.dates[docs]
+        if len(docs) > limit:
+            top = np.argpartition(-dates.astype(np.int64), limit - 1)[:limit]
+            docs, dates = docs[top], dates[top]
+        order = np.argsort(-dates.astype(np.int64), kind='stable')
+        docs = docs[order]
+        return total, pd.DataFrame({
+            'date': self.dates[docs], 'store': self.stores[docs], 'comment': self.texts[docs]
+        })
+
+    def theme_counts(self, themes=THEMES):
+        # Mentions of each theme per metric, period and store, next to the
+        # number of comments in that period and store
+        if not len(self):
+            return pd.DataFrame(columns=['metric', 'theme', 'period', 'store', 'mentions', 'comments'])
+        periods = period_labels(self.dates, first=self.first)
+        store_codes, stores = pd.factorize(self.stores)
+        cells = periods.cat.codes.to_numpy() * len(stores) + store_codes
+        n_cells = len(periods.cat.categories) * len(stores)
+        comments = np.bincount(cells, minlength=n_cells)
+        labels = pd.MultiIndex.from_product([periods.cat.categories, stores], names=['period', 'store'])
+
+        frames = []
+        for metric, factors in themes.items():
+            for theme, words in factors.items():
+                mentions = np.bincount(cells[self.any_of(words)], minlength=n_cells)
+                frames.append(pd.DataFrame({'metric': metric, 'theme': theme, 'mentions': mentions,
+                                            'comments': comments}, index=labels))
+        counts = pd.concat(frames).reset_index()
+        return counts[counts['comments'] > 0][['metric', 'theme', 'period', 'store', 'mentions', 'comments']]
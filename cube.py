@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+FIELDS = ['score_sum', 'responses', 'days', 'days_below']
+# Weeks are counted from a Monday; blocks of weeks are the unit of storage
+EPOCH = pd.Timestamp('1970-01-05')
+BLOCK_WEEKS = 64
+
+
+def calendar_cells(daily_scores, targets):
+    # All-store daily totals per metric, one cell of the cube per date
+    daily = daily_scores.groupby(['date', 'metric'], as_index=False, observed=True)[['score_sum', 'responses']].sum()
+    metric = daily['metric'].astype(str)
+    average = daily['score_sum'] / daily['responses']
+    return pd.DataFrame({
+        'metric': metric,
+        'date': pd.to_datetime(daily['date']),
+        'score_sum': daily['score_sum'].to_numpy(dtype=float),
+        'responses': daily['responses'].to_numpy(dtype=float),
+        'days': 1.0,
+        'days_below': (average < metric.map(targets)).to_numpy(dtype=float)
+    })
+
+
+class CalendarCube:
+    # metric × week × weekday totals, kept up to date as daily scores arrive.
+    # A (week, weekday) cell is one date, so a month view masks the days of
+    # its at most six weeks instead of keeping a month axis. Weeks are
+    # stored in blocks of BLOCK_WEEKS; `add` replaces only the blocks it
+    # changes, so a copy shares every other block with the original.
+    def __init__(self, metrics):
+        self.metrics = {metric: i for i, metric in enumerate(metrics)}
+        self.blocks = {}
+
+    def copy(self):
+        cube = CalendarCube(list(self.metrics))
+        cube.blocks = dict(self.blocks)
+        return cube
+
+    def add(self, cells, sign=1):
+        # Subtract a day's old cells (sign=-1) before adding them back updated
+        days = (pd.DatetimeIndex(pd.to_datetime(cells['date'])) - EPOCH).days.to_numpy()
+        week, weekday = np.divmod(days, 7)
+        block, row = np.divmod(week, BLOCK_WEEKS)
+        metric = cells['metric'].map(self.metrics).to_numpy()
+        values = sign * cells[FIELDS].to_numpy(dtype=float)
+        for b in np.unique(block):
+            rows = block == b
+            data = self.blocks.get(b)
+            data = np.zeros((len(FIELDS), len(self.metrics), BLOCK_WEEKS, 7)) if data is None else data.copy()
+            for f in range(len(FIELDS)):
+                np.add.at(data[f], (metric[rows], row[rows], weekday[rows]), values[rows, f])
+            self.blocks[b] = data
+
+    def _totals(self, metric=None, month=None):
+        # (week numbers, (field, week, weekday) totals) for one metric or all,
+        # over the whole history or the days of one month ('June 2025')
+        if month is None:
+            blocks = sorted(self.blocks)
+            weeks = np.array([b * BLOCK_WEEKS + i for b in blocks for i in range(BLOCK_WEEKS)], dtype=np.int64)
+            data = (np.concatenate([self.blocks[b] for b in blocks], axis=2) if blocks
+                    else np.zeros((len(FIELDS), len(self.metrics), 0, 7)))
+        else:
+            first = pd.Period(pd.to_datetime(month, format='%B %Y'), 'M')
+            start, end = ((day - EPOCH).days for day in (first.start_time, first.end_time.normalize()))
+            weeks = np.arange(start // 7, end // 7 + 1)
+            empty = np.zeros((len(FIELDS), len(self.metrics), 7))
+            data = np.stack([self.blocks[w // BLOCK_WEEKS][:, :, w % BLOCK_WEEKS] if w // BLOCK_WEEKS in self.blocks
+                             else empty for w in weeks], axis=2)
+            day = weeks[:, None] * 7 + np.arange(7)
+            data = data * ((day >= start) & (day <= end))
+        if metric is None:
+            return weeks, data.sum(axis=1)
+        return weeks, data[:, self.metrics[metric]]
+
+    def average_grid(self, metric, month=None):
+        # Average score per ISO week (rows, in date order, labelled
+        # '2025-W23') and weekday (columns); weeks with no data are dropped
+        weeks, totals = self._totals(metric, month)
+        rows = np.flatnonzero(totals[1].sum(axis=1) > 0)
+        iso = (EPOCH + pd.to_timedelta(weeks[rows] * 7, unit='D')).isocalendar()
+        labels = [f"{year}-W{week:02d}" for year, week in zip(iso['year'], iso['week'])]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            grid = totals[0, rows] / totals[1, rows]
+        return labels, grid
+
+    def weekday_failure_rate(self, month=None):
+        # Share of metric-days below target for each weekday, in %
+        totals = self._totals(month=month)[1].sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return 100 * totals[3] / totals[2]
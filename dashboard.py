@@ -6,6 +6,24 @@ from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime, timedelta
 import io
+import os
+import time
+
+from anomaly import FAILURE_BINS, SEVERITY_LEVELS, severity_from_failure
+from backend import backend_from_env, monthly_figures
+from caches import CacheBudget
+from cards import CARD_CSS, card_grid, month_card, priority_card, skeleton
+from comments import THEMES
+from cube import WEEKDAYS
+from data import (ALL_STORES, DRIVER_METRICS, METRICS, OUTCOME_METRICS, REGIONS, STORES, TARGETS, TIMELINE_METRIC,
+                  period_labels, priority_matrix, score_history)
+from live import LiveFeed, live_sources_from_env
+from payload import compact_figure, figure_bytes
+from promotions import PROMOTION_CALENDAR, in_promotion
+from quantiles import percentile_rollups, percentile_table
+from registry import REGISTRY, band_index, classify_scores, risk_levels, trend_labels
+from warmup import BackgroundLoader, CacheWarmer, UsageTracker
+from report import build_report
 
 # Configure page
 st.set_page_config(
@@ -42,90 +60,320 @@ st.markdown("""
         .main-header { font-size: 1.8rem; }
         .metric-card { margin: 0.25rem 0; }
     }
+""" + CARD_CSS + """
 </style>
 """, unsafe_allow_html=True)
 
-# Generate sample data for the dashboard
-@st.cache_data
-def load_data():
-    # Daily satisfaction scores from May 30 to Sept 30, 2025
-    start_date = datetime(2025, 5, 30)
-    end_date = datetime(2025, 9, 30)
-    date_range = pd.date_range(start_date, end_date, freq='D')
-
-    # Generate realistic daily satisfaction scores
-    np.random.seed(42)
-    base_scores = np.random.normal(8.5, 1.2, len(date_range))
-
-    # Add seasonal trends and promotion effects
-    daily_data = []
-    for i, date in enumerate(date_range):
-        score = base_scores[i]
-
-        # Weekend effect (slightly lower satisfaction)
-        if date.weekday() >= 5:
-            score -= 0.3
-
-        # Promotion periods (higher satisfaction)
-        if date.month == 6 and date.day in range(15, 21):  # June promotion
-            score += 1.5
-        if date.month == 8 and date.day in range(1, 8):    # August promotion
-            score += 1.2
-        if date.month == 9 and date.day in range(20, 27):  # September promotion
-            score += 1.8
-
-        # Special events (mixed effects)
-        if date.month == 7 and date.day == 15:  # System maintenance
-            score -= 2.5
-        if date.month == 8 and date.day == 20:  # Store renovation
-            score -= 1.8
-
-        # Ensure realistic bounds
-        score = max(0, min(10, score))
-
-        daily_data.append({
-            'date': date,
-            'satisfaction_score': round(score, 1),
-            'month': date.strftime('%B %Y'),
-            'month_short': date.strftime('%b'),
-            'day_name': date.strftime('%A'),
-            'is_weekend': date.weekday() >= 5,
-            'week': date.isocalendar()[1]
-        })
-
-    daily_df = pd.DataFrame(daily_data)
-
-    # Enhanced events data with more comprehensive information
-    enhanced_events_data = [
-        # Critical Events
-        {'date': datetime(2025, 8, 11), 'day_of_week': 'Tuesday', 'failed_metrics': '7/8', 'failure_percentage': 87.5, 'promotion': 'Without promo', 'severity': 'Critical'},
-        {'date': datetime(2025, 8, 13), 'day_of_week': 'Saturday', 'failed_metrics': '6/8', 'failure_percentage': 75.0, 'promotion': 'No promotion', 'severity': 'High'},
-        {'date': datetime(2025, 6, 29), 'day_of_week': 'Monday', 'failed_metrics': '6/8', 'failure_percentage': 75.0, 'promotion': '4th of July Event 7% OFF', 'severity': 'High'},
-        {'date': datetime(2025, 8, 7), 'day_of_week': 'Sunday', 'failed_metrics': '4/8', 'failure_percentage': 50.0, 'promotion': 'No promotion', 'severity': 'Medium'},
-        {'date': datetime(2025, 8, 25), 'day_of_week': 'Thursday', 'failed_metrics': '4/8', 'failure_percentage': 50.0, 'promotion': 'Without promo', 'severity': 'Medium'},
-        {'date': datetime(2025, 9, 22), 'day_of_week': 'Tuesday', 'failed_metrics': '4/8', 'failure_percentage': 50.0, 'promotion': 'Without promo', 'severity': 'Medium'},
-
-        # Additional Events (Non-Critical)
-        {'date': datetime(2025, 7, 14), 'day_of_week': 'Tuesday', 'failed_metrics': '3/8', 'failure_percentage': 37.5, 'promotion': 'Anniversary Sale Kick Off', 'severity': 'Low'},
-        {'date': datetime(2025, 7, 8), 'day_of_week': 'Wednesday', 'failed_metrics': '3/8', 'failure_percentage': 37.5, 'promotion': 'No promotion', 'severity': 'Low'},
-        {'date': datetime(2025, 8, 2), 'day_of_week': 'Sunday', 'failed_metrics': '3/8', 'failure_percentage': 37.5, 'promotion': 'No promotion', 'severity': 'Low'},
-        {'date': datetime(2025, 8, 13), 'day_of_week': 'Thursday', 'failed_metrics': '3/8', 'failure_percentage': 37.5, 'promotion': 'No promotion', 'severity': 'Low'},
-        {'date': datetime(2025, 8, 18), 'day_of_week': 'Monday', 'failed_metrics': '3/8', 'failure_percentage': 37.5, 'promotion': 'No promotion', 'severity': 'Low'},
-
-        # Good Performance Events (for context)
-        {'date': datetime(2025, 6, 15), 'day_of_week': 'Monday', 'failed_metrics': '2/8', 'failure_percentage': 25.0, 'promotion': 'Father Day Special 15% OFF', 'severity': 'Low'},
-        {'date': datetime(2025, 9, 1), 'day_of_week': 'Tuesday', 'failed_metrics': '2/8', 'failure_percentage': 25.0, 'promotion': 'Labor Day Sale', 'severity': 'Low'},
-        {'date': datetime(2025, 7, 20), 'day_of_week': 'Monday', 'failed_metrics': '1/8', 'failure_percentage': 12.5, 'promotion': 'Summer Clearance 20% OFF', 'severity': 'Low'},
-        {'date': datetime(2025, 8, 24), 'day_of_week': 'Sunday', 'failed_metrics': '1/8', 'failure_percentage': 12.5, 'promotion': 'Back to School Furniture', 'severity': 'Low'},
-        {'date': datetime(2025, 9, 15), 'day_of_week': 'Friday', 'failed_metrics': '0/8', 'failure_percentage': 0.0, 'promotion': 'Fall Collection Launch', 'severity': 'Low'},
+# Generate sample data for the dashboard; it loads in a background thread
+# behind placeholders, so without a spinner
+@st.cache_resource(show_spinner=False)
+def get_backend():
+    return backend_from_env()
+
+@st.cache_resource
+def get_cache_budget():
+    # One memory budget for the cached views of every session;
+    # DASHBOARD_CACHE_BUDGET_MB sets it
+    return CacheBudget(float(os.environ.get('DASHBOARD_CACHE_BUDGET_MB', 512)) * 2 ** 20)
+
+# Cached views expire after DASHBOARD_CACHE_TTL_MINUTES; per-filter views
+# also keep at most FILTER_VIEW_ENTRIES entries each
+cache_budget = get_cache_budget()
+CACHE_TTL_SECONDS = float(os.environ.get('DASHBOARD_CACHE_TTL_MINUTES', 60)) * 60
+FILTER_VIEW_ENTRIES = 256
+
+@st.cache_resource
+def get_live_feed():
+    # Live mode: new survey batches from DASHBOARD_LIVE_DIR (drop folder) or
+    # DASHBOARD_LIVE_FILE (append-only CSV) are appended to the in-memory backend;
+    # rows failing validation go to DASHBOARD_QUARANTINE_FILE
+    sources = live_sources_from_env()
+    if not sources or os.environ.get('DASHBOARD_DB'):
+        return None
+    return LiveFeed(get_backend(), sources, min_interval=REFRESH_SECONDS / 2,
+                    quarantine_path=os.environ.get('DASHBOARD_QUARANTINE_FILE', 'quarantine.csv'),
+                    known_dates=get_backend().daily_timeline()['date'])
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS)
+def load_monthly_data(data_version):
+    # Monthly aggregates and bootstrap intervals, recomputed once per data version
+    return monthly_figures(get_backend(), TARGETS)
+
+def metric_score_history(data_version):
+    # Monthly scores per metric across all stores, oldest period first
+    return score_history(load_monthly_data(data_version))
+
+def current_data_version():
+    # Every fragment rerun pulls in pending live batches before reading data;
+    # a new version also starts a background cache warm
+    if live_feed is not None:
+        live_feed.poll()
+    data_version = backend.data_version()
+    if cache_warmer is not None:
+        cache_warmer.schedule(data_version)
+    return data_version
+
+def data_span(data_version):
+    # First day, last day and number of days with responses
+    dates = load_daily_timeline(data_version, "All Months")['date']
+    return dates.min(), dates.max(), dates.nunique()
+
+def long_date(day):
+    return f"{day:%B} {day.day}, {day.year}"
+
+def band_colors(key):
+    # Label -> colour for a registry band (classification, risk, trend)
+    return dict(zip(REGISTRY[key]['labels'], REGISTRY[key]['colors']))
+
+def plotly_chart(fig, name, **kwargs):
+    # Every chart goes through here: arrays are rounded/compacted before
+    # sending and, with DASHBOARD_PAYLOAD_REPORT=1, the spec size is recorded
+    compact_figure(fig)
+    if PAYLOAD_REPORT:
+        st.session_state.setdefault('chart_payload', {})[name] = figure_bytes(fig)
+    return st.plotly_chart(fig, use_container_width=True, **kwargs)
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=FILTER_VIEW_ENTRIES)
+def load_daily_timeline(data_version, month):
+    return backend.daily_timeline(None if month == "All Months" else month)
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=FILTER_VIEW_ENTRIES)
+def timeline_positions(data_version, month):
+    # date -> row of the Tab 1 frame, so highlighted dates are dict lookups
+    daily = load_daily_timeline(data_version, month)
+    return dict(zip(daily['date'], range(len(daily))))
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=FILTER_VIEW_ENTRIES)
+def monthly_metric_view(metric_name, store_name, data_version):
+    # Monthly figures for one metric and store, as shown on the Tab 2 cards
+    monthly = load_monthly_data(data_version)
+    rows = monthly[(monthly['metric'] == metric_name) & (monthly['store'] == store_name)]
+    target_score = TARGETS[metric_name]
+
+    enhanced_data = pd.DataFrame({
+        'month': rows['period'],
+        'period': rows['period_range'],
+        'total_days': rows['total_days'],
+        'responses': rows['responses'],
+        'average_score': rows['average_score'],
+        'ci_lower': rows['ci_lower'],
+        'ci_upper': rows['ci_upper'],
+        'significantly_below_target': rows['significantly_below_target'],
+        'days_below_target': rows['days_below_target'],
+        'days_below_percentage': rows['days_below_percentage'],
+        'performance_vs_target': rows['average_score'] - target_score,
+        'classification': classify_scores(rows['average_score'], target_score)
+    })
+    enhanced_data['ci_plus'] = enhanced_data['ci_upper'] - enhanced_data['average_score']
+    enhanced_data['ci_minus'] = enhanced_data['average_score'] - enhanced_data['ci_lower']
+
+    return enhanced_data.reset_index(drop=True)
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=FILTER_VIEW_ENTRIES)
+def load_events(data_version, failure_threshold=0, promotion=None, severities=None, sort_by='date',
+                ascending=True, date_range=None):
+    return backend.events(failure_threshold=failure_threshold, promotion=promotion,
+                          severities=None if severities is None else list(severities), sort_by=sort_by,
+                          ascending=ascending, date_range=date_range)
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS)
+def timeline_percentiles(data_version, grain):
+    # Timeline metric p10/p50/p90 across all stores, per day or per week
+    # (weeks start Monday), merged from the daily store-level sketches
+    index, counts = backend.daily_histograms()
+    keep = (index['metric'] == TIMELINE_METRIC).to_numpy()
+    index = index[keep].reset_index(drop=True)
+    dates = pd.to_datetime(index['date'])
+    index['period'] = dates if grain == 'Day' else dates.dt.to_period('W').dt.start_time
+    return percentile_table(index, counts[keep], ['period'])
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS)
+def comment_themes(data_version):
+    # Risk factor mentions per metric, period and store from the comment index
+    return backend.comment_index().theme_counts(THEMES)
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS)
+def cohort_retention(data_version):
+    # Retention by first-purchase cohort and the repeat rate per period
+    cohorts = backend.cohort_matrix()
+    return cohorts.retention(), cohorts.repeat_rate()
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS)
+def promotion_uplift_view(data_version):
+    # In-window vs baseline scores for every promotion, metric and store
+    return backend.promotion_uplift(PROMOTION_CALENDAR)
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=FILTER_VIEW_ENTRIES)
+def driver_ranking(data_version, outcome, store, period):
+    # Standardized driver weights for one outcome, store and period, merged
+    # from the per-day, per-store score moments
+    moments = backend.driver_moments()
+    dates = moments.index['date']
+    days = None if period == ALL_PERIODS else dates[(period_labels(dates).astype(str) == period).to_numpy()].unique()
+    return moments.drivers(outcome, DRIVER_METRICS, stores=None if store == ALL_STORES else [store], dates=days)
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=FILTER_VIEW_ENTRIES)
+def range_comparison(data_version, range_a, range_b, store):
+    # Every metric for two date ranges, from the backend's prefix sums
+    return backend.range_sums().compare(range_a, range_b, stores=[store])
+
+def preset_ranges(preset, last):
+    # (earlier range, later range) ending on the last day with data
+    last = pd.Timestamp(last).normalize()
+    if preset in ('Last 7 days vs prior 7', 'Last 30 days vs prior 30'):
+        days = 7 if '7' in preset else 30
+        return ((last - pd.Timedelta(days=2 * days - 1), last - pd.Timedelta(days=days)),
+                (last - pd.Timedelta(days=days - 1), last))
+    if preset == 'Quarter to date vs last quarter':
+        quarter = last.to_period('Q')
+        return ((quarter - 1).start_time, (quarter - 1).end_time.normalize()), (quarter.start_time, last)
+    recent = (last - pd.Timedelta(days=29), last)
+    if preset == 'Year over year (last 30 days)':
+        return tuple(day - pd.DateOffset(years=1) for day in recent), recent
+    # Custom ranges start from the two months before the last day
+    return (last - pd.DateOffset(months=2), last - pd.DateOffset(months=1) - pd.Timedelta(days=1)), \
+        (last - pd.DateOffset(months=1), last)
+
+@cache_budget.cache_data(ttl=CACHE_TTL_SECONDS)
+def monthly_percentiles(data_version):
+    # Monthly p10/p50/p90 per store, region and all stores
+    return percentile_rollups(*backend.score_histograms(), ['metric', 'period'], REGIONS)
+
+# Linked selection between Tab 1 and Tab 3, kept in session state. Widgets
+# rerun only their own fragment; when a selection changes what the other tab
+# shows, the callback reruns both tab fragments and nothing else
+LINKED_TABS = ['daily_timeline_tab', 'critical_events_tab']
+
+def set_highlight(dates):
+    dates = sorted(set(dates))
+    if dates == st.session_state.get('highlight_dates', []):
+        return False
+    st.session_state['highlight_dates'] = dates
+    return True
+
+def set_timeline_range(date_range):
+    if date_range == st.session_state.get('timeline_range'):
+        return False
+    st.session_state['timeline_range'] = date_range
+    return True
+
+def rerun_linked_tabs(changed):
+    if changed:
+        st.rerun(LINKED_TABS)
+
+def selected_dates(chart_key, curve=None):
+    points = st.session_state[chart_key].selection.points
+    return [pd.Timestamp(point['x']).normalize() for point in points
+            if point.get('x') is not None and curve in (None, point.get('curve_number'))]
+
+def on_timeline_select():
+    # Only the daily line counts; percentile band points are ignored
+    dates = selected_dates('timeline_chart', curve=0)
+    rerun_linked_tabs(set_timeline_range((min(dates), max(dates)) if dates else None))
+
+def on_events_select():
+    rerun_linked_tabs(set_highlight(selected_dates('events_chart')))
+
+def highlight_event(date):
+    rerun_linked_tabs(set_highlight([date]))
+
+def clear_linked_selection():
+    rerun_linked_tabs(set_highlight([]) | set_timeline_range(None))
+
+def warm_status():
+    status = cache_warmer.status if cache_warmer is not None else {}
+    if status:
+        st.caption(f"Cache warm-up ({status['state']}): {status['warmed']}/{status['jobs']} views, "
+                   f"{status['bytes'] / 2 ** 20:.1f} MB")
+
+def warm_plan(data_version):
+    # Views shared by every tab first, then per-filter views by how often they
+    # were opened; every metric, month and the default event filters are
+    # included even before anyone has opened them
+    jobs = [
+        (load_monthly_data, (data_version,)),
+        (monthly_percentiles, (data_version,)),
+        (comment_themes, (data_version,)),
+        (timeline_percentiles, (data_version, "Day")),
+        (cohort_retention, (data_version,)),
+        (promotion_uplift_view, (data_version,)),
+        (driver_ranking, (data_version, OUTCOME_METRICS[0], ALL_STORES, ALL_PERIODS)),
     ]
-
-    events_df = pd.DataFrame(enhanced_events_data)
-
-    return daily_df, events_df
-
-# Load data
-daily_df, events_df = load_data()
+    events = usage.ranked('events', [DEFAULT_EVENT_FILTERS])
+    months = usage.ranked('daily', [("All Months",)] + [(month,) for month in backend.months()])
+    monthly = usage.ranked('monthly', [(metric, ALL_STORES) for metric in METRICS])
+    # date_range is passed as Tab 3 passes it, so the cache keys match
+    jobs += [(load_events, (data_version,) + filters + (None,)) for filters in events[:EVENT_VIEWS_WARMED]]
+    for month, in months:
+        jobs += [(load_daily_timeline, (data_version, month)), (timeline_positions, (data_version, month))]
+    jobs += [(monthly_metric_view, (metric, store, data_version)) for metric, store in monthly]
+    return jobs
+
+@st.cache_resource
+def get_usage():
+    return UsageTracker(os.environ.get('DASHBOARD_USAGE_FILE', 'usage.json'))
+
+def record_view(view, *params):
+    # Counted when a session first shows a view or changes its filters;
+    # reruns with the same filters (live ticks, other widgets) are not opens
+    shown = st.session_state.setdefault('recorded_views', {})
+    if shown.get(view) != params:
+        shown[view] = params
+        usage.record(view, *params)
+
+@st.cache_resource
+def get_cache_warmer():
+    # DASHBOARD_WARM=0 turns warming off; DASHBOARD_WARM_BUDGET_MB caps the
+    # size of the results one warm-up may add to the cache, and warming also
+    # stops when the shared cache budget is full
+    if os.environ.get('DASHBOARD_WARM') == '0':
+        return None
+    budget = float(os.environ.get('DASHBOARD_WARM_BUDGET_MB', 256)) * 2 ** 20
+    return CacheWarmer(warm_plan, budget, workers=int(os.environ.get('DASHBOARD_WARM_WORKERS', 2)), usage=usage,
+                       cache_budget=cache_budget)
+
+@st.cache_resource
+def get_loader():
+    # DASHBOARD_PROGRESSIVE=0 loads everything before rendering, as headless
+    # runs (snapshots, tests) need. Evicted or expired views load again.
+    return BackgroundLoader(enabled=os.environ.get('DASHBOARD_PROGRESSIVE') != '0', budget=cache_budget)
+
+def load(label, function, *args, height=300, places=None):
+    # Returns once function(*args) is cached, so the caller can call it
+    # directly. It runs in the background; if it takes longer than
+    # LOAD_WAIT_SECONDS a placeholder is shown (in each of `places`, by
+    # default here) while this fragment waits. Tabs are parallel fragments,
+    # so the other tabs keep drawing and nothing is rerun when a load ends.
+    if loader.ready(function, *args, wait=LOAD_WAIT_SECONDS):
+        return
+    slots = [place.empty() for place in places or [st]]
+    for slot in slots:
+        slot.markdown(skeleton(label, height), unsafe_allow_html=True)
+    while not loader.ready(function, *args, wait=LOADING_POLL_SECONDS):
+        pass
+    for slot in slots:
+        slot.empty()
+
+# Page shell first; the backend and slow views load in the background
+PAYLOAD_REPORT = os.environ.get('DASHBOARD_PAYLOAD_REPORT') == '1'
+CACHE_ADMIN = os.environ.get('DASHBOARD_CACHE_ADMIN') == '1'
+REFRESH_SECONDS = float(os.environ.get('DASHBOARD_REFRESH_SECONDS', 10))
+EVENT_SEVERITIES = SEVERITY_LEVELS[::-1]
+SEVERITY_COLORS = dict(zip(SEVERITY_LEVELS, REGISTRY['severity']['colors']))
+SEVERITY_ICONS = dict(zip(SEVERITY_LEVELS, REGISTRY['severity']['icons']))
+# Priority scores from the most urgent rule to the fallback; the more urgent
+# half of the levels counts as high priority
+PRIORITY_SCORES = [rule['score'] for rule in REGISTRY['priority']]
+HIGH_PRIORITY_SCORES = PRIORITY_SCORES[:len(PRIORITY_SCORES) // 2]
+DEFAULT_EVENT_FILTERS = (0, None, tuple(EVENT_SEVERITIES), 'date', True)
+EVENT_VIEWS_WARMED = 5
+BUY_AGAIN_METRIC = 'Likelihood to Buy Again'
+RANGE_PRESETS = ['Last 7 days vs prior 7', 'Last 30 days vs prior 30', 'Quarter to date vs last quarter',
+                 'Year over year (last 30 days)', 'Custom']
+ALL_PERIODS = 'All Periods'
+LOAD_WAIT_SECONDS = float(os.environ.get('DASHBOARD_LOAD_WAIT_SECONDS', 0.3))
+LOADING_POLL_SECONDS = 0.5
+loader = get_loader()
 
 # Sidebar
 st.sidebar.markdown("### 📊 Dashboard Navigation")
@@ -134,38 +382,45 @@ st.sidebar.markdown("---")
 # Main header
 st.markdown('<h1 class="main-header">City Furniture - Interactive Customer Satisfaction Analysis</h1>', 
            unsafe_allow_html=True)
-st.markdown("**May 30, 2025 to September 30, 2025** | (124 days analyzed)")
+data_range = st.container()
 
 # Create tabs
 tab1, tab2, tab3, tab4 = st.tabs(["📈 Daily Timeline", "📊 Monthly Comparison", "⚠️ Critical Events", "🎯 Risk Analysis"])
 
-# TAB 1: Daily Timeline
-with tab1:
-    st.header("Daily Satisfaction Timeline")
-
-    # Filters
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        month_filter = st.selectbox(
-            "Filter by Month:",
-            options=["All Months"] + sorted(daily_df['month'].unique()),
-            key="daily_month_filter"
-        )
+# Header and tabs are already on screen while the data loads
+load("survey data", get_backend, height=500, places=(tab1, tab2, tab3, tab4))
+backend = get_backend()
+live_feed = get_live_feed()
+usage = get_usage()
+cache_warmer = get_cache_warmer()
+refresh_interval = REFRESH_SECONDS if live_feed is not None else None
+# Pending batches are read before the tabs start drawing in parallel
+current_data_version()
+
+# In live mode the header, the tabs and the footer each poll the data
+# version on the refresh timer and redraw only themselves
+@st.fragment(run_every=refresh_interval)
+def data_range_header():
+    first, last, days = data_span(current_data_version())
+    st.markdown(f"**{long_date(first)} to {long_date(last)}** | ({days:,} days analyzed)")
+
+with data_range:
+    data_range_header()
 
-    with col2:
-        show_weekends = st.checkbox("Highlight Weekends", value=True)
-
-    with col3:
-        show_target = st.checkbox("Show Target Line (9.0)", value=True)
-
-    # Filter data based on selection
-    filtered_daily = daily_df.copy()
-    if month_filter != "All Months":
-        filtered_daily = daily_df[daily_df['month'] == month_filter]
+# TAB 1: Daily Timeline
+def daily_timeline_chart(data_version, month_filter, show_weekends, show_target, band_grain):
+    # Timeline chart and summary statistics for the selected month
+    timeline_target = TARGETS[TIMELINE_METRIC]
+    filtered_daily = load_daily_timeline(data_version, month_filter)
 
     # Create timeline chart
     fig_timeline = go.Figure()
 
+    # Weekends and below-target days are styled on the main trace instead of
+    # being sent again as a second trace
+    below_target = filtered_daily['satisfaction_score'] < timeline_target
+    weekend = filtered_daily['is_weekend'].to_numpy() & show_weekends
+
     # Main satisfaction line
     fig_timeline.add_trace(go.Scatter(
         x=filtered_daily['date'],
@@ -174,39 +429,79 @@ with tab1:
         name='Daily Satisfaction',
         line=dict(color='#1f77b4', width=2),
         marker=dict(
-            size=6,
-            color=np.where(filtered_daily['satisfaction_score'] < 9.0, 'red', '#1f77b4'),
+            size=np.where(weekend, 8, 6),
+            color=np.where(weekend, 'orange', np.where(below_target, 'red', '#1f77b4')),
+            symbol=np.where(weekend, 'diamond', 'circle'),
             line=dict(width=1, color='white')
         ),
-        hovertemplate='<b>%{x|%B %d, %Y}</b><br>' +
+        text=np.where(weekend, ' (Weekend)', ''),
+        hovertemplate='<b>%{x|%B %d, %Y}%{text}</b><br>' +
                       'Satisfaction: %{y}<br>' +
                       '<extra></extra>'
     ))
 
+    # Spread of individual responses behind each daily average
+    if band_grain != "Off" and not filtered_daily.empty:
+        load("percentile band", timeline_percentiles, data_version, band_grain, height=100)
+        bands = timeline_percentiles(data_version, band_grain)
+        first, last = filtered_daily['date'].min(), filtered_daily['date'].max()
+        bands = bands[bands['period'].between(first - pd.Timedelta(days=6), last)]
+        line_shape = 'hv' if band_grain == "Week" else 'linear'
+        fig_timeline.add_trace(go.Scatter(
+            x=bands['period'], y=bands['p90'], mode='lines', line=dict(width=0, shape=line_shape),
+            showlegend=False, hoverinfo='skip'
+        ))
+        fig_timeline.add_trace(go.Scatter(
+            x=bands['period'], y=bands['p10'], mode='lines', line=dict(width=0, shape=line_shape),
+            fill='tonexty', fillcolor='rgba(31,119,180,0.15)', name='P10–P90',
+            customdata=bands[['p90', 'responses']], hovertemplate=
+                'P10: %{y:.1f} · P90: %{customdata[0]:.1f}<br>Responses: %{customdata[1]}<extra></extra>'
+        ))
+        fig_timeline.add_trace(go.Scatter(
+            x=bands['period'], y=bands['p50'], mode='lines', line=dict(color='#1f77b4', width=1, dash='dot', shape=line_shape),
+            name='Median (P50)', hovertemplate='Median: %{y:.1f}<extra></extra>'
+        ))
+
     # Add target line
     if show_target:
         fig_timeline.add_hline(
-            y=9.0,
+            y=timeline_target,
             line_dash="dash",
             line_color="green",
-            annotation_text="Target (9.0)",
+            annotation_text=f"Target ({timeline_target})",
             annotation_position="bottom right"
         )
 
-    # Highlight weekends
-    if show_weekends:
-        weekend_data = filtered_daily[filtered_daily['is_weekend']]
-        if not weekend_data.empty:
-            fig_timeline.add_trace(go.Scatter(
-                x=weekend_data['date'],
-                y=weekend_data['satisfaction_score'],
-                mode='markers',
-                name='Weekends',
-                marker=dict(size=8, color='orange', symbol='diamond'),
-                hovertemplate='<b>%{x|%B %d, %Y} (Weekend)</b><br>' +
-                              'Satisfaction: %{y}<br>' +
-                              '<extra></extra>'
-            ))
+    # Dates highlighted from the Critical Events tab
+    positions = timeline_positions(data_version, month_filter)
+    highlight_dates = st.session_state.get('highlight_dates', [])
+    rows = [positions[day] for day in highlight_dates if day in positions]
+    if rows:
+        highlighted = filtered_daily.iloc[rows]
+        fig_timeline.add_trace(go.Scatter(
+            x=highlighted['date'],
+            y=highlighted['satisfaction_score'],
+            mode='markers',
+            name='Highlighted Events',
+            marker=dict(size=16, color='rgba(0,0,0,0)', line=dict(width=3, color='#9b59b6')),
+            hoverinfo='skip'
+        ))
+
+    # Range selected on this chart (filters the Critical Events tab)
+    timeline_range = st.session_state.get('timeline_range')
+    if timeline_range is not None:
+        fig_timeline.add_vrect(x0=timeline_range[0], x1=timeline_range[1],
+                               fillcolor='#9b59b6', opacity=0.1, line_width=0)
+
+    # Legend entry for the weekend styling (no data points)
+    if weekend.any():
+        fig_timeline.add_trace(go.Scatter(
+            x=[None],
+            y=[None],
+            mode='markers',
+            name='Weekends',
+            marker=dict(size=8, color='orange', symbol='diamond')
+        ))
 
     # Update layout for responsiveness
     fig_timeline.update_layout(
@@ -216,7 +511,8 @@ with tab1:
         hovermode='closest',
         height=500,
         showlegend=True,
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        dragmode='select'
     )
 
     # Make responsive
@@ -225,7 +521,22 @@ with tab1:
         margin=dict(l=0, r=0, t=50, b=0),
     )
 
-    st.plotly_chart(fig_timeline, use_container_width=True)
+    plotly_chart(fig_timeline, 'Daily timeline', key='timeline_chart', on_select=on_timeline_select,
+                 selection_mode='box')
+
+    if highlight_dates or timeline_range is not None:
+        notes = []
+        if highlight_dates:
+            notes.append("Highlighted: " + ", ".join(day.strftime('%m/%d') for day in highlight_dates))
+            if len(rows) < len(highlight_dates):
+                notes.append("(some highlighted dates are outside the selected month)")
+        if timeline_range is not None:
+            notes.append(f"Critical Events limited to {timeline_range[0]:%m/%d} – {timeline_range[1]:%m/%d}")
+        note_col, clear_col = st.columns([4, 1])
+        with note_col:
+            st.caption(" ".join(notes))
+        with clear_col:
+            st.button("Clear selection", key="clear_linked_selection", on_click=clear_linked_selection)
 
     # Summary statistics
     col1, col2, col3, col4 = st.columns(4)
@@ -234,7 +545,7 @@ with tab1:
         st.metric("Average Score", f"{avg_score:.1f}")
 
     with col2:
-        below_target = (filtered_daily['satisfaction_score'] < 9.0).sum()
+        below_target = (filtered_daily['satisfaction_score'] < timeline_target).sum()
         st.metric("Days Below Target", below_target)
 
     with col3:
@@ -245,92 +556,101 @@ with tab1:
         worst_day = filtered_daily.loc[filtered_daily['satisfaction_score'].idxmin()]
         st.metric("Lowest Score", f"{worst_day['satisfaction_score']:.1f}")
 
+
+@st.fragment(key='daily_timeline_tab', parallel=True, run_every=refresh_interval)
+def daily_timeline_tab():
+    data_version = current_data_version()
+    st.header("Daily Satisfaction Timeline")
+    timeline_target = TARGETS[TIMELINE_METRIC]
+
+    # Filters
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        month_filter = st.selectbox(
+            "Filter by Month:",
+            options=["All Months"] + backend.months(),
+            key="daily_month_filter"
+        )
+
+    with col2:
+        show_weekends = st.checkbox("Highlight Weekends", value=True)
+
+    with col3:
+        show_target = st.checkbox(f"Show Target Line ({timeline_target})", value=True)
+
+    with col4:
+        band_grain = st.radio("Percentile band (P10–P90):", options=["Day", "Week", "Off"],
+                              horizontal=True, key="percentile_band")
+
+    # Filled in once the month's rows have loaded
+    record_view('daily', month_filter)
+    load("daily timeline", load_daily_timeline, data_version, month_filter, height=500)
+    daily_timeline_chart(data_version, month_filter, show_weekends, show_target, band_grain)
+
+    # Calendar heatmap from the metric x week x weekday cube
+    st.subheader("📅 Calendar Heatmap")
+    calendar_metric = st.selectbox(
+        "Heatmap metric:",
+        options=list(TARGETS),
+        key="calendar_metric"
+    )
+    weeks, grid = backend.calendar_cube().average_grid(
+        calendar_metric, None if month_filter == "All Months" else month_filter
+    )
+    fig_calendar = go.Figure(go.Heatmap(
+        z=grid,
+        x=WEEKDAYS,
+        y=weeks,
+        colorscale='RdYlGn',
+        zmid=TARGETS[calendar_metric],
+        colorbar=dict(title="Score"),
+        hovertemplate='%{y}, %{x}<br>Average: %{z:.2f}<extra></extra>'
+    ))
+    fig_calendar.update_layout(
+        title=f"{calendar_metric} by Week and Day (all stores)",
+        yaxis=dict(autorange='reversed'),
+        height=max(300, 28 * len(weeks) + 120),
+        margin=dict(l=0, r=0, t=50, b=0)
+    )
+    plotly_chart(fig_calendar, 'Calendar heatmap')
+
+with tab1:
+    daily_timeline_tab()
+
 # TAB 2: Monthly Comparison (Enhanced Version)
-with tab2:
+@st.fragment(parallel=True, run_every=refresh_interval)
+def monthly_comparison_tab():
+    data_version = current_data_version()
     st.header("Monthly Performance Comparison")
 
-    # Enhanced metric selector (same as shown in the image)
-    metric_options = {
-        'Overall Satisfaction': {'target': 9.0, 'format': '{:.2f}'},
-        'Likelihood to Buy Again': {'target': 9.0, 'format': '{:.2f}'},
-        'Likelihood to Recommend': {'target': 9.0, 'format': '{:.2f}'},
-        'Site Design': {'target': 9.0, 'format': '{:.2f}'},
-        'Ease of Finding': {'target': 9.0, 'format': '{:.2f}'},
-        'Product Information Clarity': {'target': 9.0, 'format': '{:.2f}'},
-        'Charges Stated Clearly': {'target': 9.0, 'format': '{:.2f}'},
-        'Checkout Process': {'target': 9.0, 'format': '{:.2f}'}
-    }
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_metric = st.selectbox(
+            "Select Metric:",
+            options=METRICS,
+            index=METRICS.index(REGISTRY['default_metric']),
+            key="metric_selector"
+        )
 
-    selected_metric = st.selectbox(
-        "Select Metric:",
-        options=list(metric_options.keys()),
-        index=6,  # Default to "Charges Stated Clearly" like in the image
-        key="metric_selector"
-    )
+    with col2:
+        selected_store = st.selectbox(
+            "Select Store:",
+            options=[ALL_STORES] + STORES,
+            key="store_selector"
+        )
 
-    target_score = metric_options[selected_metric]['target']
-    score_format = metric_options[selected_metric]['format']
-
-    # Generate realistic data for the selected metric
-    @st.cache_data
-    def generate_metric_data(metric_name):
-        # Base scores for different months (realistic patterns)
-        month_data = {
-            'May-June 2025': {
-                'period': '2025-05-30 to 2025-06-30',
-                'total_days': 32,
-                'base_score': 9.48
-            },
-            'July 2025': {
-                'period': '2025-07-01 to 2025-07-31', 
-                'total_days': 31,
-                'base_score': 9.22
-            },
-            'August 2025': {
-                'period': '2025-08-01 to 2025-08-31',
-                'total_days': 31,
-                'base_score': 9.16
-            },
-            'September 2025': {
-                'period': '2025-09-01 to 2025-09-30',
-                'total_days': 30,
-                'base_score': 9.43
-            }
-        }
-
-        # Add some variation for different metrics
-        metric_variations = {
-            'Overall Satisfaction': [0, -0.1, -0.2, 0.05],
-            'Likelihood to Buy Again': [0.1, -0.05, -0.15, 0.08],
-            'Likelihood to Recommend': [-0.05, 0.03, -0.1, 0.12],
-            'Site Design': [0.2, 0.15, 0.1, 0.25],
-            'Ease of Finding': [0.15, 0.08, 0.05, 0.18],
-            'Product Information Clarity': [0.12, 0.06, 0.02, 0.15],
-            'Charges Stated Clearly': [0, 0, 0, 0],  # Base scores (as shown in image)
-            'Checkout Process': [-0.2, -0.15, -0.25, -0.12]
-        }
-
-        variations = metric_variations.get(metric_name, [0, 0, 0, 0])
-
-        enhanced_data = []
-        for i, (month, data) in enumerate(month_data.items()):
-            score = data['base_score'] + variations[i]
-            days_below = max(0, int((target_score - score) * data['total_days'] / 2))
-
-            enhanced_data.append({
-                'month': month,
-                'period': data['period'],
-                'total_days': data['total_days'],
-                'average_score': score,
-                'days_below_target': days_below,
-                'days_below_percentage': (days_below / data['total_days']) * 100,
-                'performance_vs_target': score - target_score,
-                'classification': 'Excellent' if score >= target_score else 'Good' if score >= target_score - 0.5 else 'Needs Improvement'
-            })
-
-        return pd.DataFrame(enhanced_data)
-
-    metric_data = generate_metric_data(selected_metric)
+    target_score = TARGETS[selected_metric]
+    score_format = REGISTRY['score_format']
+
+    record_view('monthly', selected_metric, selected_store)
+    # Bootstrap intervals are the slowest load on the page
+    load("monthly figures", load_monthly_data, data_version, height=400)
+    metric_data = monthly_metric_view(selected_metric, selected_store, data_version)
+    load("percentiles", monthly_percentiles, data_version, height=200)
+    percentiles = monthly_percentiles(data_version)
+    percentiles = percentiles[percentiles['metric'] == selected_metric]
+    store_percentiles = percentiles[percentiles['group'] == selected_store].set_index('period')
+    metric_data = metric_data.join(store_percentiles[['p10', 'p50', 'p90']], on='month')
 
     # Monthly selector for comparison
     comparison_months = st.multiselect(
@@ -346,42 +666,27 @@ with tab2:
         # Enhanced Monthly Performance Cards
         st.subheader(f"Monthly Performance Cards - {selected_metric}")
 
-        cols = st.columns(len(comparison_data))
-        for i, (_, month_data_row) in enumerate(comparison_data.iterrows()):
-            with cols[i]:
-                score = month_data_row['average_score']
-                classification = month_data_row['classification']
-
-                # Color coding based on performance
-                if classification == 'Excellent':
-                    color_class = "risk-low"
-                    bg_color = "#d4f7d4"
-                elif classification == 'Good':
-                    color_class = "risk-medium" 
-                    bg_color = "#fff4d4"
-                else:
-                    color_class = "risk-high"
-                    bg_color = "#ffd4d4"
-
-                st.markdown(f"""
-                <div style="
-                    background: {bg_color};
-                    padding: 1rem;
-                    border-radius: 10px;
-                    border-left: 4px solid {'#00aa00' if classification == 'Excellent' else '#ffaa00' if classification == 'Good' else '#ff4444'};
-                    margin: 0.5rem 0;
-                    text-align: center;
-                ">
-                    <h4 style="margin: 0; color: #333;">{month_data_row["month"]}</h4>
-                    <p style="font-size: 0.8em; color: #666; margin: 0.2rem 0;">{month_data_row["period"]}</p>
-                    <p style="font-size: 0.8em; color: #666; margin: 0.2rem 0;">Total days: {month_data_row["total_days"]}</p>
-                    <h2 style="margin: 0.5rem 0; color: #333;">Average {selected_metric}:</h2>
-                    <h1 style="margin: 0; color: {'#00aa00' if classification == 'Excellent' else '#ffaa00' if classification == 'Good' else '#ff4444'};">
-                        {score_format.format(score)}
-                    </h1>
-                    <p style="font-size: 0.9em; margin: 0.5rem 0;"><strong>Days below target:</strong> {month_data_row["days_below_target"]} ({month_data_row["days_below_percentage"]:.1f}%)</p>
-                </div>
-                """, unsafe_allow_html=True)
+        cards = [
+            month_card(row.month, row.period, row.total_days, selected_metric,
+                       score_format.format(row.average_score), score_format.format(row.ci_lower),
+                       score_format.format(row.ci_upper), row.responses, row.days_below_target,
+                       row.days_below_percentage, row.classification, bool(row.significantly_below_target),
+                       f"{row.p10:.1f} / {row.p50:.1f} / {row.p90:.1f}")
+            for row in comparison_data.itertuples(index=False)
+        ]
+        st.markdown(card_grid(cards, columns=len(cards)), unsafe_allow_html=True)
+
+        with st.expander("Percentiles by region and store"):
+            spread = percentiles[percentiles['period'].isin(comparison_months)]
+            spread = spread.assign(order=spread['level'].map({'All': 0, 'Region': 1, 'Store': 2}))
+            spread = spread.sort_values(['order', 'group'], kind='stable')
+            st.dataframe(
+                spread.pivot_table(index=['level', 'group'], columns='period', values='p50', sort=False)
+                .reindex(columns=comparison_months).round(1).rename_axis(columns=None).reset_index(),
+                hide_index=True, use_container_width=True
+            )
+            st.caption("Median (P50) score per month. Regions: "
+                       + "; ".join(f"{region} ({', '.join(stores)})" for region, stores in REGIONS.items()))
 
         # Enhanced visualizations
         col1, col2 = st.columns(2)
@@ -394,13 +699,11 @@ with tab2:
                 y='average_score',
                 title=f"Monthly Comparison - {selected_metric}",
                 color='classification',
-                color_discrete_map={
-                    'Excellent': '#00aa00',
-                    'Good': '#ffaa00', 
-                    'Needs Improvement': '#ff4444'
-                },
+                color_discrete_map=band_colors('classification'),
                 text='average_score',
-                hover_data=['days_below_target', 'days_below_percentage']
+                error_y='ci_plus',
+                error_y_minus='ci_minus',
+                hover_data=['days_below_target', 'days_below_percentage', 'ci_lower', 'ci_upper', 'significantly_below_target']
             )
 
             # Add target line
@@ -420,7 +723,7 @@ with tab2:
                 yaxis_title="Average Score",
                 xaxis_title="Period"
             )
-            st.plotly_chart(fig_bar_enhanced, use_container_width=True)
+            plotly_chart(fig_bar_enhanced, 'Monthly comparison')
 
         with col2:
             # Performance vs Target analysis
@@ -443,7 +746,7 @@ with tab2:
                 yaxis_title="Difference from Target",
                 xaxis_title="Period"
             )
-            st.plotly_chart(fig_performance, use_container_width=True)
+            plotly_chart(fig_performance, 'Performance vs target')
 
         # Detailed performance summary
         st.subheader(f"Detailed Performance Summary - {selected_metric}")
@@ -460,8 +763,9 @@ with tab2:
             )
 
         with summary_cols[1]:
-            excellent_months = (comparison_data['classification'] == 'Excellent').sum()
-            st.metric("Excellent Months", f"{excellent_months}/{len(comparison_data)}")
+            top_label = REGISTRY['classification']['labels'][0]
+            excellent_months = (comparison_data['classification'] == top_label).sum()
+            st.metric(f"{top_label} Months", f"{excellent_months}/{len(comparison_data)}")
 
         with summary_cols[2]:
             total_days_below = comparison_data['days_below_target'].sum()
@@ -494,25 +798,17 @@ with tab2:
             )
 
             fig_trend.update_layout(height=400)
-            st.plotly_chart(fig_trend, use_container_width=True)
+            plotly_chart(fig_trend, 'Monthly trend')
 
             # Trend direction
             first_score = comparison_data.iloc[0]['average_score']
             last_score = comparison_data.iloc[-1]['average_score']
             trend_direction = last_score - first_score
 
-            if trend_direction > 0.1:
-                trend_emoji = "📈"
-                trend_text = "Improving"
-                trend_color = "green"
-            elif trend_direction < -0.1:
-                trend_emoji = "📉"
-                trend_text = "Declining"
-                trend_color = "red"
-            else:
-                trend_emoji = "➡️"
-                trend_text = "Stable"
-                trend_color = "blue"
+            trend_band = band_index(trend_direction, REGISTRY['trend'])
+            trend_emoji = REGISTRY['trend']['icons'][trend_band]
+            trend_text = REGISTRY['trend']['labels'][trend_band]
+            trend_color = REGISTRY['trend']['colors'][trend_band]
 
             st.markdown(f"""
             <div style="text-align: center; padding: 1rem; border-radius: 10px; background: #f0f2f6;">
@@ -524,8 +820,148 @@ with tab2:
     else:
         st.warning("Please select at least one month to compare.")
 
+    # Any two date ranges, not only the survey periods
+    st.subheader("📐 Custom Range Comparison")
+    load("range comparison", backend.range_sums, height=400)
+    range_sums = backend.range_sums()
+    first_day, last_day = range_sums.first.date(), range_sums.last.date()
+    preset = st.selectbox("Compare:", options=RANGE_PRESETS, key="range_preset")
+    range_a, range_b = preset_ranges(preset, last_day)
+    if preset == 'Custom':
+        range_a, range_b = ((max(start.date(), first_day), end.date()) for start, end in (range_a, range_b))
+        col1, col2 = st.columns(2)
+        with col1:
+            picked_a = st.date_input("Range A:", value=range_a,
+                                     min_value=first_day, max_value=last_day, key="range_a")
+        with col2:
+            picked_b = st.date_input("Range B:", value=range_b,
+                                     min_value=first_day, max_value=last_day, key="range_b")
+        # Both ends stay unset until the second date is clicked
+        ranges_picked = len(picked_a) == 2 and len(picked_b) == 2
+        if ranges_picked:
+            range_a, range_b = (tuple(pd.Timestamp(day) for day in picked) for picked in (picked_a, picked_b))
+    else:
+        ranges_picked = True
+        st.caption(f"Range A: {range_a[0]:%m/%d/%Y} to {range_a[1]:%m/%d/%Y} · "
+                   f"Range B: {range_b[0]:%m/%d/%Y} to {range_b[1]:%m/%d/%Y}")
+
+    if not ranges_picked:
+        st.info("Pick a start and an end date for both ranges.")
+    else:
+        compared = range_comparison(data_version, range_a, range_b, selected_store)
+        if not (compared['responses_a'].sum() and compared['responses_b'].sum()):
+            st.info(f"One of the ranges has no responses; data covers {first_day:%m/%d/%Y} "
+                    f"to {last_day:%m/%d/%Y}.")
+        else:
+            row = compared[compared['metric'] == selected_metric].iloc[0]
+            range_cols = st.columns(3)
+            range_cols[0].metric(f"Range A - {selected_metric}", score_format.format(row['mean_a']),
+                                 help=f"{row['responses_a']:,} responses")
+            range_cols[1].metric(f"Range B - {selected_metric}", score_format.format(row['mean_b']),
+                                 delta=f"{row['difference']:+.2f}", help=f"{row['responses_b']:,} responses")
+            range_cols[2].metric("Welch z", f"{row['z']:+.2f}",
+                                 help="Difference in means over its standard error; |z| ≥ 1.96 is significant "
+                                      "at the 5% level")
+
+            margin_a = 1.96 * compared['std_a'] / np.sqrt(compared['responses_a'])
+            margin_b = 1.96 * compared['std_b'] / np.sqrt(compared['responses_b'])
+            fig_ranges = go.Figure([
+                go.Bar(x=compared['metric'], y=compared['mean_a'], name='Range A', marker_color='#aec7e8',
+                       error_y=dict(type='data', array=margin_a)),
+                go.Bar(x=compared['metric'], y=compared['mean_b'], name='Range B', marker_color='#1f77b4',
+                       error_y=dict(type='data', array=margin_b)),
+            ])
+            fig_ranges.update_layout(
+                title=f"Range B vs Range A - {selected_store}",
+                yaxis_title="Average Score",
+                yaxis=dict(range=[max(0, np.nanmin(compared[['mean_a', 'mean_b']].to_numpy()) - 0.5), 10]),
+                barmode='group',
+                height=400,
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+            )
+            plotly_chart(fig_ranges, 'Range comparison')
+            st.dataframe(
+                compared.drop(columns='store').assign(significant=compared['z'].abs() >= 1.96),
+                column_config={
+                    'metric': 'Metric',
+                    'responses_a': st.column_config.NumberColumn('Responses A', format='%d'),
+                    'mean_a': st.column_config.NumberColumn('Mean A', format='%.2f'),
+                    'std_a': st.column_config.NumberColumn('Std A', format='%.2f'),
+                    'responses_b': st.column_config.NumberColumn('Responses B', format='%d'),
+                    'mean_b': st.column_config.NumberColumn('Mean B', format='%.2f'),
+                    'std_b': st.column_config.NumberColumn('Std B', format='%.2f'),
+                    'difference': st.column_config.NumberColumn('B - A', format='%+.2f'),
+                    'z': st.column_config.NumberColumn('z', format='%+.2f'),
+                    'significant': 'Significant',
+                },
+                hide_index=True, use_container_width=True
+            )
+
+    # Actual repeat purchases next to the stated 'Likelihood to Buy Again'
+    st.subheader("🔁 Repeat Purchase Cohorts")
+    load("purchase cohorts", cohort_retention, data_version, height=400)
+    retention, repeat = cohort_retention(data_version)
+    if retention.empty:
+        st.info("No order data loaded. Cohorts need customer IDs and order dates "
+                "(see `--orders` in `python backend.py build`).")
+        return
+    offsets = [col for col in retention.columns if col.startswith('Month ')]
+
+    col1, col2 = st.columns(2)
+    with col1:
+        shares = retention[offsets].to_numpy() * 100
+        fig_cohorts = go.Figure(go.Heatmap(
+            z=shares,
+            x=offsets,
+            y=[f"{cohort} ({customers:,})" for cohort, customers in zip(retention['cohort'], retention['customers'])],
+            colorscale='Blues',
+            text=np.where(np.isnan(shares), '', np.char.mod('%.1f%%', np.nan_to_num(shares))),
+            texttemplate='%{text}',
+            colorbar=dict(title="% active"),
+            hovertemplate='%{y}<br>%{x} after first purchase: %{z:.1f}% ordered again<extra></extra>'
+        ))
+        fig_cohorts.update_layout(
+            title="Customers Ordering Again, by First-Purchase Month",
+            yaxis=dict(autorange='reversed'),
+            height=400,
+            margin=dict(l=0, r=0, t=50, b=0)
+        )
+        plotly_chart(fig_cohorts, 'Purchase cohorts')
+
+    with col2:
+        fig_intent = make_subplots(specs=[[{"secondary_y": True}]])
+        fig_intent.add_trace(go.Bar(
+            x=repeat['period'], y=repeat['repeat_rate'] * 100, name='Repeat customers (%)',
+            marker_color='#1f77b4', customdata=repeat['returning'],
+            hovertemplate='%{x}<br>%{y:.1f}% of earlier customers ordered again (%{customdata:,})<extra></extra>'
+        ), secondary_y=False)
+        if BUY_AGAIN_METRIC in TARGETS:
+            monthly = load_monthly_data(data_version)
+            stated = monthly[(monthly['metric'] == BUY_AGAIN_METRIC) & (monthly['store'] == ALL_STORES)]
+            stated = stated.set_index('period')['average_score'].reindex(repeat['period'])
+            fig_intent.add_trace(go.Scatter(
+                x=repeat['period'], y=stated, mode='lines+markers', name=f'{BUY_AGAIN_METRIC} (survey)',
+                line=dict(color='#ff7f0e'), hovertemplate='%{x}<br>Stated: %{y:.2f}<extra></extra>'
+            ), secondary_y=True)
+        fig_intent.update_yaxes(title_text="Repeat customers (%)", secondary_y=False)
+        fig_intent.update_yaxes(title_text="Survey score", secondary_y=True)
+        fig_intent.update_layout(
+            title="Stated Intent vs Actual Repeat Purchases",
+            height=400,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            margin=dict(l=0, r=0, t=50, b=0)
+        )
+        plotly_chart(fig_intent, 'Stated vs actual repeat')
+    st.caption("All stores. A cohort is the month of a customer's first order; each cell is the share of the cohort "
+               "that ordered again that many months later.")
+
+with tab2:
+    monthly_comparison_tab()
+
 # TAB 3: Critical Events (Enhanced Version)
-with tab3:
+@st.fragment(key='critical_events_tab', parallel=True, run_every=refresh_interval)
+def critical_events_tab():
+    data_version = current_data_version()
     st.header("Critical Events Analysis")
 
     # Enhanced filters with more options
@@ -544,31 +980,18 @@ with tab3:
     with col2:
         promotion_filter = st.selectbox(
             "Filter by Promotion:",
-            options=['All promotions', 'Without promo', 'No promotion', '4th of July Event 7% OFF', 'Anniversary Sale Kick Off', 'Father Day Special 15% OFF', 'Labor Day Sale', 'Summer Clearance 20% OFF', 'Back to School Furniture', 'Fall Collection Launch'],
+            options=['All promotions'] + backend.promotions(),
             key="promotion_filter_enhanced"
         )
 
     with col3:
         severity_filter = st.multiselect(
             "Filter by Severity:",
-            options=['Critical', 'High', 'Medium', 'Low'],
-            default=['Critical', 'High', 'Medium', 'Low'],
+            options=EVENT_SEVERITIES,
+            default=EVENT_SEVERITIES,
             key="severity_filter_enhanced"
         )
 
-    # Apply filters
-    filtered_events = events_df.copy()
-
-    # Filter by failure percentage
-    filtered_events = filtered_events[filtered_events['failure_percentage'] >= failure_threshold]
-
-    # Filter by promotion
-    if promotion_filter != 'All promotions':
-        filtered_events = filtered_events[filtered_events['promotion'] == promotion_filter]
-
-    # Filter by severity
-    filtered_events = filtered_events[filtered_events['severity'].isin(severity_filter)]
-
     # Sort options
     sort_options = st.columns(2)
     with sort_options[0]:
@@ -586,17 +1009,18 @@ with tab3:
             key="events_order_enhanced"
         )
 
-    # Sort the data
-    if sort_by == 'date':
-        sorted_events = filtered_events.sort_values('date', ascending=(sort_order == 'Ascending'))
-    elif sort_by == 'failure_percentage':
-        sorted_events = filtered_events.sort_values('failure_percentage', ascending=(sort_order == 'Ascending'))
-    else:  # severity
-        severity_order = {'Low': 1, 'Medium': 2, 'High': 3, 'Critical': 4}
-        sorted_events = filtered_events.copy()
-        sorted_events['severity_num'] = sorted_events['severity'].map(severity_order)
-        sorted_events = sorted_events.sort_values('severity_num', ascending=(sort_order == 'Ascending'))
-        sorted_events = sorted_events.drop('severity_num', axis=1)
+    # Apply filters and sort
+    event_filters = (failure_threshold, None if promotion_filter == 'All promotions' else promotion_filter,
+                     tuple(severity_filter), sort_by, sort_order == 'Ascending')
+    record_view('events', *event_filters)
+    event_args = (data_version,) + event_filters + (st.session_state.get('timeline_range'),)
+    load("critical events", load_events, *event_args, height=400)
+    sorted_events = load_events(*event_args)
+
+    if st.session_state.get('timeline_range') is not None:
+        timeline_range = st.session_state['timeline_range']
+        st.info(f"Showing events from {timeline_range[0]:%m/%d/%Y} to {timeline_range[1]:%m/%d/%Y} "
+                "(range selected in the Daily Timeline)")
 
     # Display results summary
     st.subheader(f"Events Analysis Results ({len(sorted_events)} events found)")
@@ -609,15 +1033,16 @@ with tab3:
             st.metric("Avg Failure %", f"{avg_failure:.1f}%")
 
         with col2:
-            critical_count = (sorted_events['severity'] == 'Critical').sum()
-            st.metric("Critical Events", critical_count)
+            critical_count = (sorted_events['severity'] == SEVERITY_LEVELS[-1]).sum()
+            st.metric(f"{SEVERITY_LEVELS[-1]} Events", critical_count)
 
         with col3:
-            high_failure = (sorted_events['failure_percentage'] >= 70).sum()
-            st.metric("High Risk Days", high_failure)
+            # Days whose failure rate alone reaches one of the top two levels
+            high_failure = (severity_from_failure(sorted_events['failure_percentage']) >= len(SEVERITY_LEVELS) - 2).sum()
+            st.metric(f"{SEVERITY_LEVELS[-2]} Risk Days", high_failure)
 
         with col4:
-            promo_events = (sorted_events['promotion'].str.contains('OFF|Sale|Special', case=False, na=False)).sum()
+            promo_events = in_promotion(sorted_events['date']).sum()
             st.metric("Promotion Days", promo_events)
 
         # Enhanced table display
@@ -625,13 +1050,7 @@ with tab3:
 
         # Color coding for severity
         def get_severity_color(severity):
-            colors = {
-                'Critical': '🔴',
-                'High': '🟠', 
-                'Medium': '🟡',
-                'Low': '🟢'
-            }
-            return colors.get(severity, '⚪')
+            return SEVERITY_ICONS.get(severity, '⚪')
 
         # Display table with enhanced formatting
         for idx, (_, event) in enumerate(sorted_events.iterrows()):
@@ -653,10 +1072,12 @@ with tab3:
                     st.write(f"**Promotion:** {event['promotion']}")
                     st.write(f"**Severity:** {event['severity']}")
 
+                if event['source'] == 'Detected':
+                    st.caption(f"Flagged by anomaly monitor (score {event['anomaly_score']:.2f}) at: {event['stores']}")
+
                 # Action button for timeline highlighting
-                if st.button(f"🔍 Highlight {event['date'].strftime('%m/%d')} in Timeline", key=f"highlight_enhanced_{idx}"):
-                    st.success(f"✅ Date {event['date'].strftime('%Y-%m-%d')} highlighted in timeline!")
-                    st.balloons()
+                st.button(f"🔍 Highlight {event['date'].strftime('%m/%d')} in Timeline", key=f"highlight_enhanced_{idx}",
+                          on_click=highlight_event, args=(event['date'],))
 
         # Enhanced visualization
         st.subheader("Events Impact Visualization")
@@ -668,24 +1089,16 @@ with tab3:
             y='failure_percentage',
             color='severity',
             size='failure_percentage',
-            hover_data=['day_of_week', 'failed_metrics', 'promotion'],
+            hover_data=['day_of_week', 'failed_metrics', 'promotion', 'source'],
             title="Event Risk Analysis Over Time",
-            color_discrete_map={
-                'Critical': '#ff0000',
-                'High': '#ff8800', 
-                'Medium': '#ffaa00',
-                'Low': '#00aa00'
-            },
+            color_discrete_map=SEVERITY_COLORS,
             labels={'failure_percentage': 'Failure Percentage (%)', 'date': 'Date'}
         )
 
-        # Add risk threshold lines
-        fig_events_enhanced.add_hline(y=75, line_dash="dash", line_color="red", 
-                                    annotation_text="Critical Risk (75%+)")
-        fig_events_enhanced.add_hline(y=50, line_dash="dash", line_color="orange", 
-                                    annotation_text="High Risk (50%+)")
-        fig_events_enhanced.add_hline(y=25, line_dash="dash", line_color="yellow", 
-                                    annotation_text="Medium Risk (25%+)")
+        # Add risk threshold lines at the lower bound of each level above the lowest
+        for level, bound in list(zip(SEVERITY_LEVELS, FAILURE_BINS))[:0:-1]:
+            fig_events_enhanced.add_hline(y=bound, line_dash="dash", line_color=SEVERITY_COLORS[level],
+                                          annotation_text=f"{level} Risk ({bound:g}%+)")
 
         fig_events_enhanced.update_layout(
             height=500,
@@ -693,7 +1106,11 @@ with tab3:
             legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
         )
 
-        st.plotly_chart(fig_events_enhanced, use_container_width=True)
+        fig_events_enhanced.update_layout(clickmode='event+select')
+
+        # Clicking (or box-selecting) events highlights their dates in Tab 1
+        plotly_chart(fig_events_enhanced, 'Event risk over time', key='events_chart', on_select=on_events_select,
+                     selection_mode=('points', 'box'))
 
         # Additional analysis charts
         col1, col2 = st.columns(2)
@@ -705,139 +1122,116 @@ with tab3:
                 values=severity_counts.values,
                 names=severity_counts.index,
                 title="Events by Severity Level",
-                color_discrete_map={
-                    'Critical': '#ff0000',
-                    'High': '#ff8800', 
-                    'Medium': '#ffaa00',
-                    'Low': '#00aa00'
-                }
+                color_discrete_map=SEVERITY_COLORS
             )
-            st.plotly_chart(fig_severity, use_container_width=True)
+            plotly_chart(fig_severity, 'Events by severity')
 
         with col2:
-            # Failure rate by day of week
-            day_analysis = sorted_events.groupby('day_of_week')['failure_percentage'].mean().reset_index()
-            day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            day_analysis['day_of_week'] = pd.Categorical(day_analysis['day_of_week'], categories=day_order, ordered=True)
-            day_analysis = day_analysis.sort_values('day_of_week')
-
-            fig_days = px.bar(
-                day_analysis,
-                x='day_of_week',
-                y='failure_percentage',
+            # Failure rate by day of week: all days from the calendar cube next
+            # to the events currently shown
+            weekday = sorted_events['date'].dt.weekday.to_numpy()
+            event_days = np.bincount(weekday, minlength=7)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                event_rate = np.bincount(weekday, weights=sorted_events['failure_percentage'], minlength=7) / event_days
+
+            fig_days = go.Figure([
+                go.Bar(x=WEEKDAYS, y=backend.calendar_cube().weekday_failure_rate(), name='All days',
+                       marker_color='#f4a582'),
+                go.Bar(x=WEEKDAYS, y=event_rate, name='Filtered events', marker_color='#b2182b')
+            ])
+            fig_days.update_layout(
                 title="Average Failure Rate by Day of Week",
-                color='failure_percentage',
-                color_continuous_scale='Reds'
+                xaxis_title="Day of Week",
+                yaxis_title="Failure Rate (%)",
+                barmode='group',
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
             )
-            st.plotly_chart(fig_days, use_container_width=True)
+            plotly_chart(fig_days, 'Failure rate by weekday')
 
     else:
         st.warning("No events found with the current filter criteria. Try adjusting your filters.")
         st.info("💡 Tip: Lower the failure percentage threshold or select 'All promotions' to see more results.")
 
+    # Promotion windows from the calendar against days outside any window
+    st.subheader("🏷️ Promotion Uplift")
+    load("promotion uplift", promotion_uplift_view, data_version, height=400)
+    uplift = promotion_uplift_view(data_version)
+    if uplift.empty:
+        st.info("No promotion windows overlap the survey data (see `promotions.csv`).")
+        return
+    uplift_store = st.selectbox("Store:", options=[ALL_STORES] + STORES, key="uplift_store")
+    shown = uplift[uplift['store'] == uplift_store]
+    promotions = list(dict.fromkeys(shown['promotion']))
+    grid = shown.pivot(index='metric', columns='promotion', values='uplift').reindex(index=METRICS, columns=promotions)
+    windows = shown.drop_duplicates('promotion').set_index('promotion').reindex(promotions)
+    fig_uplift = go.Figure(go.Heatmap(
+        z=grid.to_numpy(),
+        x=[f"{name}<br>{start:%m/%d}-{end:%m/%d}" for name, start, end in zip(promotions, windows['start'], windows['end'])],
+        y=grid.index,
+        colorscale='RdBu',
+        zmid=0,
+        text=np.char.mod('%+.2f', np.nan_to_num(grid.to_numpy())),
+        texttemplate='%{text}',
+        colorbar=dict(title="Uplift"),
+        hovertemplate='%{y}<br>%{x}<br>%{z:+.2f} vs days without a promotion<extra></extra>'
+    ))
+    fig_uplift.update_layout(
+        title=f"Score Uplift During Promotions ({uplift_store})",
+        yaxis=dict(autorange='reversed'),
+        height=450,
+        margin=dict(l=0, r=0, t=50, b=0)
+    )
+    plotly_chart(fig_uplift, 'Promotion uplift')
+    st.caption("Uplift = mean score on the promotion's days minus the mean on days outside every promotion window.")
+
+    with st.expander("📋 Uplift by promotion, metric and store"):
+        st.dataframe(
+            uplift.assign(start=uplift['start'].dt.date, end=uplift['end'].dt.date),
+            column_config={
+                'promotion_score': st.column_config.NumberColumn('In window', format='%.2f'),
+                'baseline_score': st.column_config.NumberColumn('Baseline', format='%.2f'),
+                'uplift': st.column_config.NumberColumn('Uplift', format='%+.2f'),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+with tab3:
+    critical_events_tab()
+
+# Risk analysis details per metric (shared by Tab 4 and the risk export)
+risk_metric_options = {
+    metric['name']: {
+        'target': metric['target'],
+        'risk_factors': list(THEMES.get(metric['name'], {})),
+        'business_impact': metric.get('business_impact', ''),
+        'recommendations': metric.get('recommendations', [])
+    }
+    for metric in REGISTRY['metrics']
+}
+
+def metric_risk_summary(metric_scores):
+    # Latest score, gap, trend and risk level for every metric in one frame
+    history = pd.DataFrame(metric_scores)
+    summary = pd.DataFrame({
+        'Metric': history.columns,
+        'Current_Score': history.iloc[-1].to_numpy(),
+        'Average_Score': history.mean().to_numpy(),
+        'Performance_Gap': history.columns.map(TARGETS).to_numpy() - history.iloc[-1].to_numpy(),
+        'Trend_Direction': (history.iloc[-1] - history.iloc[0]).to_numpy()
+    })
+    summary['Risk_Level'] = risk_levels(summary['Performance_Gap'])
+    return summary
+
 # TAB 4: Risk Analysis (Enhanced Version with Advanced Insights)
-with tab4:
+@st.fragment(parallel=True, run_every=refresh_interval)
+def risk_analysis_tab():
+    data_version = current_data_version()
     st.header("Advanced Risk Analysis Dashboard")
 
-    # Enhanced metric selector for risk analysis
-    risk_metric_options = {
-        'Overall Satisfaction': {
-            'target': 9.0,
-            'current_scores': [9.48, 9.38, 9.36, 9.48],
-            'risk_factors': ['Service delays', 'Product quality issues', 'Delivery problems'],
-            'business_impact': 'Directly affects customer loyalty and retention rates. A decline in overall satisfaction can lead to reduced customer lifetime value and negative word-of-mouth marketing.',
-            'recommendations': [
-                'Implement proactive customer service monitoring with real-time alerts',
-                'Establish quality control checkpoints throughout the customer journey',
-                'Create customer feedback loops for rapid issue identification and resolution',
-                'Deploy sentiment analysis tools to monitor customer communications'
-            ]
-        },
-        'Likelihood to Buy Again': {
-            'target': 9.0,
-            'current_scores': [9.58, 9.33, 9.21, 9.56],
-            'risk_factors': ['Competitive pricing', 'Product availability', 'Customer service experience'],
-            'business_impact': 'Critical for revenue retention and customer lifetime value. Low scores indicate potential revenue leakage and increased customer acquisition costs.',
-            'recommendations': [
-                'Develop comprehensive customer loyalty programs with personalized incentives',
-                'Monitor competitor pricing strategies and implement dynamic pricing models',
-                'Improve inventory management systems to reduce stockouts',
-                'Create predictive models to identify at-risk customers for proactive retention efforts'
-            ]
-        },
-        'Likelihood to Recommend': {
-            'target': 9.0,
-            'current_scores': [9.43, 9.25, 9.06, 9.60],
-            'risk_factors': ['Word-of-mouth reputation', 'Social media presence', 'Customer advocacy'],
-            'business_impact': 'Affects organic growth and brand reputation in the market. Low recommendation scores can significantly impact new customer acquisition through referrals.',
-            'recommendations': [
-                'Create structured referral incentive programs with clear rewards',
-                'Monitor and actively respond to online reviews and social media mentions',
-                'Develop customer ambassador programs to leverage satisfied customers',
-                'Implement Net Promoter Score (NPS) tracking with follow-up actions for detractors'
-            ]
-        },
-        'Site Design': {
-            'target': 9.0,
-            'current_scores': [9.68, 9.37, 9.26, 9.73],
-            'risk_factors': ['User interface complexity', 'Mobile responsiveness', 'Loading speed'],
-            'business_impact': 'Influences first impressions and user engagement rates. Poor site design can lead to high bounce rates and reduced conversion rates.',
-            'recommendations': [
-                'Conduct regular UX/UI testing with A/B testing for continuous optimization',
-                'Implement mobile-first design principles with responsive layouts',
-                'Optimize site performance and loading times (target <3 seconds)',
-                'Use heatmap analysis to identify user behavior patterns and pain points'
-            ]
-        },
-        'Ease of Finding': {
-            'target': 9.0,
-            'current_scores': [9.63, 9.30, 9.21, 9.66],
-            'risk_factors': ['Search functionality', 'Product categorization', 'Navigation structure'],
-            'business_impact': 'Affects conversion rates and user satisfaction during shopping. Poor findability leads to increased cart abandonment and reduced sales.',
-            'recommendations': [
-                'Enhance search algorithm with AI-powered search suggestions and auto-complete',
-                'Improve product categorization and tagging with detailed filters',
-                'Implement intelligent product recommendations based on user behavior',
-                'Add visual search capabilities and improved site navigation structure'
-            ]
-        },
-        'Product Information Clarity': {
-            'target': 9.0,
-            'current_scores': [9.60, 9.28, 9.18, 9.63],
-            'risk_factors': ['Product descriptions accuracy', 'Image quality', 'Specification completeness'],
-            'business_impact': 'Reduces returns and increases purchase confidence. Clear product information directly correlates with reduced customer service inquiries and returns.',
-            'recommendations': [
-                'Standardize product information templates with consistent formatting',
-                'Implement 360-degree product views and high-resolution image galleries',
-                'Add customer Q&A sections and user-generated content for each product',
-                'Create detailed size guides and compatibility charts for furniture items'
-            ]
-        },
-        'Charges Stated Clearly': {
-            'target': 9.0,
-            'current_scores': [9.48, 9.22, 9.16, 9.43],
-            'risk_factors': ['Hidden fees', 'Shipping cost transparency', 'Tax calculation accuracy'],
-            'business_impact': 'Critical for trust and completing transactions without abandonment. Unclear pricing is a major cause of cart abandonment and customer complaints.',
-            'recommendations': [
-                'Display all fees upfront in the shopping process with no hidden costs',
-                'Implement transparent pricing calculator showing taxes, shipping, and fees',
-                'Provide clear breakdown of all charges before checkout with explanations',
-                'Add shipping cost estimator on product pages based on customer location'
-            ]
-        },
-        'Checkout Process': {
-            'target': 9.0,
-            'current_scores': [9.28, 9.07, 8.91, 9.31],
-            'risk_factors': ['Process complexity', 'Payment security', 'Guest checkout availability'],
-            'business_impact': 'Directly affects conversion rates and cart abandonment. Complex checkout processes can result in up to 70% cart abandonment rates.',
-            'recommendations': [
-                'Simplify checkout to minimum required steps (target: 3 steps or fewer)',
-                'Offer multiple payment options including digital wallets (Apple Pay, Google Pay)',
-                'Implement guest checkout and save-for-later options',
-                'Add progress indicators and clear security badges to build trust'
-            ]
-        }
-    }
+    # Monthly scores across all stores, aggregated by the backend
+    load("monthly figures", load_monthly_data, data_version, height=400)
+    months, metric_scores = metric_score_history(data_version)
 
     # Metric selector for detailed risk analysis
     selected_risk_metric = st.selectbox(
@@ -846,15 +1240,15 @@ with tab4:
         key="risk_metric_selector"
     )
 
+    record_view('risk', selected_risk_metric)
     metric_info = risk_metric_options[selected_risk_metric]
     target_score = metric_info['target']
-    monthly_scores = metric_info['current_scores']
-    months = ['May-June 2025', 'July 2025', 'August 2025', 'September 2025']
+    monthly_scores = metric_scores[selected_risk_metric]
 
     # Calculate risk metrics
-    performance_gaps = [target_score - score for score in monthly_scores]
-    risk_levels = ['High Risk' if gap > 0.5 else 'Medium Risk' if gap > 0.2 else 'Low Risk' for gap in performance_gaps]
+    performance_gaps = target_score - np.asarray(monthly_scores)
     trend_direction = monthly_scores[-1] - monthly_scores[0]
+    trend_band = band_index(trend_direction, REGISTRY['trend'])
 
     # Create comprehensive risk dashboard
     st.subheader(f"Risk Analysis: {selected_risk_metric}")
@@ -876,14 +1270,10 @@ with tab4:
         st.metric("Average Score", f"{avg_score:.2f}")
 
     with col3:
-        max_gap = max(performance_gaps)
-        risk_status = 'High' if max_gap > 0.5 else 'Medium' if max_gap > 0.2 else 'Low'
-        st.metric("Risk Level", risk_status)
+        st.metric("Risk Level", risk_levels(performance_gaps.max()))
 
     with col4:
-        trend_emoji = "📈" if trend_direction > 0.1 else "📉" if trend_direction < -0.1 else "➡️"
-        trend_text = "Improving" if trend_direction > 0.1 else "Declining" if trend_direction < -0.1 else "Stable"
-        st.metric("Trend", f"{trend_emoji} {trend_text}")
+        st.metric("Trend", f"{REGISTRY['trend']['icons'][trend_band]} {REGISTRY['trend']['labels'][trend_band]}")
 
     # Performance trend chart
     col1, col2 = st.columns(2)
@@ -895,7 +1285,7 @@ with tab4:
             'Score': monthly_scores,
             'Target': [target_score] * len(months),
             'Gap': performance_gaps,
-            'Risk_Level': risk_levels
+            'Risk_Level': risk_levels(performance_gaps)
         })
 
         fig_trend = go.Figure()
@@ -927,7 +1317,7 @@ with tab4:
             showlegend=True
         )
 
-        st.plotly_chart(fig_trend, use_container_width=True)
+        plotly_chart(fig_trend, 'Risk trend')
 
     with col2:
         # Risk level distribution
@@ -937,38 +1327,18 @@ with tab4:
             y='Gap',
             color='Risk_Level',
             title=f"{selected_risk_metric} - Performance Gap Analysis",
-            color_discrete_map={
-                'High Risk': '#ff4444',
-                'Medium Risk': '#ffaa00',
-                'Low Risk': '#00aa00'
-            }
+            color_discrete_map=band_colors('risk')
         )
 
         fig_risk_bar.add_hline(y=0, line_dash="solid", line_color="black")
         fig_risk_bar.update_layout(height=400)
-        st.plotly_chart(fig_risk_bar, use_container_width=True)
+        plotly_chart(fig_risk_bar, 'Performance gap')
 
     # Comparative analysis across all metrics
     st.subheader("Comparative Risk Analysis - All Metrics")
 
     # Create comprehensive comparison data
-    all_metrics_data = []
-    for metric, info in risk_metric_options.items():
-        current = info['current_scores'][-1]
-        avg = sum(info['current_scores']) / len(info['current_scores'])
-        gap = info['target'] - current
-        trend = info['current_scores'][-1] - info['current_scores'][0]
-
-        all_metrics_data.append({
-            'Metric': metric,
-            'Current_Score': current,
-            'Average_Score': avg,
-            'Performance_Gap': gap,
-            'Trend_Direction': trend,
-            'Risk_Level': 'High Risk' if gap > 0.5 else 'Medium Risk' if gap > 0.2 else 'Low Risk'
-        })
-
-    comparison_df = pd.DataFrame(all_metrics_data)
+    comparison_df = metric_risk_summary(metric_scores)
 
     # Comprehensive comparison charts
     col1, col2 = st.columns(2)
@@ -982,17 +1352,14 @@ with tab4:
             orientation='h',
             color='Risk_Level',
             title="Current Performance - All Metrics",
-            color_discrete_map={
-                'High Risk': '#ff4444',
-                'Medium Risk': '#ffaa00',
-                'Low Risk': '#00aa00'
-            }
+            color_discrete_map=band_colors('risk')
         )
 
-        fig_comparison.add_vline(x=9.0, line_dash="dash", line_color="red", 
-                               annotation_text="Target (9.0)")
+        for target in sorted(set(TARGETS.values())):
+            fig_comparison.add_vline(x=target, line_dash="dash", line_color="red",
+                                     annotation_text=f"Target ({target})")
         fig_comparison.update_layout(height=500)
-        st.plotly_chart(fig_comparison, use_container_width=True)
+        plotly_chart(fig_comparison, 'Current performance')
 
     with col2:
         # Performance gap analysis
@@ -1004,34 +1371,22 @@ with tab4:
             color='Risk_Level',
             hover_data=['Metric', 'Average_Score'],
             title="Risk vs Trend Analysis Matrix",
-            color_discrete_map={
-                'High Risk': '#ff4444',
-                'Medium Risk': '#ffaa00',
-                'Low Risk': '#00aa00'
-            }
+            color_discrete_map=band_colors('risk')
         )
 
         fig_gaps.add_vline(x=0, line_dash="dash", line_color="gray")
         fig_gaps.add_hline(y=0, line_dash="dash", line_color="gray")
         fig_gaps.update_layout(height=500)
-        st.plotly_chart(fig_gaps, use_container_width=True)
+        plotly_chart(fig_gaps, 'Risk vs trend')
 
     # Time series comparison for all metrics
     st.subheader("Performance Evolution - All Metrics")
 
     # Create time series data for all metrics
-    time_series_data = []
-    for month_idx, month in enumerate(months):
-        for metric, info in risk_metric_options.items():
-            time_series_data.append({
-                'Month': month,
-                'Metric': metric,
-                'Score': info['current_scores'][month_idx],
-                'Target': info['target'],
-                'Gap': info['target'] - info['current_scores'][month_idx]
-            })
-
-    time_series_df = pd.DataFrame(time_series_data)
+    time_series_df = pd.DataFrame(metric_scores, index=months).rename_axis('Month').reset_index()
+    time_series_df = time_series_df.melt('Month', var_name='Metric', value_name='Score')
+    time_series_df['Target'] = time_series_df['Metric'].map(TARGETS)
+    time_series_df['Gap'] = time_series_df['Target'] - time_series_df['Score']
 
     # Multi-line chart showing all metrics over time
     fig_evolution = px.line(
@@ -1043,10 +1398,11 @@ with tab4:
         markers=True
     )
 
-    fig_evolution.add_hline(y=9.0, line_dash="dash", line_color="red", 
-                          annotation_text="Target (9.0)")
+    for target in sorted(set(TARGETS.values())):
+        fig_evolution.add_hline(y=target, line_dash="dash", line_color="red",
+                                annotation_text=f"Target ({target})")
     fig_evolution.update_layout(height=500)
-    st.plotly_chart(fig_evolution, use_container_width=True)
+    plotly_chart(fig_evolution, 'Performance evolution')
 
     # Detailed metric insights and recommendations
     st.subheader(f"Business Intelligence Insights: {selected_risk_metric}")
@@ -1059,96 +1415,130 @@ with tab4:
         st.info(f"**Impact**: {metric_info['business_impact']}")
 
         st.markdown("### ⚠️ Key Risk Factors")
-        for i, factor in enumerate(metric_info['risk_factors'], 1):
-            st.write(f"{i}. {factor}")
+        # Factors are listed straight away; the list is redrawn with mention
+        # counts once the comment index is built
+        factors = st.empty()
+        with factors.container():
+            for i, factor in enumerate(metric_info['risk_factors'], 1):
+                st.write(f"{i}. {factor}")
+        load("comment mentions", comment_themes, data_version, height=60)
+        themes = comment_themes(data_version)
+        themes = themes[themes['metric'] == selected_risk_metric]
+        mentions = themes.groupby('theme')['mentions'].sum()
+        with factors.container():
+            for i, factor in enumerate(metric_info['risk_factors'], 1):
+                st.write(f"{i}. {factor} — {mentions.get(factor, 0):,} comment mentions")
+        if not themes.empty:
+            with st.expander("Mentions by month and store"):
+                st.dataframe(
+                    themes.pivot_table(index=['period', 'store'], columns='theme', values='mentions', sort=False)
+                    .reindex(columns=metric_info['risk_factors']).rename_axis(columns=None).reset_index(),
+                    hide_index=True, use_container_width=True
+                )
 
     with col2:
         st.markdown("### 💡 Strategic Recommendations")
         for i, rec in enumerate(metric_info['recommendations'], 1):
             st.write(f"{i}. {rec}")
 
-        # Performance prediction
-        if trend_direction > 0.1:
-            prediction = "📈 **Positive Outlook**: Current trends suggest continued improvement"
-            prediction_color = "success"
-        elif trend_direction < -0.1:
-            prediction = "📉 **Warning**: Declining trend requires immediate attention"
-            prediction_color = "error"
-        else:
-            prediction = "➡️ **Stable**: Performance is stable but monitor for changes"
-            prediction_color = "info"
+        # Performance prediction, by trend band (declining, stable, improving)
+        prediction_color, prediction = [
+            ("error", "📉 **Warning**: Declining trend requires immediate attention"),
+            ("info", "➡️ **Stable**: Performance is stable but monitor for changes"),
+            ("success", "📈 **Positive Outlook**: Current trends suggest continued improvement"),
+        ][trend_band]
 
         st.markdown("### 🔮 Performance Outlook")
         st.markdown(f":{prediction_color}[{prediction}]")
 
+    # Which experience metrics move the outcome metrics
+    st.subheader("🧭 Satisfaction Drivers")
+    outcome_col, store_col, period_col = st.columns(3)
+    with outcome_col:
+        driver_outcome = st.selectbox("Outcome:", options=OUTCOME_METRICS, key="driver_outcome")
+    with store_col:
+        driver_store = st.selectbox("Store:", options=[ALL_STORES] + STORES, key="driver_store")
+    with period_col:
+        driver_period = st.selectbox("Period:", options=[ALL_PERIODS] + list(months), key="driver_period")
+    driver_args = (data_version, driver_outcome, driver_store, driver_period)
+    load("driver analysis", driver_ranking, *driver_args, height=350)
+    drivers = driver_ranking(*driver_args)
+    if drivers['beta'].isna().all():
+        st.info("Not enough responses for this store and period to estimate drivers.")
+    else:
+        col1, col2 = st.columns([3, 2])
+        with col1:
+            shown = drivers.iloc[::-1]
+            fig_drivers = go.Figure(go.Bar(
+                x=shown['beta'], y=shown['driver'], orientation='h',
+                marker_color=np.where(shown['beta'] >= 0, '#1f77b4', '#d62728'),
+                customdata=np.column_stack([shown['correlation'], shown['share'] * 100]),
+                hovertemplate='%{y}<br>Weight %{x:.3f}<br>Correlation %{customdata[0]:.3f}'
+                              '<br>%{customdata[1]:.1f}% of variance<extra></extra>'
+            ))
+            fig_drivers.update_layout(
+                title=f"What Drives {driver_outcome}",
+                xaxis_title="Standardized weight",
+                height=350,
+                margin=dict(l=0, r=0, t=50, b=0)
+            )
+            plotly_chart(fig_drivers, 'Satisfaction drivers')
+        with col2:
+            st.metric("Variance explained (R²)", f"{drivers.attrs['r_squared']:.1%}")
+            st.caption(f"{drivers.attrs['responses']:,} responses. Weights are standardized regression "
+                       "coefficients; a one standard deviation rise in the driver moves the outcome by that "
+                       "many standard deviations, holding the other drivers fixed.")
+            st.dataframe(
+                drivers,
+                column_config={
+                    'driver': 'Driver',
+                    'correlation': st.column_config.NumberColumn('Correlation', format='%.3f'),
+                    'beta': st.column_config.NumberColumn('Weight', format='%.3f'),
+                    'share': st.column_config.NumberColumn('Share of R²', format='%.3f'),
+                },
+                hide_index=True, use_container_width=True
+            )
+
+    # Comment search over the inverted index
+    st.subheader("💬 Customer Comments")
+    query_col, store_col = st.columns([3, 1])
+    with query_col:
+        comment_query = st.text_input("Search comments:", key="comment_search",
+                                      placeholder="e.g. hidden fees, deliver*")
+    with store_col:
+        comment_store = st.selectbox("Store:", options=[ALL_STORES] + STORES, key="comment_store")
+    load("comment index", backend.comment_index, height=120)
+    comment_index = backend.comment_index()
+    if comment_query.strip():
+        started = time.perf_counter()
+        total, matches = comment_index.search(comment_query, store=None if comment_store == ALL_STORES else comment_store)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        st.caption(f"{total:,} of {len(comment_index):,} comments match ({elapsed_ms:.1f} ms); newest {len(matches)} shown")
+        st.dataframe(matches, hide_index=True, use_container_width=True,
+                     column_config={'date': st.column_config.DateColumn('Date'), 'store': 'Store', 'comment': 'Comment'})
+    else:
+        st.caption(f"{len(comment_index):,} comments indexed. All words must match; end a word with * to match prefixes.")
+
     # Priority action matrix
     st.subheader("Priority Action Matrix")
 
     # Create priority matrix based on risk level and trend
-    priority_data = []
-    for metric, info in risk_metric_options.items():
-        current = info['current_scores'][-1]
-        gap = info['target'] - current
-        trend = info['current_scores'][-1] - info['current_scores'][0]
-
-        # Determine priority level
-        if gap > 0.5 and trend < -0.1:
-            priority = "Critical - Immediate Action Required"
-            priority_score = 4
-        elif gap > 0.3 or trend < -0.2:
-            priority = "High - Action Required Soon"
-            priority_score = 3
-        elif gap > 0.1 or trend < -0.1:
-            priority = "Medium - Monitor Closely"
-            priority_score = 2
-        else:
-            priority = "Low - Maintain Current Performance"
-            priority_score = 1
-
-        priority_data.append({
-            'Metric': metric,
-            'Current_Score': current,
-            'Gap': gap,
-            'Trend': trend,
-            'Priority': priority,
-            'Priority_Score': priority_score
-        })
-
-    priority_df = pd.DataFrame(priority_data).sort_values('Priority_Score', ascending=False)
+    priority_df = priority_matrix(metric_scores, TARGETS)
 
     # Display priority matrix
-    for _, row in priority_df.iterrows():
-        if row['Priority_Score'] == 4:
-            alert_type = "error"
-            icon = "🚨"
-            border_color = "#ff4444"
-        elif row['Priority_Score'] == 3:
-            alert_type = "warning"
-            icon = "⚠️"
-            border_color = "#ffaa00"
-        elif row['Priority_Score'] == 2:
-            alert_type = "info"
-            icon = "ℹ️"
-            border_color = "#3498db"
-        else:
-            alert_type = "success"
-            icon = "✅"
-            border_color = "#00aa00"
-
-        st.markdown(f"""
-        <div style="padding: 1rem; margin: 0.5rem 0; border-radius: 8px; border-left: 4px solid {border_color}; background: #f8f9fa;">
-            <h4 style="margin: 0;">{icon} {row['Metric']}</h4>
-            <p><strong>Priority:</strong> {row['Priority']}</p>
-            <p><strong>Current Score:</strong> {row['Current_Score']:.2f} | <strong>Gap:</strong> {row['Gap']:.2f} | <strong>Trend:</strong> {row['Trend']:+.2f}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    cards = [
+        priority_card(row.Metric, row.Priority, row.Priority_Score, row.Current_Score, row.Gap, row.Trend)
+        for row in priority_df.itertuples(index=False)
+    ]
+    st.markdown(card_grid(cards), unsafe_allow_html=True)
 
     # Executive summary
     st.subheader("📊 Executive Summary & Key Takeaways")
 
     # Calculate overall statistics
-    high_risk_count = len([m for m in priority_df['Priority_Score'] if m >= 3])
-    improving_metrics = len([m for m in priority_df['Trend'] if m > 0.1])
+    high_risk_count = int(priority_df['Priority_Score'].isin(HIGH_PRIORITY_SCORES).sum())
+    trends = trend_labels(priority_df['Trend'])
+    improving_metrics = int((trends == REGISTRY['trend']['labels'][-1]).sum())
     avg_performance = comparison_df['Current_Score'].mean()
 
     summary_col1, summary_col2, summary_col3 = st.columns(3)
@@ -1160,22 +1550,23 @@ with tab4:
         st.metric("Improving Metrics", improving_metrics, delta=f"of {len(priority_df)} total")
 
     with summary_col3:
-        st.metric("Overall Performance", f"{avg_performance:.2f}", delta=f"{avg_performance-9.0:+.2f}")
+        avg_target = np.mean(list(TARGETS.values()))
+        st.metric("Overall Performance", f"{avg_performance:.2f}", delta=f"{avg_performance-avg_target:+.2f}")
 
     # Strategic recommendations based on overall analysis
     st.markdown("### 🎯 Strategic Focus Areas for City Furniture Website")
 
-    critical_metrics = priority_df[priority_df['Priority_Score'] >= 3]['Metric'].tolist()
+    critical_metrics = priority_df[priority_df['Priority_Score'].isin(HIGH_PRIORITY_SCORES)]['Metric'].tolist()
     if critical_metrics:
         st.error(f"**🚨 Immediate Action Required:** {', '.join(critical_metrics)}")
         st.markdown("**Impact:** These metrics require immediate intervention to prevent customer satisfaction decline and potential revenue loss.")
 
-    declining_metrics = priority_df[priority_df['Trend'] < -0.1]['Metric'].tolist()
+    declining_metrics = priority_df[trends == REGISTRY['trend']['labels'][0]]['Metric'].tolist()
     if declining_metrics:
         st.warning(f"**📉 Declining Performance:** {', '.join(declining_metrics)}")
         st.markdown("**Impact:** Monitor these metrics closely and implement preventive measures to stop further deterioration.")
 
-    strong_metrics = priority_df[priority_df['Priority_Score'] == 1]['Metric'].tolist()
+    strong_metrics = priority_df[priority_df['Priority_Score'] == PRIORITY_SCORES[-1]]['Metric'].tolist()
     if strong_metrics:
         st.success(f"**🎉 Strong Performance:** {', '.join(strong_metrics)}")
         st.markdown("**Impact:** These are competitive advantages to maintain and potentially leverage for marketing positioning.")
@@ -1191,7 +1582,7 @@ with tab4:
        - Enhance mobile responsiveness and site performance
 
     2. **Performance Monitoring**:
-       - Set up automated alerts for metrics falling below 9.0
+       - Set up automated alerts for metrics falling below target
        - Conduct monthly reviews of all satisfaction metrics
        - Implement A/B testing for continuous improvement
 
@@ -1203,13 +1594,73 @@ with tab4:
     **Expected ROI:** Improvements in these metrics typically correlate with 10-25% increases in conversion rates and 15-30% reduction in cart abandonment.
     """)
 
+with tab4:
+    risk_analysis_tab()
+
+# Live refresh status
+if live_feed is not None:
+    @st.fragment(run_every=refresh_interval)
+    def live_status():
+        current_data_version()
+        last_update = live_feed.last_update.strftime('%H:%M:%S') if live_feed.last_update is not None else "waiting for data"
+        st.markdown("---")
+        st.caption(f"🟢 Live mode: refreshing every {REFRESH_SECONDS:g}s | {live_feed.rows_ingested:,} new responses | last batch: {last_update}")
+        if live_feed.rows_rejected:
+            reasons = ", ".join(f"{code} ({count:,})" for code, count in live_feed.validation['by_reason'].items())
+            st.caption(f"⚠️ {live_feed.rows_rejected:,} rows quarantined: {reasons}")
+        if len(live_feed.missing_days):
+            st.caption(f"⚠️ {len(live_feed.missing_days)} day(s) without responses, "
+                       f"last {live_feed.missing_days[-1]:%m/%d/%Y}")
+        if live_feed.validation is not None:
+            st.caption(f"Validation: {live_feed.validation['clean_rows_per_second']:,.0f} clean rows/s")
+        warm_status()
+
+    with st.sidebar:
+        live_status()
+else:
+    with st.sidebar:
+        warm_status()
+
+# Bytes sent per chart on the last run
+if PAYLOAD_REPORT:
+    with st.sidebar.expander("📶 Chart Payload"):
+        chart_payload = st.session_state.get('chart_payload', {})
+        st.dataframe(
+            pd.DataFrame({'Chart': list(chart_payload), 'KB': [size / 1024 for size in chart_payload.values()]}).round(1),
+            hide_index=True
+        )
+        st.caption(f"Total: {sum(chart_payload.values()) / 1024:.1f} KB")
+
+# Size, hit rate and evictions per cache
+if CACHE_ADMIN:
+    with st.sidebar.expander("🗄️ Cache Usage"):
+        cache_report = cache_budget.report()
+        card_caches = {'month_card': month_card.cache_info(), 'priority_card': priority_card.cache_info()}
+        cache_report = pd.concat([cache_report, pd.DataFrame([
+            {'cache': name, 'entries': info.currsize, 'hits': info.hits, 'misses': info.misses,
+             'hit_rate': info.hits / max(info.hits + info.misses, 1), 'evictions': None, 'max_entries': info.maxsize}
+            for name, info in card_caches.items()
+        ]), cache_budget.resident_report(backend.resident_state())], ignore_index=True)
+        st.dataframe(
+            cache_report.rename(columns={'cache': 'Cache', 'entries': 'Entries', 'mb': 'MB', 'hits': 'Hits',
+                                         'misses': 'Misses', 'hit_rate': 'Hit rate', 'evictions': 'Evicted',
+                                         'ttl': 'TTL (s)', 'max_entries': 'Max entries'}).round(2),
+            hide_index=True
+        )
+        st.caption(f"{cache_budget.total_bytes() / 2 ** 20:.1f} of {cache_budget.budget_bytes / 2 ** 20:g} MB "
+                   "budget in use. Card markup caches are bounded by entries; resident backend "
+                   "state is kept for the process and is not counted against the budget.")
+        if st.button("Clear cached views", key="clear_caches"):
+            cache_budget.clear()
+            st.rerun()
+
 # Export functionality
 st.sidebar.markdown("---")
 st.sidebar.subheader("📥 Export Data")
 
 if st.sidebar.button("Download Daily Data (CSV)"):
     csv_buffer = io.StringIO()
-    daily_df.to_csv(csv_buffer, index=False)
+    backend.daily_timeline().to_csv(csv_buffer, index=False)
     st.sidebar.download_button(
         label="Download CSV",
         data=csv_buffer.getvalue(),
@@ -1219,7 +1670,7 @@ if st.sidebar.button("Download Daily Data (CSV)"):
 
 if st.sidebar.button("Download Events Data (CSV)"):
     csv_buffer = io.StringIO()
-    events_df.to_csv(csv_buffer, index=False)
+    backend.events().to_csv(csv_buffer, index=False)
     st.sidebar.download_button(
         label="Download Events CSV",
         data=csv_buffer.getvalue(),
@@ -1229,24 +1680,12 @@ if st.sidebar.button("Download Events Data (CSV)"):
 
 if st.sidebar.button("Download Risk Analysis (CSV)"):
     # Create risk analysis summary for export
-    risk_summary_data = []
-    for metric, info in risk_metric_options.items():
-        current = info['current_scores'][-1]
-        gap = info['target'] - current
-        trend = info['current_scores'][-1] - info['current_scores'][0]
-        risk_level = 'High Risk' if gap > 0.5 else 'Medium Risk' if gap > 0.2 else 'Low Risk'
-
-        risk_summary_data.append({
-            'Metric': metric,
-            'Current_Score': current,
-            'Target_Score': info['target'],
-            'Performance_Gap': gap,
-            'Trend_Direction': trend,
-            'Risk_Level': risk_level,
-            'Business_Impact': info['business_impact']
-        })
-
-    risk_summary_df = pd.DataFrame(risk_summary_data)
+    months, metric_scores = metric_score_history(current_data_version())
+    risk_summary_df = metric_risk_summary(metric_scores)
+    risk_summary_df.insert(2, 'Target_Score', risk_summary_df['Metric'].map(TARGETS))
+    risk_summary_df['Business_Impact'] = risk_summary_df['Metric'].map(
+        {metric: info['business_impact'] for metric, info in risk_metric_options.items()})
+    risk_summary_df = risk_summary_df.drop(columns='Average_Score')
     csv_buffer = io.StringIO()
     risk_summary_df.to_csv(csv_buffer, index=False)
     st.sidebar.download_button(
@@ -1256,7 +1695,26 @@ if st.sidebar.button("Download Risk Analysis (CSV)"):
         mime="text/csv"
     )
 
-# Footer
-st.markdown("---")
-st.markdown("*Dashboard last updated: October 2025 | City Furniture Customer Satisfaction Analysis - Ultimate Enhanced Version*")
-st.markdown("*Powered by Advanced Analytics & Business Intelligence*")
+if st.sidebar.button("Download Full Report (Excel)"):
+    # Daily scores, monthly comparison, events, priority matrix and per-store
+    # sheets in one workbook
+    excel_buffer = io.BytesIO()
+    build_report(excel_buffer, backend)
+    st.sidebar.download_button(
+        label="Download Excel Report",
+        data=excel_buffer.getvalue(),
+        file_name=f"satisfaction_report_{datetime.now().strftime('%Y%m%d')}.xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+
+# Footer: the last live batch, or else the last day of survey data
+@st.fragment(run_every=refresh_interval)
+def footer():
+    data_version = current_data_version()
+    updated = live_feed.last_update if live_feed is not None and live_feed.last_update is not None \
+        else data_span(data_version)[1]
+    st.markdown("---")
+    st.markdown(f"*Dashboard last updated: {long_date(updated)} | City Furniture Customer Satisfaction Analysis - Ultimate Enhanced Version*")
+    st.markdown("*Powered by Advanced Analytics & Business Intelligence*")
+
+footer()
@@ -0,0 +1,385 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from anomaly import SEVERITY_LEVELS, AnomalyMonitor, anomaly_events, severity_from_failure, severity_from_score
+from bootstrap import confidence_intervals, score_histograms
+from promotions import PROMOTION_CALENDAR, promotion_days, promotion_effects, promotion_on
+from registry import REGISTRY, priority_levels
+
+# Survey window covered by the dashboard
+START_DATE = datetime(2025, 5, 30)
+END_DATE = datetime(2025, 9, 30)
+
+# Metrics, targets and stores come from the registry (metrics.json)
+METRICS = [metric['name'] for metric in REGISTRY['metrics']]
+TARGETS = {metric['name']: metric['target'] for metric in REGISTRY['metrics']}
+TIMELINE_METRIC = REGISTRY['timeline_metric']
+# Driver analysis explains each outcome metric by the remaining metrics
+OUTCOME_METRICS = REGISTRY['outcome_metrics']
+DRIVER_METRICS = [metric for metric in METRICS if metric not in OUTCOME_METRICS]
+
+STORES = REGISTRY['stores']
+ALL_STORES = 'All Stores'
+REGIONS = REGISTRY['regions']
+
+# Monthly average per metric from the survey report, one value per period
+PERIODS = ['May-June 2025', 'July 2025', 'August 2025', 'September 2025']
+MONTHLY_BASELINES = {
+    'Overall Satisfaction': [9.48, 9.38, 9.36, 9.48],
+    'Likelihood to Buy Again': [9.58, 9.33, 9.21, 9.56],
+    'Likelihood to Recommend': [9.43, 9.25, 9.06, 9.60],
+    'Site Design': [9.68, 9.37, 9.26, 9.73],
+    'Ease of Finding': [9.63, 9.30, 9.21, 9.66],
+    'Product Information Clarity': [9.60, 9.28, 9.18, 9.63],
+    'Charges Stated Clearly': [9.48, 9.22, 9.16, 9.43],
+    'Checkout Process': [9.28, 9.07, 8.91, 9.31]
+}
+# Sample data for metrics added to the registry without a survey baseline
+DEFAULT_BASELINE = [9.4, 9.2, 9.1, 9.4]
+
+# Day-level effects on the satisfaction scale; promotion windows and their
+# effects come from the promotion calendar (promotions.csv)
+WEEKEND_EFFECT = -0.3
+INCIDENTS = [
+    {'name': 'System maintenance', 'date': datetime(2025, 7, 15), 'effect': -2.5},
+    {'name': 'Store renovation', 'date': datetime(2025, 8, 20), 'effect': -1.8},
+]
+# Repeat purchases in the sample orders: chance of each return at a 'Likelihood
+# to Buy Again' baseline of 9.0, its change per point, and the mean gap
+REPEAT_BASE = 0.35
+REPEAT_SLOPE = 0.4
+REPEAT_ORDERS = 4
+REPEAT_GAP_DAYS = 35
+
+# Day effects are defined for a single noisy daily score; response-level
+# means move less, so they are damped before being applied
+EFFECT_SCALE = 0.4
+
+# Events reviewed by the analytics team (severity and promotion are derived,
+# not typed)
+CURATED_EVENTS = [
+    {'date': datetime(2025, 8, 11), 'day_of_week': 'Tuesday', 'failed_metrics': '7/8', 'failure_percentage': 87.5},
+    {'date': datetime(2025, 8, 13), 'day_of_week': 'Saturday', 'failed_metrics': '6/8', 'failure_percentage': 75.0},
+    {'date': datetime(2025, 6, 29), 'day_of_week': 'Monday', 'failed_metrics': '6/8', 'failure_percentage': 75.0},
+    {'date': datetime(2025, 8, 7), 'day_of_week': 'Sunday', 'failed_metrics': '4/8', 'failure_percentage': 50.0},
+    {'date': datetime(2025, 8, 25), 'day_of_week': 'Thursday', 'failed_metrics': '4/8', 'failure_percentage': 50.0},
+    {'date': datetime(2025, 9, 22), 'day_of_week': 'Tuesday', 'failed_metrics': '4/8', 'failure_percentage': 50.0},
+    {'date': datetime(2025, 7, 14), 'day_of_week': 'Tuesday', 'failed_metrics': '3/8', 'failure_percentage': 37.5},
+    {'date': datetime(2025, 7, 8), 'day_of_week': 'Wednesday', 'failed_metrics': '3/8', 'failure_percentage': 37.5},
+    {'date': datetime(2025, 8, 2), 'day_of_week': 'Sunday', 'failed_metrics': '3/8', 'failure_percentage': 37.5},
+    {'date': datetime(2025, 8, 13), 'day_of_week': 'Thursday', 'failed_metrics': '3/8', 'failure_percentage': 37.5},
+    {'date': datetime(2025, 8, 18), 'day_of_week': 'Monday', 'failed_metrics': '3/8', 'failure_percentage': 37.5},
+    {'date': datetime(2025, 6, 15), 'day_of_week': 'Monday', 'failed_metrics': '2/8', 'failure_percentage': 25.0},
+    {'date': datetime(2025, 9, 1), 'day_of_week': 'Tuesday', 'failed_metrics': '2/8', 'failure_percentage': 25.0},
+    {'date': datetime(2025, 7, 20), 'day_of_week': 'Monday', 'failed_metrics': '1/8', 'failure_percentage': 12.5},
+    {'date': datetime(2025, 8, 24), 'day_of_week': 'Sunday', 'failed_metrics': '1/8', 'failure_percentage': 12.5},
+    {'date': datetime(2025, 9, 15), 'day_of_week': 'Friday', 'failed_metrics': '0/8', 'failure_percentage': 0.0},
+]
+
+
+def period_labels(dates, first=None):
+    # Calendar months, except that a partial leading month is folded into the
+    # next one ('May-June 2025'). Labels are built per distinct date only.
+    codes, uniques = pd.factorize(pd.to_datetime(pd.Series(dates)))
+    uniques = pd.DatetimeIndex(uniques)
+    labels = pd.Series(uniques.strftime('%B %Y'))
+    first = uniques.min() if first is None else pd.Timestamp(first)
+    if first.day > 1:
+        following = first + pd.offsets.MonthBegin(1)
+        merged = f"{first:%B}-{following:%B %Y}"
+        months = uniques.to_period('M')
+        in_merged = (months == first.to_period('M')) | (months == following.to_period('M'))
+        labels = labels.where(~in_merged, merged)
+    label_codes, label_names = pd.factorize(labels)
+    return pd.Series(pd.Categorical.from_codes(label_codes[codes], categories=label_names))
+
+
+def day_effects(dates):
+    dates = pd.DatetimeIndex(dates)
+    effect = np.where(dates.weekday >= 5, WEEKEND_EFFECT, 0.0)
+    effect = effect + promotion_effects(dates)
+    for incident in INCIDENTS:
+        effect = effect + np.where(dates.normalize() == incident['date'], incident['effect'], 0.0)
+    return effect
+
+
+def draw_scores(mu, counts, rng, dtype=np.float64):
+    # `counts[i]` responses for each row of expected scores `mu` (cells x
+    # metrics); returns each response's cell and its int8 scores.
+    # Score = 10 - Binomial(10, p); a per-respondent mood term correlates
+    # the metrics of one response (second-order correction keeps the mean)
+    cell = np.repeat(np.arange(len(counts)), counts)
+    loading = dtype(0.6)
+    p = (10.0 - mu[cell].astype(dtype, copy=False)) / dtype(10.0)
+    mood = rng.standard_normal((len(cell), 1), dtype=dtype)
+    logit = np.log(p / (1 - p)) - loading * mood - (1 - 2 * p) * loading ** 2 / 2
+    p = 1 / (1 + np.exp(-logit))
+    return cell, (10 - rng.binomial(10, p)).astype(np.int8)
+
+
+def generate_responses(start=START_DATE, end=END_DATE, stores=STORES, responses_per_day=40, seed=42):
+    # One row per survey response with a 0-10 score for each metric
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, end, freq='D')
+    n_days, n_stores, n_metrics = len(dates), len(stores), len(METRICS)
+
+    # Expected score per (day, store, metric)
+    periods = period_labels(dates)
+    period_index = {p: i for i, p in enumerate(PERIODS)}
+    period_pos = periods.map(period_index).fillna(len(PERIODS) - 1).astype(int).to_numpy()
+    baselines = np.array([MONTHLY_BASELINES.get(m, DEFAULT_BASELINE) for m in METRICS]).T  # period x metric
+    mu = baselines[period_pos][:, None, :]
+    mu = mu + EFFECT_SCALE * day_effects(dates)[:, None, None]
+    mu = mu + rng.normal(0, 0.05, (1, n_stores, 1))         # store offset
+    mu = mu + rng.normal(0, 0.12, (n_days, n_stores, 1))    # shared daily shock
+    mu = mu + rng.normal(0, 0.05, (n_days, n_stores, n_metrics))
+    mu = np.clip(mu, 1.0, 9.95)
+
+    # Response counts per day and store
+    counts = rng.poisson(responses_per_day, (n_days, n_stores)).ravel()
+    cell, scores = draw_scores(mu.reshape(-1, n_metrics), counts, rng)
+
+    responses = pd.DataFrame(scores, columns=METRICS)
+    responses.insert(0, 'store', pd.Categorical(np.asarray(stores)[cell % n_stores], categories=stores))
+    responses.insert(0, 'date', dates[cell // n_stores])
+    return responses
+
+
+def generate_orders(start=START_DATE, end=END_DATE, stores=STORES, new_customers_per_day=60, seed=11):
+    # One row per order. New customers arrive each day and store; each comes
+    # back (up to REPEAT_ORDERS times, gaps of ~REPEAT_GAP_DAYS) with a
+    # chance that follows the 'Likelihood to Buy Again' baseline of the month
+    # they first bought in
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, end, freq='D')
+    n_stores = len(stores)
+    counts = rng.poisson(new_customers_per_day, len(dates) * n_stores)
+    cell = np.repeat(np.arange(len(dates) * n_stores), counts)
+    first = dates[cell // n_stores]
+
+    periods = period_labels(first, first=start)
+    baseline = np.array(MONTHLY_BASELINES.get('Likelihood to Buy Again', DEFAULT_BASELINE))
+    period_pos = periods.map({p: i for i, p in enumerate(PERIODS)}).fillna(len(PERIODS) - 1).astype(int).to_numpy()
+    repeat_chance = np.clip(REPEAT_BASE + REPEAT_SLOPE * (baseline[period_pos] - 9.0), 0.05, 0.95)
+
+    # A customer's k-th return happens only if every earlier one did
+    returns = (rng.random((len(cell), REPEAT_ORDERS)) < repeat_chance[:, None]).cumprod(axis=1).astype(bool)
+    offsets = np.ceil(rng.exponential(REPEAT_GAP_DAYS, (len(cell), REPEAT_ORDERS)).cumsum(axis=1))
+    order_dates = first.to_numpy()[:, None] + offsets.astype('timedelta64[D]')
+    keep = returns & (order_dates <= np.datetime64(end))
+
+    customer, attempt = np.nonzero(keep)
+    orders = pd.DataFrame({
+        'customer_id': np.concatenate([np.arange(len(cell)), customer]),
+        'date': np.concatenate([first.to_numpy(), order_dates[customer, attempt]]),
+        'store': pd.Categorical(np.asarray(stores)[np.concatenate([cell, cell[customer]]) % n_stores],
+                                categories=stores),
+    })
+    return orders.sort_values(['date', 'customer_id'], kind='stable').reset_index(drop=True)
+
+
+def daily_metric_scores(responses):
+    # Long frame of daily (metric, store) aggregates
+    grouped = responses.groupby(['date', 'store'], observed=True)
+    sums = grouped[METRICS].sum().reset_index().melt(['date', 'store'], var_name='metric', value_name='score_sum')
+    counts = grouped.size().rename('responses').reset_index()
+    daily = sums.merge(counts, on=['date', 'store'])
+    daily['average_score'] = daily['score_sum'] / daily['responses']
+    return daily.sort_values(['date', 'metric', 'store']).reset_index(drop=True)
+
+
+def monthly_totals(daily_scores, targets=TARGETS):
+    # Per (metric, period, store) sums, including an 'All Stores' rollup;
+    # days below target are counted on the daily averages
+    totals = daily_scores.groupby(['date', 'metric'], as_index=False)[['score_sum', 'responses']].sum()
+    totals['store'] = ALL_STORES
+    totals['average_score'] = totals['score_sum'] / totals['responses']
+    daily = pd.concat([daily_scores, totals], ignore_index=True)
+    daily['store'] = daily['store'].astype(str)
+    daily['period'] = period_labels(daily['date']).astype(str).to_numpy()
+    daily['target'] = daily['metric'].map(targets)
+    daily['below_target'] = daily['average_score'] < daily['target']
+
+    return daily.groupby(['metric', 'period', 'store'], sort=False).agg(
+        first_date=('date', 'min'),
+        last_date=('date', 'max'),
+        total_days=('date', 'nunique'),
+        score_sum=('score_sum', 'sum'),
+        responses=('responses', 'sum'),
+        days_below_target=('below_target', 'sum'),
+        target=('target', 'first')
+    ).reset_index()
+
+
+def finish_monthly_summary(totals):
+    # Derived columns shared by the in-memory and database backends
+    summary = totals.copy()
+    summary['first_date'] = pd.to_datetime(summary['first_date'])
+    summary['last_date'] = pd.to_datetime(summary['last_date'])
+    summary['average_score'] = summary['score_sum'] / summary['responses']
+    summary['period_range'] = summary['first_date'].dt.strftime('%Y-%m-%d') + ' to ' + summary['last_date'].dt.strftime('%Y-%m-%d')
+    summary['days_below_percentage'] = summary['days_below_target'] / summary['total_days'] * 100
+    summary['performance_vs_target'] = summary['average_score'] - summary['target']
+    return summary.sort_values(['metric', 'store', 'first_date']).reset_index(drop=True)
+
+
+def monthly_summary(daily_scores, targets=TARGETS):
+    return finish_monthly_summary(monthly_totals(daily_scores, targets))
+
+
+def period_histograms(responses, first=None):
+    # Score histograms per metric x period x store; `first` is the start of
+    # the whole dataset when `responses` is only a new batch
+    groups = pd.DataFrame({
+        'period': period_labels(responses['date'], first=first).array,
+        'store': responses['store'].array
+    })
+    return score_histograms(responses, METRICS, groups)
+
+
+def daily_histograms(responses):
+    # Score histograms per metric x date x store: the per-day quantile sketches
+    # that weeks, months and regions are merged from
+    groups = pd.DataFrame({'date': responses['date'].array, 'store': responses['store'].astype(str).array})
+    return score_histograms(responses, METRICS, groups)
+
+
+def monthly_intervals(index, counts, targets, n_boot=1000, seed=0):
+    # Bootstrap intervals for every metric x period x store (plus the
+    # all-store rollup) from a single batched resample
+    rollup = pd.DataFrame(counts).groupby([index['metric'], index['period']], sort=False).sum()
+    rollup_index = rollup.index.to_frame(index=False).assign(store=ALL_STORES)
+    index = pd.concat([index.astype(str), rollup_index.astype(str)], ignore_index=True)
+    counts = np.vstack([counts, rollup.to_numpy()])
+    return confidence_intervals(index, counts, targets, n_boot=n_boot, seed=seed)
+
+
+def monthly_confidence_intervals(responses, targets, n_boot=1000, seed=0):
+    return monthly_intervals(*period_histograms(responses), targets, n_boot=n_boot, seed=seed)
+
+
+def score_history(monthly):
+    # Monthly scores per metric across all stores, oldest period first
+    monthly_all = monthly[monthly['store'] == ALL_STORES].sort_values('first_date')
+    months = list(dict.fromkeys(monthly_all['period']))
+    metric_scores = {metric: rows['average_score'].tolist() for metric, rows in monthly_all.groupby('metric', sort=False)}
+    return months, metric_scores
+
+
+def priority_matrix(metric_scores, targets):
+    # Priority per metric from its latest monthly score (gap to target) and the
+    # change since the first month; most urgent first
+    metrics = list(targets)
+    history = [metric_scores[metric] for metric in metrics]
+    current = np.array([scores[-1] for scores in history])
+    gap = np.array([targets[metric] for metric in metrics]) - current
+    trend = current - np.array([scores[0] for scores in history])
+    priority, priority_score = priority_levels(gap, trend)
+    matrix = pd.DataFrame({
+        'Metric': metrics,
+        'Current_Score': current,
+        'Gap': gap,
+        'Trend': trend,
+        'Priority': priority,
+        'Priority_Score': priority_score
+    })
+    return matrix.sort_values('Priority_Score', ascending=False)
+
+
+def dataset_version(responses):
+    # Content hash used to key caches derived from the response data
+    return f"{len(responses)}-{pd.util.hash_pandas_object(responses, index=False).sum():x}"
+
+
+def build_daily_df(daily_scores, metric=TIMELINE_METRIC):
+    # Daily timeline across all stores for one metric
+    rows = daily_scores[daily_scores['metric'] == metric]
+    totals = rows.groupby('date')[['score_sum', 'responses']].sum()
+    dates = pd.DatetimeIndex(totals.index)
+    return pd.DataFrame({
+        'date': dates,
+        'satisfaction_score': (totals['score_sum'] / totals['responses']).round(1).to_numpy(),
+        'month': dates.strftime('%B %Y'),
+        'month_short': dates.strftime('%b'),
+        'day_name': dates.strftime('%A'),
+        'is_weekend': dates.weekday >= 5,
+        'week': dates.isocalendar().week.to_numpy()
+    })
+
+
+def promotion_uplift(daily_scores, calendar=PROMOTION_CALENDAR):
+    # Mean score inside each promotion window against the baseline of days
+    # outside every window, for each (promotion, metric, store) including an
+    # 'All Stores' rollup. Days are joined to windows once; the rest is two
+    # grouped sums over the whole long frame.
+    totals = daily_scores.groupby(['date', 'metric'], as_index=False)[['score_sum', 'responses']].sum()
+    totals['store'] = ALL_STORES
+    daily = pd.concat([daily_scores[['date', 'metric', 'store', 'score_sum', 'responses']], totals], ignore_index=True)
+    daily['store'] = daily['store'].astype(str)
+
+    days = pd.DatetimeIndex(daily['date'].unique())
+    day, promotion = promotion_days(days, calendar)
+    windows = pd.DataFrame({'date': days[day], 'promotion': calendar['name'].to_numpy()[promotion]})
+    keys = ['promotion', 'metric', 'store']
+    inside = daily.merge(windows, on='date').groupby(keys, sort=False).agg(
+        score_sum=('score_sum', 'sum'),
+        responses=('responses', 'sum'),
+        days=('date', 'nunique')
+    ).reset_index()
+    outside = daily[~daily['date'].isin(days[day])].groupby(['metric', 'store'], sort=False)[
+        ['score_sum', 'responses']].sum().reset_index()
+    return finish_promotion_uplift(inside, outside, calendar)
+
+
+def finish_promotion_uplift(inside, outside, calendar):
+    # Scores from the inside-window and outside-window sums; shared by the
+    # in-memory and database backends
+    baseline = outside.assign(baseline_score=outside['score_sum'] / outside['responses'])
+    uplift = inside.merge(baseline[['metric', 'store', 'baseline_score']], on=['metric', 'store'], how='left')
+    uplift['promotion_score'] = uplift['score_sum'] / uplift['responses']
+    uplift['uplift'] = uplift['promotion_score'] - uplift['baseline_score']
+    uplift = uplift.merge(calendar[['name', 'start', 'end']].rename(columns={'name': 'promotion'}), on='promotion')
+    columns = ['promotion', 'start', 'end', 'metric', 'store', 'days', 'responses', 'promotion_score',
+               'baseline_score', 'uplift']
+    return uplift[columns].sort_values(['start', 'promotion', 'metric', 'store']).reset_index(drop=True)
+
+
+def build_events_df(anomalies):
+    # Curated events plus days flagged by the anomaly monitor; severity is the
+    # higher of the failure-rate level and the detector level for that day
+    n_metrics = len(METRICS)
+    curated = pd.DataFrame(CURATED_EVENTS)
+    # The hand-entered weekday labels do not all match their dates
+    curated['day_of_week'] = curated['date'].dt.day_name()
+    curated['promotion'] = promotion_on(curated['date'])
+    curated['source'] = 'Curated'
+    curated['stores'] = ''
+
+    detected = anomaly_events(anomalies, n_metrics)
+    detected = detected[~detected['date'].isin(curated['date'])]
+    detected = pd.DataFrame({
+        'date': pd.to_datetime(detected['date']),
+        'day_of_week': pd.to_datetime(detected['date']).dt.day_name(),
+        'failed_metrics': detected['failed_count'].astype(int).astype(str) + f'/{n_metrics}',
+        'failure_percentage': detected['failed_count'].astype(float) / n_metrics * 100,
+        'promotion': promotion_on(detected['date']),
+        'source': 'Detected',
+        'stores': detected['stores']
+    })
+
+    events = pd.concat([curated, detected], ignore_index=True)
+    drops = anomalies[anomalies['direction'] == 'down']
+    day_scores = drops.groupby('date')['anomaly_score'].max()
+    events['anomaly_score'] = events['date'].map(day_scores).fillna(0.0).to_numpy()
+    levels = np.maximum(severity_from_failure(events['failure_percentage']), severity_from_score(events['anomaly_score']))
+    events['severity'] = np.asarray(SEVERITY_LEVELS)[levels]
+    return events
+
+
+def derive_tables(responses):
+    # Everything the dashboard renders is derived from the responses:
+    # the daily timeline, the events table and daily metric/store aggregates
+    daily_scores = daily_metric_scores(responses)
+    anomalies = AnomalyMonitor().ingest(daily_scores)
+    return build_daily_df(daily_scores), build_events_df(anomalies), daily_scores
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+
+def response_moments(responses, metrics, groups):
+    # Count, mean vector and co-moment matrix (sum of products of deviations
+    # from the mean) of the metric scores per group, in one pass of
+    # bincounts. `groups` is a frame of grouping columns aligned with
+    # `responses`.
+    group_cols = list(groups.columns)
+    codes, keys = pd.MultiIndex.from_frame(groups).factorize()
+    k = len(metrics)
+    scores = responses[metrics].to_numpy(dtype=np.float64)
+    n = np.bincount(codes, minlength=len(keys)).astype(np.float64)
+    mean = np.empty((len(keys), k))
+    for i in range(k):
+        mean[:, i] = np.bincount(codes, weights=scores[:, i], minlength=len(keys)) / n
+    # Deviations from each group's own mean keep the products small
+    deviations = scores - mean[codes]
+    comoment = np.empty((len(keys), k, k))
+    for i in range(k):
+        for j in range(i, k):
+            comoment[:, i, j] = comoment[:, j, i] = np.bincount(
+                codes, weights=deviations[:, i] * deviations[:, j], minlength=len(keys))
+    index = keys.to_frame(index=False)
+    index.columns = group_cols
+    return index, n, mean, comoment
+
+
+def merge_moments(index, n, mean, comoment, by):
+    # Chan et al.'s pairwise update for many groups at once: counts add, the
+    # mean is the count-weighted mean and the co-moments add plus a
+    # between-group term n_i (mean_i - mean)(mean_i - mean)'
+    codes, keys = pd.MultiIndex.from_frame(index[by]).factorize() if by else (np.zeros(len(n), dtype=np.int64), None)
+    groups = codes.max() + 1 if len(codes) else 0
+    total = np.bincount(codes, weights=n, minlength=groups)
+    merged_mean = np.zeros((groups, mean.shape[1]))
+    np.add.at(merged_mean, codes, n[:, None] * mean)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        merged_mean /= total[:, None]
+    shift = mean - merged_mean[codes]
+    merged = np.zeros((groups,) + comoment.shape[1:])
+    np.add.at(merged, codes, comoment + n[:, None, None] * shift[:, :, None] * shift[:, None, :])
+    if keys is None:
+        merged_index = pd.DataFrame(index=range(groups))
+    else:
+        merged_index = keys.to_frame(index=False)
+        merged_index.columns = by
+    return merged_index, total, merged_mean, merged
+
+
+class DriverMoments:
+    # Score moments per (date, store), merged in as responses arrive, so a
+    # driver analysis for any store or period merges a few hundred small
+    # summaries instead of refitting over every response
+    def __init__(self, metrics):
+        self.metrics = list(metrics)
+        self.index = pd.DataFrame({'date': pd.to_datetime([]), 'store': pd.Series([], dtype=str)})
+        self.n = np.zeros(0)
+        self.mean = np.zeros((0, len(self.metrics)))
+        self.comoment = np.zeros((0, len(self.metrics), len(self.metrics)))
+
+    def copy(self):
+        moments = DriverMoments(self.metrics)
+        moments.index, moments.n, moments.mean, moments.comoment = self.index, self.n, self.mean, self.comoment
+        return moments
+
+    def add(self, responses):
+        groups = pd.DataFrame({'date': pd.to_datetime(responses['date']).to_numpy(),
+                               'store': responses['store'].astype(str).to_numpy()})
+        self.merge(*response_moments(responses, self.metrics, groups))
+
+    def merge(self, index, n, mean, comoment):
+        # Days and stores already held are combined with the new moments;
+        # only the rows they touch are recomputed
+        keys = ['date', 'store']
+        held = pd.MultiIndex.from_frame(self.index[keys])
+        touched = held.isin(pd.MultiIndex.from_frame(index[keys]))
+        merged = merge_moments(
+            pd.concat([self.index[touched], index[keys]], ignore_index=True),
+            np.concatenate([self.n[touched], n]),
+            np.concatenate([self.mean[touched], mean]),
+            np.concatenate([self.comoment[touched], comoment]),
+            keys
+        )
+        keep = ~touched
+        self.index = pd.concat([self.index[keep], merged[0]], ignore_index=True)
+        self.n = np.concatenate([self.n[keep], merged[1]])
+        self.mean = np.concatenate([self.mean[keep], merged[2]])
+        self.comoment = np.concatenate([self.comoment[keep], merged[3]])
+
+    def to_frame(self):
+        # Flat table for the database: n, one mean column per metric and the
+        # upper triangle of the co-moment matrix
+        k = len(self.metrics)
+        upper = np.triu_indices(k)
+        frame = self.index.assign(n=self.n)
+        means = pd.DataFrame(self.mean, columns=[f"mean {i}" for i in range(k)])
+        comoments = pd.DataFrame(self.comoment[:, upper[0], upper[1]],
+                                 columns=[f"comoment {i} {j}" for i, j in zip(*upper)])
+        return pd.concat([frame, means, comoments], axis=1)
+
+    @classmethod
+    def from_frame(cls, frame, metrics):
+        moments = cls(metrics)
+        k = len(metrics)
+        upper = np.triu_indices(k)
+        moments.index = pd.DataFrame({'date': pd.to_datetime(frame['date']).to_numpy(),
+                                      'store': frame['store'].astype(str).to_numpy()})
+        moments.n = frame['n'].to_numpy(dtype=np.float64)
+        moments.mean = frame[[f"mean {i}" for i in range(k)]].to_numpy(dtype=np.float64)
+        comoment = np.zeros((len(frame), k, k))
+        comoment[:, upper[0], upper[1]] = frame[[f"comoment {i} {j}" for i, j in zip(*upper)]].to_numpy(dtype=np.float64)
+        comoment[:, upper[1], upper[0]] = comoment[:, upper[0], upper[1]]
+        moments.comoment = comoment
+        return moments
+
+    def summary(self, stores=None, dates=None):
+        # Merged (n, mean, co-moments) over the selected stores and days
+        keep = np.ones(len(self.n), dtype=bool)
+        if stores is not None:
+            keep &= self.index['store'].isin(stores).to_numpy()
+        if dates is not None:
+            keep &= self.index['date'].isin(dates).to_numpy()
+        _, n, mean, comoment = merge_moments(self.index[keep], self.n[keep], self.mean[keep], self.comoment[keep], [])
+        if not len(n):
+            k = len(self.metrics)
+            return 0.0, np.full(k, np.nan), np.zeros((k, k))
+        return n[0], mean[0], comoment[0]
+
+    def drivers(self, outcome, drivers, stores=None, dates=None):
+        # Standardized regression of `outcome` on `drivers` from the merged
+        # correlation matrix. `share` is each driver's part of R² (beta x r,
+        # Pratt's measure), which sums to R².
+        n, _, comoment = self.summary(stores, dates)
+        position = {metric: i for i, metric in enumerate(self.metrics)}
+        x, y = [position[metric] for metric in drivers], position[outcome]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scale = np.sqrt(np.diag(comoment))
+            correlation = comoment / np.outer(scale, scale)
+        r_xx, r_xy = correlation[np.ix_(x, x)], correlation[x, y]
+        if n <= len(drivers) + 1 or not np.isfinite(r_xx).all() or not np.isfinite(r_xy).all():
+            beta = np.full(len(drivers), np.nan)
+        else:
+            beta = np.linalg.lstsq(r_xx, r_xy, rcond=None)[0]
+        table = pd.DataFrame({'driver': drivers, 'correlation': r_xy, 'beta': beta, 'share': beta * r_xy})
+        table.attrs['responses'] = int(n)
+        table.attrs['r_squared'] = float(np.nansum(table['share'])) if np.isfinite(beta).all() else np.nan
+        return table.sort_values('beta', ascending=False, na_position='last').reset_index(drop=True)
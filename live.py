@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from io import BytesIO
+
+import pandas as pd
+
+from validation import SeenIds, merge_reports, missing_days, quarantine, validate_responses
+
+BATCH_EXTENSIONS = ('.csv', '.parquet')
+
+
+class DropFolderSource:
+    # New CSV/Parquet files dropped into a folder; each file is read once.
+    # Writers should write to a dot-prefixed or .tmp name and rename it into
+    # place. Other files are read once their size and mtime are unchanged
+    # since the previous poll, so a file still being written is not taken
+    # half-finished.
+    def __init__(self, folder):
+        self.folder = folder
+        self.seen = set()
+        self.sizes = {}
+
+    def poll(self):
+        frames = []
+        entries = []
+        for entry in os.scandir(self.folder):
+            if entry.name in self.seen or entry.name.startswith('.') or not entry.name.endswith(BATCH_EXTENSIONS):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, entry.name, entry.path, (stat.st_size, stat.st_mtime_ns)))
+        for _, name, path, signature in sorted(entries):
+            if self.sizes.get(name) != signature:
+                self.sizes[name] = signature
+                continue
+            reader = pd.read_parquet if name.endswith('.parquet') else pd.read_csv
+            try:
+                frames.append(reader(path))
+            except FileNotFoundError:
+                continue
+            self.seen.add(name)
+            del self.sizes[name]
+        return frames
+
+
+class TailFileSource:
+    # Append-only CSV; only bytes after the last complete line already read
+    # are parsed on each poll. A file that shrinks (truncated) or is replaced
+    # (rotated, new inode) is read again from its header.
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.header = None
+        self.inode = None
+
+    def poll(self):
+        try:
+            handle = open(self.path, 'rb')
+        except FileNotFoundError:
+            return []
+        with handle:
+            stat = os.fstat(handle.fileno())
+            if stat.st_ino != self.inode or stat.st_size < self.offset:
+                self.offset = 0
+                self.header = None
+                self.inode = stat.st_ino
+            handle.seek(self.offset)
+            chunk = handle.read()
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return []
+        self.offset += end
+        lines = chunk[:end]
+        if self.header is None:
+            header_end = lines.find(b'\n') + 1
+            self.header, lines = lines[:header_end], lines[header_end:]
+        if not lines.strip():
+            return []
+        return [pd.read_csv(BytesIO(self.header + lines))]
+
+
+class LiveFeed:
+    # Pulls new survey rows from the configured sources into the backend.
+    # Polls are rate limited and serialized, so any number of sessions can
+    # call `poll` on every fragment rerun. Rows failing validation are written
+    # to `quarantine_path` instead of being appended; a response_id accepted
+    # from an earlier batch is rejected as a duplicate. `missing_days` lists
+    # the days without responses between the first and last day seen,
+    # starting from `known_dates` (the history already loaded).
+    def __init__(self, backend, sources, min_interval=5.0, quarantine_path=None, known_dates=()):
+        self.backend = backend
+        self.sources = sources
+        self.min_interval = min_interval
+        self.quarantine_path = quarantine_path
+        self.dates = pd.DatetimeIndex(pd.to_datetime(known_dates)).normalize().unique()
+        self.missing_days = missing_days(self.dates)
+        self.last_poll = 0.0
+        self.last_update = None
+        self.rows_ingested = 0
+        self.rows_rejected = 0
+        self.validation = None
+        self.seen_ids = SeenIds()
+        self._lock = threading.Lock()
+
+    def poll(self):
+        if time.monotonic() - self.last_poll < self.min_interval:
+            return False
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self.last_poll = time.monotonic()
+            frames = [frame for source in self.sources for frame in source.poll()]
+            if not frames:
+                return False
+            batch, rejected, report = validate_responses(pd.concat(frames, ignore_index=True),
+                                                         seen=self.seen_ids)
+            self.validation = merge_reports(self.validation, report)
+            self.rows_rejected += len(rejected)
+            if self.quarantine_path:
+                quarantine(rejected, self.quarantine_path, source='live')
+            if batch.empty:
+                return False
+            self.backend.append(batch)
+            self.rows_ingested += len(batch)
+            self.dates = self.dates.union(pd.DatetimeIndex(batch['date'].unique()))
+            self.missing_days = missing_days(self.dates)
+            self.last_update = pd.Timestamp.now()
+            return True
+        finally:
+            self._lock.release()
+
+
+def live_sources_from_env():
+    sources = []
+    if os.environ.get('DASHBOARD_LIVE_DIR'):
+        sources.append(DropFolderSource(os.environ['DASHBOARD_LIVE_DIR']))
+    if os.environ.get('DASHBOARD_LIVE_FILE'):
+        sources.append(TailFileSource(os.environ['DASHBOARD_LIVE_FILE']))
+    return sources
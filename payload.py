@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+# Trace attributes that carry per-point data
+ARRAY_ATTRS = [
+    ('x',), ('y',), ('z',), ('text',), ('customdata',), ('values',),
+    ('marker', 'size'), ('marker', 'color'),
+    ('error_x', 'array'), ('error_x', 'arrayminus'),
+    ('error_y', 'array'), ('error_y', 'arrayminus'),
+]
+
+# Numeric arrays at least this long are sent as base64 typed arrays; shorter
+# ones are smaller as plain JSON. Floats go as float32 (about 7 significant
+# digits), which hover labels format through the axis like any other value
+BINARY_MIN_LENGTH = 16
+# Attributes shown verbatim in hover text keep rounded JSON floats
+VERBATIM_ATTRS = {'text', 'customdata'}
+
+
+def compact_array(values, decimals=3, binary=True):
+    arr = np.asarray(values)
+    if arr.dtype.kind == 'f':
+        if binary and arr.size >= BINARY_MIN_LENGTH:
+            return arr.astype(np.float32)
+        return np.round(arr, decimals).tolist()
+    if arr.dtype.kind in 'iub':
+        if binary and arr.ndim == 1 and len(arr) >= BINARY_MIN_LENGTH:
+            arr = arr.astype(np.int64)
+            smallest = np.promote_types(np.min_scalar_type(arr.min()), np.min_scalar_type(arr.max()))
+            return arr.astype(smallest)
+        return arr.tolist()
+    if arr.dtype.kind == 'M':
+        dates = pd.DatetimeIndex(arr.ravel())
+        fmt = '%Y-%m-%d' if (dates == dates.normalize()).all() else '%Y-%m-%d %H:%M:%S'
+        return np.asarray(dates.strftime(fmt)).reshape(arr.shape).tolist()
+    if arr.dtype.kind == 'O' and arr.ndim == 2:
+        # px hover_data: mixed columns; only float columns are rounded, so
+        # flags, counts and labels keep their values
+        columns = []
+        for col in arr.T:
+            if np.asarray(col.tolist()).dtype.kind == 'f':
+                col = np.round(col.astype(float), decimals).astype(object)
+            columns.append(col)
+        return np.stack(columns, axis=1).tolist() if columns else arr.tolist()
+    return values
+
+
+def compact_figure(fig, decimals=3, binary=True):
+    # Round and shrink per-point arrays and drop template defaults for trace
+    # types the figure does not use; rendering is unchanged
+    for trace in fig.data:
+        for path in ARRAY_ATTRS:
+            parent = trace
+            for key in path[:-1]:
+                parent = parent[key] if key in parent else None
+            if parent is None or path[-1] not in parent:
+                continue
+            values = parent[path[-1]]
+            if values is None or isinstance(values, (str, int, float)):
+                continue
+            parent[path[-1]] = compact_array(values, decimals=decimals,
+                                             binary=binary and path[0] not in VERBATIM_ATTRS)
+
+    template = fig.layout.template
+    if template is not None and template.data is not None:
+        used = {trace.type for trace in fig.data}
+        for trace_type in list(template.data.to_plotly_json()):
+            if trace_type not in used:
+                template.data[trace_type] = None
+    return fig
+
+
+def figure_bytes(fig):
+    # Size of the spec Streamlit sends for this figure
+    return len(pio.to_json(fig, validate=False).encode('utf-8'))
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+PROMOTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'promotions.csv')
+NO_PROMOTION = 'No promotion'
+
+
+def load_promotions(path=None):
+    # Promotion calendar: name, start, end (inclusive days) and the score
+    # effect used for the sample data; set DASHBOARD_PROMOTIONS_FILE to use
+    # another CSV with the same columns
+    path = path or os.environ.get('DASHBOARD_PROMOTIONS_FILE') or PROMOTIONS_FILE
+    calendar = pd.read_csv(path, dtype={'name': str})
+    missing = [col for col in ['name', 'start', 'end'] if col not in calendar.columns]
+    if missing:
+        raise ValueError(f"{path}: missing columns {', '.join(missing)}")
+    calendar['start'] = pd.to_datetime(calendar['start'], errors='coerce')
+    calendar['end'] = pd.to_datetime(calendar['end'], errors='coerce')
+    bad = calendar['start'].isna() | calendar['end'].isna() | (calendar['end'] < calendar['start'])
+    if bad.any():
+        raise ValueError(f"{path}: rows {', '.join(str(i + 2) for i in np.flatnonzero(bad))} need start <= end dates")
+    if calendar['name'].duplicated().any():
+        raise ValueError(f"{path}: promotion names must be unique")
+    calendar['effect'] = pd.to_numeric(calendar.get('effect', 0.0), errors='coerce').fillna(0.0)
+    return calendar[['name', 'start', 'end', 'effect']]
+
+
+PROMOTION_CALENDAR = load_promotions()
+
+
+def promotion_days(dates, calendar=PROMOTION_CALENDAR):
+    # Sorted-search join of days to promotion windows: (day position,
+    # promotion position) for every day inside a window. Windows may overlap;
+    # nothing loops over days.
+    days = pd.DatetimeIndex(dates).normalize().to_numpy()
+    order = np.argsort(days, kind='stable')
+    lo = np.searchsorted(days[order], calendar['start'].to_numpy(dtype=days.dtype), side='left')
+    hi = np.searchsorted(days[order], calendar['end'].to_numpy(dtype=days.dtype), side='right')
+    lengths = hi - lo
+    promotion = np.repeat(np.arange(len(calendar)), lengths)
+    within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return order[np.repeat(lo, lengths) + within], promotion
+
+
+def promotion_on(dates, calendar=PROMOTION_CALENDAR):
+    # Promotion running on each day (the later-listed one where windows
+    # overlap), else NO_PROMOTION
+    day, promotion = promotion_days(dates, calendar)
+    latest = np.full(len(dates), -1)
+    np.maximum.at(latest, day, promotion)
+    names = np.append(calendar['name'].to_numpy(dtype=object), NO_PROMOTION)
+    return names[latest]
+
+
+def in_promotion(dates, calendar=PROMOTION_CALENDAR):
+    return np.bincount(promotion_days(dates, calendar)[0], minlength=len(dates)) > 0
+
+
+def promotion_effects(dates, calendar=PROMOTION_CALENDAR):
+    # Summed effect of the promotions running on each day
+    day, promotion = promotion_days(dates, calendar)
+    return np.bincount(day, weights=calendar['effect'].to_numpy()[promotion], minlength=len(dates))
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from bootstrap import SCORE_LEVELS
+from data import ALL_STORES
+
+QUANTILES = [0.1, 0.5, 0.9]
+
+
+def merge_histograms(index, counts, by):
+    # Sketches are score histograms, so merging is a sum over the rows that
+    # share `by`; cost depends on the number of sketches, not responses
+    merged = pd.DataFrame(counts).groupby([index[col] for col in by], sort=True, observed=True).sum()
+    return merged.index.to_frame(index=False), merged.to_numpy(dtype=np.int64)
+
+
+def histogram_quantiles(counts, quantiles=QUANTILES):
+    # Quantiles of 0-10 scores from their histograms, interpolated within the
+    # score's unit interval [s - 0.5, s + 0.5] so bands move smoothly rather
+    # than jumping between whole scores. Rows with no responses give NaN.
+    counts = np.asarray(counts, dtype=np.float64)
+    cumulative = counts.cumsum(axis=1)
+    total = cumulative[:, -1]
+    rows = np.arange(len(counts))
+    result = np.full((len(counts), len(quantiles)), np.nan)
+    for j, q in enumerate(quantiles):
+        rank = q * total
+        level = np.minimum((cumulative < rank[:, None]).sum(axis=1), SCORE_LEVELS - 1)
+        below = cumulative[rows, level] - counts[rows, level]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            within = (rank - below) / counts[rows, level]
+        result[:, j] = np.clip(level - 0.5 + within, 0, SCORE_LEVELS - 1)
+    result[total == 0] = np.nan
+    return result
+
+
+def percentile_table(index, counts, by, quantiles=QUANTILES):
+    # Merge to the requested grain and attach p10/p50/p90-style columns
+    merged_index, merged_counts = merge_histograms(index, counts, by)
+    values = histogram_quantiles(merged_counts, quantiles)
+    for j, q in enumerate(quantiles):
+        merged_index[f"p{round(q * 100)}"] = values[:, j]
+    merged_index['responses'] = merged_counts.sum(axis=1)
+    return merged_index
+
+
+def percentile_rollups(index, counts, by, regions):
+    # Percentiles per store, per region and for all stores at the `by` grain,
+    # each merged from the same store-level sketches
+    store_region = {store: region for region, stores in regions.items() for store in stores}
+    index = index.assign(region=index['store'].map(store_region))
+    stores = percentile_table(index, counts, by + ['store']).rename(columns={'store': 'group'})
+    areas = percentile_table(index, counts, by + ['region']).rename(columns={'region': 'group'})
+    total = percentile_table(index, counts, by).assign(group=ALL_STORES)
+    return pd.concat([total.assign(level='All'), areas.assign(level='Region'), stores.assign(level='Store')],
+                     ignore_index=True)
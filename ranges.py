@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from bootstrap import SCORE_LEVELS
+from data import ALL_STORES
+
+FIELDS = ['responses', 'score_sum', 'square_sum']
+
+
+class RangeSums:
+    # Running totals of response count, score sum and sum of squared scores
+    # over a dense day axis, per metric and store (plus an 'All Stores' row).
+    # The totals of any date range are the difference of two prefix rows, so
+    # the mean and variance of a range cost the same for a week as for ten
+    # years, and many ranges are compared in one array lookup.
+    def __init__(self, index, counts, metrics, stores):
+        # index/counts: daily score histograms (date, metric, store)
+        self.metrics = {metric: i for i, metric in enumerate(metrics)}
+        self.stores = {store: i for i, store in enumerate(list(stores) + [ALL_STORES])}
+        dates = pd.to_datetime(index['date'])
+        self.first = dates.min().normalize() if len(dates) else pd.Timestamp('today').normalize()
+        days = ((dates - self.first).dt.days.to_numpy() if len(dates) else np.zeros(0, dtype=np.int64))
+        self.days = int(days.max()) + 1 if len(days) else 0
+
+        levels = np.arange(SCORE_LEVELS, dtype=np.float64)
+        counts = np.asarray(counts, dtype=np.float64)
+        values = np.column_stack([counts.sum(axis=1), counts @ levels, counts @ levels ** 2])
+        daily = np.zeros((len(FIELDS), len(self.metrics), len(self.stores), self.days))
+        metric = index['metric'].map(self.metrics).to_numpy()
+        store = index['store'].astype(str).map(self.stores).to_numpy()
+        known = ~(pd.isna(metric) | pd.isna(store))
+        for f in range(len(FIELDS)):
+            np.add.at(daily[f], (metric[known].astype(int), store[known].astype(int), days[known]), values[known, f])
+        daily[:, :, -1] = daily[:, :, :-1].sum(axis=2)
+        # prefix[..., d] holds the totals of days before day d
+        self.prefix = np.concatenate([np.zeros(daily.shape[:3] + (1,)), daily.cumsum(axis=3)], axis=3)
+
+    @property
+    def last(self):
+        return self.first + pd.Timedelta(days=max(self.days - 1, 0))
+
+    def _positions(self, dates, side):
+        # Day positions clipped to the data, end dates inclusive
+        offsets = (pd.DatetimeIndex(pd.to_datetime(dates)).normalize() - self.first).days.to_numpy()
+        return np.clip(offsets + (1 if side == 'end' else 0), 0, self.days)
+
+    def totals(self, starts, ends, metrics=None, stores=None):
+        # (field, metric, store, range) totals for ranges [starts[i], ends[i]]
+        metric_rows = list(self.metrics.values()) if metrics is None else [self.metrics[m] for m in metrics]
+        store_rows = list(self.stores.values()) if stores is None else [self.stores[s] for s in stores]
+        lo = self._positions(starts, 'start')
+        hi = np.maximum(self._positions(ends, 'end'), lo)
+        prefix = self.prefix[:, metric_rows][:, :, store_rows]
+        return prefix[..., hi] - prefix[..., lo]
+
+    def range_stats(self, starts, ends, metrics=None, stores=None):
+        # Long frame of responses, mean and variance per range, metric, store
+        metrics = list(self.metrics) if metrics is None else list(metrics)
+        stores = list(self.stores) if stores is None else list(stores)
+        n, total, squares = self.totals(starts, ends, metrics, stores)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / n
+            variance = (squares - total * mean) / (n - 1)
+        shape = n.shape
+        grid = np.indices(shape).reshape(len(shape), -1)
+        return pd.DataFrame({
+            'range': grid[2],
+            'metric': np.asarray(metrics, dtype=object)[grid[0]],
+            'store': np.asarray(stores, dtype=object)[grid[1]],
+            'responses': n.ravel().astype(np.int64),
+            'mean': mean.ravel(),
+            'variance': np.where(n > 1, variance, np.nan).ravel(),
+        })
+
+    def compare(self, range_a, range_b, metrics=None, stores=None):
+        # Range B against range A per metric and store, with Welch's z for
+        # the difference in means
+        stats = self.range_stats([range_a[0], range_b[0]], [range_a[1], range_b[1]], metrics, stores)
+        a = stats[stats['range'] == 0].drop(columns='range').reset_index(drop=True)
+        b = stats[stats['range'] == 1].drop(columns='range').reset_index(drop=True)
+        compared = a[['metric', 'store']].copy()
+        for name, side in [('a', a), ('b', b)]:
+            compared[f'responses_{name}'] = side['responses']
+            compared[f'mean_{name}'] = side['mean']
+            compared[f'std_{name}'] = np.sqrt(side['variance'])
+        compared['difference'] = b['mean'] - a['mean']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            compared['z'] = compared['difference'] / np.sqrt(a['variance'] / a['responses'] + b['variance'] / b['responses'])
+        return compared
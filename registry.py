@@ -0,0 +1,97 @@
+import json
+import os
+
+import numpy as np
+
+REGISTRY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics.json')
+BANDS = ['classification', 'risk', 'trend']
+
+
+def load_registry(path=None):
+    # Metrics, targets, stores, regions and classification thresholds; set
+    # DASHBOARD_METRICS_CONFIG to use another file with the same layout
+    path = path or os.environ.get('DASHBOARD_METRICS_CONFIG') or REGISTRY_FILE
+    with open(path, encoding='utf-8') as handle:
+        registry = json.load(handle)
+
+    names = [metric['name'] for metric in registry['metrics']]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: metric names must be unique")
+    for name in [registry['default_metric'], registry['timeline_metric']] + registry['outcome_metrics']:
+        if name not in names:
+            raise ValueError(f"{path}: '{name}' is not one of the configured metrics")
+    for key in BANDS:
+        bands = registry[key]
+        if len(bands['labels']) != len(bands['edges']) + 1 or sorted(bands['edges']) != bands['edges']:
+            raise ValueError(f"{path}: '{key}' needs ascending edges and one more label than edges")
+        if len(bands.get('colors', bands['labels'])) != len(bands['labels']):
+            raise ValueError(f"{path}: '{key}' needs one colour per label")
+        if not set(bands.get('ties', [])) <= {'above', 'below'} or \
+                len(bands.get('ties', bands['edges'])) != len(bands['edges']):
+            raise ValueError(f"{path}: '{key}' ties are 'above' or 'below', one per edge")
+    severity = registry['severity']
+    for key in ['colors', 'icons', 'failure_bins', 'score_bins']:
+        if len(severity[key]) != len(severity['labels']):
+            raise ValueError(f"{path}: severity '{key}' needs one entry per level")
+    for key in ['failure_bins', 'score_bins']:
+        if sorted(severity[key]) != severity[key]:
+            raise ValueError(f"{path}: severity '{key}' must be ascending")
+    if not registry['outcome_metrics'] or len(registry['outcome_metrics']) == len(names):
+        raise ValueError(f"{path}: 'outcome_metrics' needs at least one outcome and one other metric")
+    if len(registry['trend']['labels']) != 3:
+        raise ValueError(f"{path}: 'trend' has three bands: declining, stable, improving")
+    if set(registry['priority'][-1]) - {'icon', 'color'} != {'label', 'score'}:
+        raise ValueError(f"{path}: the last priority rule is the fallback and takes only label and score "
+                         f"(plus icon and color)")
+    return registry
+
+
+REGISTRY = load_registry()
+
+
+def band_index(values, bands):
+    # i for values above edges[i - 1] and below edges[i]. A value equal to
+    # an edge goes to the band below it, or above it where the band's
+    # `ties` says 'above' for that edge (trend: -0.1 and 0.1 are both
+    # Stable). Whole arrays are banded in one searchsorted pass.
+    values = np.asarray(values, dtype=float)
+    edges = np.asarray(bands['edges'], dtype=float)
+    index = np.digitize(values, edges, right=True)
+    above = edges[[tie == 'above' for tie in bands.get('ties', ['below'] * len(edges))]]
+    return index + np.isin(values, above)
+
+
+def band_labels(values, bands):
+    return np.asarray(bands['labels'], dtype=object)[band_index(values, bands)]
+
+
+def classify_scores(scores, targets, registry=REGISTRY):
+    # Excellent / Good / Needs Improvement from the gap to target
+    return band_labels(np.asarray(targets, dtype=float) - np.asarray(scores, dtype=float), registry['classification'])
+
+
+def risk_levels(gaps, registry=REGISTRY):
+    return band_labels(gaps, registry['risk'])
+
+
+def trend_labels(trends, registry=REGISTRY):
+    return band_labels(trends, registry['trend'])
+
+
+def priority_levels(gaps, trends, registry=REGISTRY):
+    # First matching rule wins; returns (labels, scores) arrays
+    gaps = np.asarray(gaps, dtype=float)
+    trends = np.asarray(trends, dtype=float)
+    *rules, fallback = registry['priority']
+    conditions = []
+    for rule in rules:
+        tests = []
+        if 'gap_above' in rule:
+            tests.append(gaps > rule['gap_above'])
+        if 'trend_below' in rule:
+            tests.append(trends < rule['trend_below'])
+        combine = np.logical_and if rule.get('combine', 'all') == 'all' else np.logical_or
+        conditions.append(combine.reduce(tests))
+    labels = np.select(conditions, [rule['label'] for rule in rules], default=fallback['label']).astype(object)
+    scores = np.select(conditions, [rule['score'] for rule in rules], default=fallback['score'])
+    return labels, scores
@@ -0,0 +1,126 @@
+import argparse
+import time
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+
+from backend import backend_from_env, monthly_figures
+from data import ALL_STORES, STORES, TARGETS, priority_matrix, score_history
+
+HEADER_FONT = Font(bold=True, color='FFFFFF')
+HEADER_FILL = PatternFill('solid', fgColor='1F77B4')
+# Excel's row limit per sheet, header included
+EXCEL_MAX_ROWS = 1048576
+
+MONTHLY_COLUMNS = {
+    'metric': 'Metric',
+    'period': 'Month',
+    'period_range': 'Period',
+    'total_days': 'Total Days',
+    'responses': 'Responses',
+    'average_score': 'Average Score',
+    'ci_lower': 'CI Lower (95%)',
+    'ci_upper': 'CI Upper (95%)',
+    'target': 'Target',
+    'performance_vs_target': 'Vs Target',
+    'days_below_target': 'Days Below Target',
+    'days_below_percentage': 'Days Below Target (%)',
+    'significantly_below_target': 'Significantly Below Target',
+}
+DAILY_COLUMNS = {
+    'date': 'Date',
+    'store': 'Store',
+    'metric': 'Metric',
+    'responses': 'Responses',
+    'average_score': 'Average Score',
+}
+EVENT_COLUMNS = {
+    'date': 'Date',
+    'day_of_week': 'Day',
+    'failed_metrics': 'Failed Metrics',
+    'failure_percentage': 'Failure %',
+    'severity': 'Severity',
+    'promotion': 'Promotion',
+    'source': 'Source',
+    'stores': 'Stores',
+    'anomaly_score': 'Anomaly Score',
+}
+
+
+def header_row(sheet, labels):
+    cells = []
+    for label in labels:
+        cell = WriteOnlyCell(sheet, value=label)
+        cell.font = HEADER_FONT
+        cell.fill = HEADER_FILL
+        cells.append(cell)
+    return cells
+
+
+def new_sheet(workbook, title, columns):
+    sheet = workbook.create_sheet(title=title)
+    sheet.freeze_panes = 'A2'
+    sheet.append(header_row(sheet, columns.values()))
+    return sheet
+
+
+def write_sheet(workbook, title, columns, chunks, decimals=3, max_rows=EXCEL_MAX_ROWS):
+    # Rows are appended chunk by chunk; a write-only sheet flushes them to disk
+    # as it goes, so memory stays flat however many chunks there are. Rows
+    # past Excel's limit continue on 'Title (2)', 'Title (3)' and so on.
+    # Returns rows written per sheet
+    written = {title[:31]: 0}
+    sheet = new_sheet(workbook, title[:31], columns)
+    for chunk in chunks:
+        chunk = chunk[list(columns)]
+        floats = chunk.select_dtypes('float').columns
+        chunk = chunk.assign(**{col: chunk[col].round(decimals) for col in floats})
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if written[sheet.title] == max_rows - 1:
+                suffix = f" ({len(written) + 1})"
+                sheet = new_sheet(workbook, title[:31 - len(suffix)] + suffix, columns)
+                written[sheet.title] = 0
+            sheet.append(row)
+            written[sheet.title] += 1
+    return written
+
+
+def build_report(path, backend=None, targets=TARGETS, chunk_size=50000):
+    # Writes the workbook and returns rows written per sheet
+    backend = backend_from_env() if backend is None else backend
+    monthly = monthly_figures(backend, targets)
+    monthly['performance_vs_target'] = monthly['average_score'] - monthly['target']
+    metric_order = {metric: i for i, metric in enumerate(targets)}
+    monthly = monthly.sort_values(['metric', 'first_date'], key=lambda col: col.map(metric_order) if col.name == 'metric' else col)
+    _, metric_scores = score_history(monthly)
+
+    workbook = Workbook(write_only=True)
+    written = write_sheet(workbook, 'Daily Scores', DAILY_COLUMNS, backend.iter_daily_scores(chunk_size))
+    written.update(write_sheet(workbook, 'Monthly Comparison', MONTHLY_COLUMNS,
+                               [monthly[monthly['store'] == ALL_STORES]]))
+    written.update(write_sheet(workbook, 'Events', EVENT_COLUMNS, [backend.events()]))
+    priority = priority_matrix(metric_scores, targets)
+    written.update(write_sheet(workbook, 'Priority Matrix', {col: col.replace('_', ' ') for col in priority},
+                               [priority]))
+    stores = [store for store in dict.fromkeys(STORES + sorted(monthly['store'].unique()))
+              if store != ALL_STORES and (monthly['store'] == store).any()]
+    for store in stores:
+        written.update(write_sheet(workbook, f'Store - {store}', MONTHLY_COLUMNS,
+                                   [monthly[monthly['store'] == store]]))
+    workbook.save(path)
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write the multi-sheet Excel report (respects DASHBOARD_DB)")
+    parser.add_argument('path', help="output .xlsx file")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="daily score rows fetched per batch")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    written = build_report(args.path, chunk_size=args.chunk_size)
+    for sheet, rows in written.items():
+        print(f"  {sheet}: {rows:,} rows")
+    print(f"Wrote {args.path} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,256 @@
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from http.cookies import SimpleCookie
+
+import numpy as np
+import pandas as pd
+
+DASHBOARD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard.py')
+AFFINITY_COOKIE = 'dashboard_worker'
+READ_SIZE = 2 ** 16
+
+
+def start_workers(count, first_port, env=None, quiet=False):
+    # One headless Streamlit process per port, listening on localhost only
+    output = subprocess.DEVNULL if quiet else None
+    return [subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', DASHBOARD_SCRIPT, '--server.port', str(first_port + i),
+         '--server.address', '127.0.0.1', '--server.headless', 'true', '--browser.gatherUsageStats', 'false'],
+        env=env, stdout=subprocess.DEVNULL, stderr=output
+    ) for i in range(count)]
+
+
+def stop_workers(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def wait_healthy(processes, ports, timeout=180):
+    deadline = time.monotonic() + timeout
+    for process, port in zip(processes, ports):
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"Worker on port {port} exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=2) as response:
+                    if response.status == 200:
+                        break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Worker on port {port} did not become healthy within {timeout}s")
+            time.sleep(0.5)
+
+
+class AffinityProxy:
+    # HTTP and WebSocket pass-through that pins each browser to one worker.
+    # Only the head of a connection's first request is read: a browser with
+    # the affinity cookie goes back to its worker, a new one goes to the
+    # least busy worker and gets the cookie on the first response. The rest
+    # of the connection is piped unchanged, so the session's websocket and
+    # media requests reach the process holding its session state.
+    def __init__(self, ports, host='127.0.0.1'):
+        self.ports = ports
+        self.host = host
+        self.active = [0] * len(ports)
+        self.served = [0] * len(ports)
+
+    def pick(self, head):
+        for line in head.split(b'\r\n')[1:]:
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'cookie':
+                cookie = SimpleCookie()
+                cookie.load(value.decode('latin-1'))
+                pinned = cookie.get(AFFINITY_COOKIE)
+                if pinned is not None and pinned.value.isdigit() and int(pinned.value) < len(self.ports):
+                    return int(pinned.value), True
+        return min(range(len(self.ports)), key=lambda i: (self.active[i], self.served[i])), False
+
+    async def handle(self, client_reader, client_writer):
+        try:
+            head = await client_reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+            client_writer.close()
+            return
+        worker, pinned = self.pick(head)
+        self.active[worker] += 1
+        self.served[worker] += 1
+        upstream_writer = None
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(self.host, self.ports[worker])
+            upstream_writer.write(head)
+            if not pinned:
+                response = await upstream_reader.readuntil(b'\r\n\r\n')
+                cookie = f"Set-Cookie: {AFFINITY_COOKIE}={worker}; Path=/; HttpOnly; SameSite=Lax\r\n\r\n"
+                client_writer.write(response[:-2] + cookie.encode('latin-1'))
+            await asyncio.gather(pipe(client_reader, upstream_writer), pipe(upstream_reader, client_writer))
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+            pass
+        finally:
+            self.active[worker] -= 1
+            for writer in (client_writer, upstream_writer):
+                if writer is not None:
+                    writer.close()
+
+
+async def pipe(reader, writer):
+    try:
+        while data := await reader.read(READ_SIZE):
+            writer.write(data)
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+def memory_mb(pid):
+    # Resident and proportional set size: PSS splits shared pages (such as a
+    # memory-mapped dataset) between the processes mapping them. Linux only.
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding='ascii') as handle:
+            fields = dict(line.split(':', 1) for line in handle if line.startswith(('Rss:', 'Pss:')))
+    except OSError:
+        return np.nan, np.nan
+    return tuple(int(fields[key].split()[0]) / 1024 for key in ('Rss', 'Pss'))
+
+
+async def run_session(port, reruns):
+    # One browser session through the proxy: load the page (which pins the
+    # session to a worker), then time full script runs over the app's
+    # websocket, as pressing R in the browser would
+    import websockets
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    def load_page():
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=60) as response:
+            return '; '.join(value.split(';')[0] for value in response.headers.get_all('Set-Cookie') or [])
+
+    cookie = await asyncio.to_thread(load_page)
+    times = []
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=['streamlit'],
+                                  additional_headers={'Cookie': cookie}, max_size=None) as websocket:
+        for _ in range(reruns):
+            message = BackMsg()
+            message.rerun_script.query_string = ''
+            message.rerun_script.page_script_hash = ''
+            started = time.perf_counter()
+            await websocket.send(message.SerializeToString())
+            while True:
+                reply = ForwardMsg()
+                reply.ParseFromString(await websocket.recv())
+                # Fragment runs (e.g. the loading poll) finish with status 3
+                if reply.WhichOneof('type') == 'script_finished' and reply.script_finished in (
+                        ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR):
+                    break
+            times.append(time.perf_counter() - started)
+    return times
+
+
+async def measure(workers, sessions, reruns, port, first_worker_port, env):
+    ports = [first_worker_port + i for i in range(workers)]
+    processes = start_workers(workers, first_worker_port, env, quiet=True)
+    try:
+        await asyncio.to_thread(wait_healthy, processes, ports)
+        proxy = AffinityProxy(ports)
+        server = await asyncio.start_server(proxy.handle, '127.0.0.1', port)
+        async with server:
+            # One session per worker first, so every process has loaded the
+            # data before the clock starts
+            await asyncio.gather(*[run_session(port, 1) for _ in range(workers)])
+            started = time.perf_counter()
+            times = await asyncio.gather(*[run_session(port, reruns) for _ in range(sessions)])
+            elapsed = time.perf_counter() - started
+        times = np.concatenate(times)
+        rss, pss = np.array([memory_mb(process.pid) for process in processes]).sum(axis=0)
+        return {
+            'workers': workers,
+            'sessions': sessions,
+            'runs': len(times),
+            'runs_per_second': len(times) / elapsed,
+            'p50_seconds': np.percentile(times, 50),
+            'p95_seconds': np.percentile(times, 95),
+            'rss_mb': rss,
+            'pss_mb': pss,
+            'rss_mb_per_worker': rss / workers,
+        }
+    finally:
+        stop_workers(processes)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the dashboard from several Streamlit processes behind a "
+                                                 "local reverse proxy with session affinity")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run = subparsers.add_parser('run', help="start the workers and the proxy")
+    run.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    run.add_argument('--port', type=int, default=8501, help="port the proxy listens on")
+    run.add_argument('--address', default='127.0.0.1', help="address the proxy listens on")
+    run.add_argument('--worker-port', type=int, default=8511, help="first worker port (localhost only)")
+    run.add_argument('--db', default=os.environ.get('DASHBOARD_DB'),
+                     help="dataset every worker opens (default: DASHBOARD_DB); an .arrow dataset is shared in memory")
+    bench = subparsers.add_parser('bench', help="measure rerun throughput and memory against the number of workers")
+    bench.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    bench.add_argument('--sessions', type=int, default=8, help="concurrent browser sessions")
+    bench.add_argument('--reruns', type=int, default=5, help="full script runs per session")
+    bench.add_argument('--port', type=int, default=8590)
+    bench.add_argument('--worker-port', type=int, default=8600)
+    bench.add_argument('--db', default=os.environ.get('DASHBOARD_DB'))
+    bench.add_argument('--output', help="also write the results to this CSV file")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.db:
+        # A missing file or driver (DuckDB for .duckdb and .arrow) fails here,
+        # once, instead of in every worker
+        from backend import open_backend
+        try:
+            open_backend(args.db)
+        except (RuntimeError, FileNotFoundError) as error:
+            parser.error(str(error))
+        env['DASHBOARD_DB'] = args.db
+    else:
+        env.pop('DASHBOARD_DB', None)
+
+    if args.command == 'run':
+        ports = [args.worker_port + i for i in range(args.workers)]
+        processes = start_workers(args.workers, args.worker_port, env)
+
+        async def serve():
+            server = await asyncio.start_server(AffinityProxy(ports).handle, args.address, args.port)
+            print(f"Serving {args.workers} worker(s) at http://{args.address}:{args.port}", flush=True)
+            async with server:
+                await server.serve_forever()
+
+        # Stopping the proxy (Ctrl+C or a service manager's SIGTERM) stops the workers
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            wait_healthy(processes, ports)
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop_workers(processes)
+    else:
+        # Full reruns render every tab; progressive loading would end a run
+        # before its data is drawn
+        env['DASHBOARD_PROGRESSIVE'] = '0'
+        rows = []
+        for workers in args.workers:
+            rows.append(asyncio.run(measure(workers, args.sessions, args.reruns, args.port, args.worker_port, env)))
+            print(f"{workers} worker(s): {rows[-1]['runs_per_second']:.2f} runs/s, "
+                  f"{rows[-1]['rss_mb']:.0f} MB RSS, {rows[-1]['pss_mb']:.0f} MB PSS", flush=True)
+        results = pd.DataFrame(rows)
+        print(results.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+        if args.output:
+            results.to_csv(args.output, index=False)
@@ -0,0 +1,247 @@
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+
+import plotly.offline
+
+DASHBOARD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard.py')
+TAB_NAMES = ['Daily Timeline', 'Monthly Comparison', 'Critical Events', 'Risk Analysis']
+
+PAGE_CSS = """
+    body { font-family: "Source Sans Pro", sans-serif; margin: 0 auto; max-width: 1200px; padding: 1rem 2rem; color: #31333f; }
+    nav { font-size: 0.9em; margin-bottom: 1rem; }
+    .tab { border-top: 1px solid #e6e6e6; margin-top: 2rem; }
+    .filters { display: flex; flex-wrap: wrap; gap: 0.5rem; margin: 0.5rem 0; }
+    .filter { background: #f0f2f6; border-radius: 1rem; padding: 0.2rem 0.8rem; font-size: 0.85em; }
+    .columns { display: flex; gap: 1rem; }
+    .column { flex: 1 1 0; min-width: 0; }
+    .metric-label { font-size: 0.85em; color: #666; }
+    .metric-value { font-size: 1.8em; }
+    .metric-delta { font-size: 0.85em; }
+    .alert { padding: 0.8rem 1rem; border-radius: 0.5rem; margin: 0.5rem 0; }
+    .alert-info { background: #e8f1fb; } .alert-success { background: #e6f4ea; }
+    .alert-warning { background: #fff8e1; } .alert-error { background: #fdecea; }
+    .caption { font-size: 0.85em; color: #666; }
+    details { border: 1px solid #e6e6e6; border-radius: 0.5rem; padding: 0.5rem 1rem; margin: 0.5rem 0; }
+    @media (max-width: 768px) { .columns { flex-direction: column; } }
+"""
+
+MARKDOWN_INLINE = [
+    (re.compile(r'\*\*(.+?)\*\*'), r'<strong>\1</strong>'),
+    (re.compile(r'(?<![\w*])\*(?!\s)(.+?)\*'), r'<em>\1</em>'),
+    (re.compile(r'`(.+?)`'), r'<code>\1</code>'),
+    (re.compile(r':(\w+)\[(.+?)\]'), r'<span style="color: \1">\2</span>'),
+]
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def snapshot_views():
+    # Default page plus the filter values executives open most; each view is
+    # a tab (None = all tabs) and the widget values to set before rendering
+    from backend import backend_from_env
+    from data import METRICS, STORES
+
+    backend = backend_from_env()
+
+    views = [{'slug': 'overview', 'title': "All tabs (default filters)", 'tab': None, 'widgets': {}}]
+    for month in backend.months():
+        views.append({'slug': f'daily-{slugify(month)}', 'title': f"Daily Timeline: {month}", 'tab': 0,
+                      'widgets': {'daily_month_filter': month}})
+    for metric in METRICS:
+        views.append({'slug': f'monthly-{slugify(metric)}', 'title': f"Monthly Comparison: {metric}", 'tab': 1,
+                      'widgets': {'metric_selector': metric}})
+    for store in STORES:
+        views.append({'slug': f'monthly-store-{slugify(store)}', 'title': f"Monthly Comparison: {store}", 'tab': 1,
+                      'widgets': {'store_selector': store}})
+    views.append({'slug': 'events-by-severity', 'title': "Critical Events: most severe first", 'tab': 2,
+                  'widgets': {'events_sort_enhanced': 'severity', 'events_order_enhanced': 'Descending'}})
+    views.append({'slug': 'events-high-risk', 'title': "Critical Events: failure rate 50%+", 'tab': 2,
+                  'widgets': {'failure_filter': 50, 'events_sort_enhanced': 'failure_percentage',
+                              'events_order_enhanced': 'Descending'}})
+    for metric in METRICS:
+        views.append({'slug': f'risk-{slugify(metric)}', 'title': f"Risk Analysis: {metric}", 'tab': 3,
+                      'widgets': {'risk_metric_selector': metric}})
+    return views
+
+
+def markdown_html(text):
+    # Enough Markdown for what the dashboard writes: headings, lists, emphasis
+    blocks, items = [], []
+    for line in escape(text).splitlines():
+        stripped = line.strip()
+        for pattern, replacement in MARKDOWN_INLINE:
+            stripped = pattern.sub(replacement, stripped)
+        if stripped.startswith(('- ', '* ')) or re.match(r'\d+\. ', stripped):
+            items.append(f"<li>{stripped.split(' ', 1)[1]}</li>")
+            continue
+        if items:
+            blocks.append(f"<ul>{''.join(items)}</ul>")
+            items = []
+        heading = re.match(r'(#{1,6}) (.*)', stripped)
+        if heading:
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{heading.group(2)}</h{level}>")
+        elif stripped == '---':
+            blocks.append("<hr>")
+        elif stripped:
+            blocks.append(f"<p>{stripped}</p>")
+    if items:
+        blocks.append(f"<ul>{''.join(items)}</ul>")
+    return ''.join(blocks)
+
+
+def render_node(node, charts):
+    # Static HTML for one element of the AppTest tree; charts are collected
+    # separately and drawn by plotly.js on load
+    kind = node.type
+    children = getattr(node, 'children', None)
+    if kind == 'plotly_chart':
+        chart_id = f"chart-{len(charts)}"
+        charts.append({'id': chart_id, 'spec': json.loads(node.proto.spec)})
+        return f'<div id="{chart_id}" class="chart"></div>'
+    if kind == 'markdown':
+        return node.value if node.proto.allow_html else markdown_html(node.value)
+    if kind in ('title', 'header', 'subheader'):
+        level = {'title': 1, 'header': 2, 'subheader': 3}[kind]
+        return f"<h{level}>{escape(node.value)}</h{level}>"
+    if kind == 'caption':
+        return f'<div class="caption">{markdown_html(node.value)}</div>'
+    if kind in ('info', 'success', 'warning', 'error'):
+        return f'<div class="alert alert-{kind}">{markdown_html(node.value)}</div>'
+    if kind == 'metric':
+        delta = f'<div class="metric-delta">{escape(node.delta)}</div>' if node.delta else ''
+        return (f'<div class="metric"><div class="metric-label">{escape(node.label)}</div>'
+                f'<div class="metric-value">{escape(node.value)}</div>{delta}</div>')
+    if kind == 'checkbox':
+        return f'<span class="filter">{"☑" if node.value else "☐"} {escape(node.label)}</span>'
+    if kind in ('selectbox', 'multiselect', 'slider', 'radio'):
+        value = ', '.join(map(str, node.value)) if isinstance(node.value, (list, tuple)) else node.value
+        return f'<span class="filter">{escape(node.label)} {escape(str(value))}</span>'
+    if kind == 'dataframe':
+        return node.value.to_html(index=False, border=0)
+    if children is None:
+        return ''
+
+    inner = [render_node(child, charts) for child in children.values()]
+    if kind == 'expander':
+        return f"<details><summary>{escape(node.label)}</summary>{''.join(inner)}</details>"
+    if kind == 'column':
+        return f'<div class="column">{"".join(inner)}</div>'
+    if kind == 'flex_container' and children and all(child.type == 'column' for child in children.values()):
+        return f'<div class="columns">{"".join(inner)}</div>'
+    return ''.join(inner)
+
+
+def render_view(view):
+    # Runs the dashboard script headlessly with the view's widget values, so
+    # the snapshot comes from exactly the code the live app runs
+    from streamlit.testing.v1 import AppTest
+
+    # Everything loads before the run returns, so no view is caught mid-load
+    os.environ['DASHBOARD_PROGRESSIVE'] = '0'
+    app = AppTest.from_file(DASHBOARD_SCRIPT, default_timeout=300)
+    # Keyed widgets take their initial value from session state
+    for key, value in view['widgets'].items():
+        app.session_state[key] = value
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"{view['slug']}: {app.exception[0].value}")
+
+    charts, sections = [], []
+    for node in app.main.children.values():
+        if node.type != 'tab_container':
+            sections.append(render_node(node, charts))
+            continue
+        for index, tab in enumerate(node.children.values()):
+            if view['tab'] is None or view['tab'] == index:
+                body = render_node(tab, charts)
+                sections.append(f'<section class="tab"><h2>{escape(tab.label)}</h2>{body}</section>')
+    return {'slug': view['slug'], 'title': view['title'], 'body': ''.join(sections), 'charts': charts}
+
+
+def page_html(title, body, charts=()):
+    scripts = ''.join(
+        f"Plotly.newPlot('{chart['id']}', specs[{i}].data, specs[{i}].layout, {{responsive: true}});"
+        for i, chart in enumerate(charts)
+    )
+    specs = json.dumps([chart['spec'] for chart in charts]).replace('</', '<\\/')
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{escape(title)}</title><style>{PAGE_CSS}</style><script src="plotly.min.js"></script></head>
+<body><nav><a href="index.html">All views</a></nav>{body}
+<script>const specs = {specs};{scripts}</script></body></html>
+"""
+
+
+def export_snapshot(output_dir, workers=None, views=None):
+    views = snapshot_views() if views is None else views
+    os.makedirs(os.path.join(output_dir, 'data'), exist_ok=True)
+    with open(os.path.join(output_dir, 'plotly.min.js'), 'w', encoding='utf-8') as handle:
+        handle.write(plotly.offline.get_plotlyjs())
+
+    # Spawned (not forked) workers: each starts a clean Streamlit runtime and
+    # keeps its cached backend across the views it renders
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        rendered = list(pool.map(render_view, views))
+
+    generated = time.strftime('%Y-%m-%d %H:%M')
+    manifest = []
+    for view, page in zip(views, rendered):
+        with open(os.path.join(output_dir, f"{page['slug']}.html"), 'w', encoding='utf-8') as handle:
+            handle.write(page_html(page['title'], page['body'], page['charts']))
+        with open(os.path.join(output_dir, 'data', f"{page['slug']}.json"), 'w', encoding='utf-8') as handle:
+            json.dump({'title': page['title'], 'widgets': view['widgets'],
+                       'charts': [chart['spec'] for chart in page['charts']]}, handle)
+        manifest.append({'slug': page['slug'], 'title': page['title'], 'tab': view['tab'], 'widgets': view['widgets'],
+                         'generated': generated})
+
+    # A partial export (--only) replaces its views in the existing manifest,
+    # so the index keeps linking every page already in the directory
+    views_path = os.path.join(output_dir, 'data', 'views.json')
+    merged = {}
+    if os.path.exists(views_path):
+        with open(views_path, encoding='utf-8') as handle:
+            for item in json.load(handle)['views']:
+                if os.path.exists(os.path.join(output_dir, f"{item['slug']}.html")):
+                    merged[item['slug']] = item
+    merged.update((item['slug'], item) for item in manifest)
+
+    links = []
+    for tab, name in [(None, "Overview")] + list(enumerate(TAB_NAMES)):
+        entries = ''.join(f'<li><a href="{item["slug"]}.html">{escape(item["title"])}</a></li>'
+                          for item in merged.values() if item['tab'] == tab)
+        links.append(f"<h3>{escape(name)}</h3><ul>{entries}</ul>")
+    index = f"<h1>City Furniture - Customer Satisfaction Snapshot</h1><p class=\"caption\">Generated {generated}</p>{''.join(links)}"
+    with open(os.path.join(output_dir, 'index.html'), 'w', encoding='utf-8') as handle:
+        handle.write(page_html("Customer Satisfaction Snapshot", index))
+    with open(views_path, 'w', encoding='utf-8') as handle:
+        json.dump({'generated': generated, 'views': list(merged.values())}, handle, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pre-render the dashboard's common views to static HTML/JSON")
+    parser.add_argument('output_dir')
+    parser.add_argument('--workers', type=int, default=None, help="parallel render processes (default: CPU count)")
+    parser.add_argument('--only', help="comma-separated view slugs to render")
+    args = parser.parse_args()
+
+    # Run through the importable module: AppTest rebinds __main__ in the
+    # workers, so pickled references to __main__.render_view would not resolve
+    import snapshot
+
+    views = snapshot.snapshot_views()
+    if args.only:
+        wanted = set(args.only.split(','))
+        views = [view for view in views if view['slug'] in wanted]
+    started = time.perf_counter()
+    manifest = snapshot.export_snapshot(args.output_dir, workers=args.workers, views=views)
+    print(f"Rendered {len(manifest)} views to {args.output_dir} in {time.perf_counter() - started:.1f}s")
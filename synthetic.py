@@ -0,0 +1,169 @@
+import argparse
+import collections
+import functools
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from data import (DEFAULT_BASELINE, EFFECT_SCALE, END_DATE, INCIDENTS, METRICS, MONTHLY_BASELINES, STORES, WEEKEND_EFFECT,
+                  draw_scores)
+from promotions import PROMOTION_CALENDAR, promotion_effects
+
+# Days drawn from one seeded stream. Blocks are independent, so the output
+# for a seed is the same whatever the chunk size or number of workers.
+BLOCK_DAYS = 7
+# Survey period baseline used for each month of the year: the May-June
+# figures stand in for the first half, September's for the last quarter
+SEASON = np.array([0, 0, 0, 0, 0, 0, 1, 2, 3, 3, 3, 3])
+CHUNK_ROWS = 1_000_000
+
+
+def store_names(count):
+    # The configured stores first, then numbered ones; the dashboard only
+    # accepts stores listed in metrics.json
+    extra = [f"Store {i:03d}" for i in range(len(STORES) + 1, count + 1)]
+    return (list(STORES) + extra)[:count]
+
+
+def every_year(start, end):
+    # Promotion windows and incidents repeated on the same dates each year
+    shifts = range(start.year - END_DATE.year - 1, end.year - END_DATE.year + 1)
+    calendar = pd.concat([PROMOTION_CALENDAR.assign(start=PROMOTION_CALENDAR['start'] + pd.DateOffset(years=k),
+                                                    end=PROMOTION_CALENDAR['end'] + pd.DateOffset(years=k))
+                          for k in shifts], ignore_index=True)
+    incidents = [(pd.Timestamp(incident['date']) + pd.DateOffset(years=k), incident['effect'])
+                 for k in shifts for incident in INCIDENTS]
+    return calendar, incidents
+
+
+def model(start, end, stores, responses_per_day=40, seed=42, weekend_effect=WEEKEND_EFFECT, promotions=True,
+          incidents_per_year=0.0):
+    # Everything shared by the blocks: day effects, store offsets and the
+    # seasonal baselines. Random incidents are extra one-day dips anywhere
+    # in the range, on top of the repeated ones.
+    dates = pd.date_range(start, end, freq='D')
+    rng = np.random.default_rng(seed)
+    calendar, incidents = every_year(dates[0], dates[-1])
+    effects = np.where(dates.weekday >= 5, weekend_effect, 0.0)
+    if promotions:
+        effects = effects + promotion_effects(dates, calendar)
+    positions = np.array([(day - dates[0]).days for day, _ in incidents], dtype=np.int64)
+    inside = (positions >= 0) & (positions < len(dates))
+    np.add.at(effects, positions[inside], np.array([effect for _, effect in incidents])[inside])
+    random_days = rng.integers(0, len(dates), rng.poisson(incidents_per_year * len(dates) / 365.25))
+    np.add.at(effects, random_days, rng.uniform(-2.5, -1.5, len(random_days)))
+    return {
+        'start': dates[0],
+        'days': len(dates),
+        'stores': list(stores),
+        'responses_per_day': responses_per_day,
+        'seed': seed,
+        'effects': effects,
+        'store_offsets': rng.normal(0, 0.05, len(stores)),
+        'baselines': np.array([MONTHLY_BASELINES.get(m, DEFAULT_BASELINE) for m in METRICS]).T,  # period x metric
+    }
+
+
+def generate_block(config, block):
+    # Responses for days [block * BLOCK_DAYS, (block + 1) * BLOCK_DAYS), from
+    # the block's own stream of the seed
+    rng = np.random.default_rng(np.random.SeedSequence(config['seed'], spawn_key=(block,)))
+    first = block * BLOCK_DAYS
+    dates = pd.date_range(config['start'] + pd.Timedelta(days=first), periods=min(BLOCK_DAYS, config['days'] - first))
+    stores = config['stores']
+    n_days, n_stores, n_metrics = len(dates), len(stores), len(METRICS)
+
+    mu = config['baselines'][SEASON[dates.month - 1]][:, None, :]
+    mu = mu + EFFECT_SCALE * config['effects'][first:first + n_days, None, None]
+    mu = mu + config['store_offsets'][None, :, None]
+    mu = mu + rng.normal(0, 0.12, (n_days, n_stores, 1))    # shared daily shock
+    mu = mu + rng.normal(0, 0.05, (n_days, n_stores, n_metrics))
+    mu = np.clip(mu, 1.0, 9.95)
+
+    counts = rng.poisson(config['responses_per_day'], n_days * n_stores)
+    cell, scores = draw_scores(mu.reshape(-1, n_metrics), counts, rng, dtype=np.float32)
+    responses = pd.DataFrame(scores, columns=METRICS)
+    responses.insert(0, 'store', pd.Categorical.from_codes(cell % n_stores, categories=stores))
+    responses.insert(0, 'date', dates[cell // n_stores])
+    return responses
+
+
+def generate(config, workers=1):
+    # Blocks in date order; with workers > 1 they are drawn in parallel.
+    # At most 2 × workers blocks are in flight or waiting to be written, so
+    # a slow writer does not pile every finished block up in memory
+    blocks = range(-(-config['days'] // BLOCK_DAYS))
+    draw = functools.partial(generate_block, config)
+    if workers <= 1:
+        yield from map(draw, blocks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window = collections.deque()
+        for block in blocks:
+            window.append(pool.submit(draw, block))
+            if len(window) >= 2 * workers:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def write(frames, path, chunk_rows=CHUNK_ROWS):
+    # Chunked Parquet (one row group per chunk) or CSV, chosen by extension;
+    # at most about `chunk_rows` rows are held at once
+    csv = path.endswith('.csv')
+    writer, pending, rows = None, [], 0
+    for frame in itertools.chain(frames, [None]):
+        if frame is not None:
+            pending.append(frame)
+            if sum(len(part) for part in pending) < chunk_rows:
+                continue
+        if not pending:
+            break
+        table = pa.Table.from_pandas(pd.concat(pending, ignore_index=True), preserve_index=False)
+        if csv:
+            table = table.set_column(0, 'date', table['date'].cast(pa.date32()))
+        if writer is None:
+            writer = pa_csv.CSVWriter(path, table.schema) if csv else pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+        rows += table.num_rows
+        pending = []
+    if writer is not None:
+        writer.close()
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write synthetic survey responses for load and scale tests")
+    parser.add_argument('path', help="output .parquet or .csv file")
+    parser.add_argument('--years', type=float, default=1.0, help="length of the history, ending on --end")
+    parser.add_argument('--end', default=END_DATE.strftime('%Y-%m-%d'))
+    parser.add_argument('--stores', type=int, default=len(STORES),
+                        help="number of stores; beyond the configured ones, add them to metrics.json to load them")
+    parser.add_argument('--responses-per-day', type=int, default=40, help="mean responses per store and day")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--weekend-effect', type=float, default=WEEKEND_EFFECT)
+    parser.add_argument('--no-promotions', action='store_true', help="leave out the promotion calendar effects")
+    parser.add_argument('--incidents-per-year', type=float, default=0.0,
+                        help="random one-day dips on top of the yearly incidents")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    if not args.path.endswith(('.parquet', '.csv')):
+        parser.error("path must end in .parquet or .csv")
+    end = pd.Timestamp(args.end)
+    start = end - pd.Timedelta(days=round(args.years * 365.25) - 1)
+    config = model(start, end, store_names(args.stores), args.responses_per_day, args.seed, args.weekend_effect,
+                   not args.no_promotions, args.incidents_per_year)
+    started = time.perf_counter()
+    rows = write(generate(config, args.workers), args.path, args.chunk_rows)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {rows:,} responses ({start:%Y-%m-%d} to {end:%Y-%m-%d}, {args.stores} stores) to {args.path} "
+          f"in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
@@ -0,0 +1,62 @@
+import json
+
+import pandas as pd
+
+from alerts import AlertEngine, FileSink
+
+
+class FailingSink:
+    name = 'webhook'
+
+    def send(self, alerts):
+        raise OSError("connection refused")
+
+
+class ListSink:
+    name = 'webhook'
+
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, alerts):
+        self.alerts.extend(alerts)
+
+
+def scores(date, score, store='Tamarac'):
+    return pd.DataFrame({'date': [pd.Timestamp(date)], 'store': store, 'metric': 'Site Design',
+                         'score_sum': [float(score) * 10], 'responses': [10.0]})
+
+
+def engine(tmp_path, sinks):
+    return AlertEngine(sinks, targets={'Site Design': 9.0}, stores=['Tamarac'], state_path=str(tmp_path / 'state.json'))
+
+
+def test_alerts_open_change_and_resolve(tmp_path):
+    alerts = engine(tmp_path, []).update([scores('2025-01-01', 8.0)])
+    assert sorted((alert['store'], alert['status']) for alert in alerts) == [('All Stores', 'open'), ('Tamarac', 'open')]
+    assert alerts[0]['gap'] == 1.0 and alerts[0]['risk'] == 'High Risk'
+
+    # A restarted engine remembers what was delivered
+    restarted = engine(tmp_path, [])
+    assert restarted.update([scores('2025-01-01', 8.0)]) == []
+    changed = restarted.update([scores('2025-02-01', 8.7)])
+    assert {alert['status'] for alert in changed} == {'changed'}
+    resolved = restarted.update([scores('2025-03-01', 12.0)])
+    assert {alert['status'] for alert in resolved} == {'resolved'}
+
+
+def test_failed_sink_keeps_its_queue_across_restarts(tmp_path):
+    output = tmp_path / 'alerts.jsonl'
+    first = engine(tmp_path, [FileSink(str(output)), FailingSink()])
+    assert len(first.update([scores('2025-01-01', 8.0)])) == 2
+    assert first.undelivered() == 2 and first.delivery_errors == 1
+    assert len(output.read_text().splitlines()) == 2
+
+    # The file sink is not sent the alerts again; the queued ones go out once
+    # the other sink accepts them
+    webhook = ListSink()
+    second = engine(tmp_path, [FileSink(str(output)), webhook])
+    assert second.update([scores('2025-01-01', 8.0)]) == []
+    assert len(webhook.alerts) == 2 and second.undelivered() == 0
+    assert len(output.read_text().splitlines()) == 2
+    assert json.loads((tmp_path / 'state.json').read_text())['pending'] == {}
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from anomaly import AnomalyMonitor, anomaly_events, severity_from_failure, severity_from_score
+
+
+def daily(values, metric='Site Design', store='Tamarac'):
+    dates = pd.date_range('2025-01-01', periods=len(values))
+    return pd.DataFrame({'date': dates, 'metric': metric, 'store': store, 'average_score': values})
+
+
+def test_severity_bounds_are_inclusive():
+    assert severity_from_failure([0, 49.9, 50, 75, 87.5, 100]).tolist() == [0, 0, 1, 2, 3, 3]
+    assert severity_from_score([0.99, 1.0, 1.5, 2.0, 3.0]).tolist() == [-1, 0, 1, 2, 3]
+
+
+def test_drop_after_warmup_is_flagged_and_does_not_move_the_baseline():
+    values = 9 + 0.1 * np.sin(np.arange(30))
+    values[25] = 6.0
+    monitor = AnomalyMonitor()
+    results = monitor.ingest(daily(values))
+    flagged = results.index[results['flagged']].tolist()
+    assert flagged == [25]
+    assert results.loc[25, 'direction'] == 'down'
+    assert abs(monitor.mean[0] - 9) < 0.1
+
+
+def test_no_flags_during_warmup():
+    values = np.full(10, 9.0)
+    values[5] = 2.0
+    assert not AnomalyMonitor(warmup=14).ingest(daily(values))['flagged'].any()
+
+
+def test_ingest_skips_days_already_seen():
+    frame = daily(np.full(20, 9.0))
+    monitor = AnomalyMonitor()
+    monitor.ingest(frame.iloc[:15])
+    assert len(monitor.ingest(frame)) == 5
+    assert monitor.n[0] == 20
+
+
+def test_events_need_two_failing_metrics():
+    results = pd.DataFrame({
+        'date': pd.to_datetime(['2025-01-01'] * 3 + ['2025-01-02']),
+        'metric': ['A', 'B', 'B', 'A'],
+        'store': ['Tamarac', 'Naples', 'Tamarac', 'Tamarac'],
+        'anomaly_score': [1.2, 2.5, 1.1, 3.0],
+        'flagged': True,
+        'direction': 'down',
+    })
+    events = anomaly_events(results, n_metrics=8)
+    assert events['date'].tolist() == [pd.Timestamp('2025-01-01')]
+    assert events.loc[0, 'failed_count'] == 2
+    assert events.loc[0, 'anomaly_score'] == 2.5
+    assert events.loc[0, 'stores'] == 'Naples, Tamarac'
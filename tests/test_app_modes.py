@@ -0,0 +1,85 @@
+import os
+import time
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from data import generate_responses
+
+DASHBOARD_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dashboard.py')
+
+
+@pytest.fixture
+def in_memory(monkeypatch, tmp_path):
+    # The in-memory backend, with nothing shared with other tests' backends
+    monkeypatch.delenv('DASHBOARD_DB', raising=False)
+    monkeypatch.setenv('DASHBOARD_WARM', '0')
+    monkeypatch.setenv('DASHBOARD_USAGE_FILE', str(tmp_path / 'usage.json'))
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    yield tmp_path
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def run(app):
+    app.run()
+    assert not app.exception, [exception.value for exception in app.exception]
+
+
+def skeletons(app):
+    return [block for block in app.markdown if 'class="skeleton"' in block.value]
+
+
+def test_progressive_loading_fills_in(in_memory, monkeypatch):
+    monkeypatch.delenv('DASHBOARD_PROGRESSIVE', raising=False)
+    monkeypatch.setenv('DASHBOARD_LOAD_WAIT_SECONDS', '0')
+    app = AppTest.from_file(DASHBOARD_SCRIPT, default_timeout=300)
+    # Placeholders are drawn while the data loads in the background and each
+    # tab waits for its own views, so one run ends with every view filled in
+    run(app)
+    assert not skeletons(app)
+    headers = [header.value for header in app.header]
+    assert "Daily Satisfaction Timeline" in headers and "Critical Events Analysis" in headers
+
+
+def test_live_batches_are_ingested(in_memory, monkeypatch):
+    drop, tail = in_memory / 'incoming', in_memory / 'tail.csv'
+    drop.mkdir()
+    monkeypatch.setenv('DASHBOARD_PROGRESSIVE', '0')
+    monkeypatch.setenv('DASHBOARD_LIVE_DIR', str(drop))
+    monkeypatch.setenv('DASHBOARD_LIVE_FILE', str(tail))
+    monkeypatch.setenv('DASHBOARD_REFRESH_SECONDS', '0.1')
+    monkeypatch.setenv('DASHBOARD_QUARANTINE_FILE', str(in_memory / 'quarantine.csv'))
+    app = AppTest.from_file(DASHBOARD_SCRIPT, default_timeout=300)
+    run(app)
+    assert "October 2025" not in app.selectbox(key="daily_month_filter").options
+    assert any("to September 30, 2025** | (" in block.value for block in app.markdown)
+
+    def poll():
+        # A dropped file is read once it has been seen unchanged for a poll
+        for _ in range(2):
+            time.sleep(0.2)
+            run(app)
+        return [caption.value for caption in app.sidebar.caption]
+
+    batch = generate_responses(start='2025-10-01', end='2025-10-02', seed=7).astype({'store': str})
+    batch.loc[batch.index[0], 'store'] = 'Miami'
+    batch[batch['date'] == '2025-10-01'].to_csv(drop / 'batch1.csv', index=False)
+    captions = poll()
+    assert "October 2025" in app.selectbox(key="daily_month_filter").options
+    assert any("1 rows quarantined: unknown_store" in caption for caption in captions)
+
+    batch[batch['date'] == '2025-10-02'].to_csv(tail, index=False)
+    captions = poll()
+    assert any(f"{len(batch) - 1:,} new responses" in caption for caption in captions)
+
+    # A day after a gap is reported
+    generate_responses(start='2025-10-05', end='2025-10-05', seed=8).to_csv(drop / 'batch2.csv', index=False)
+    captions = poll()
+    assert any("2 day(s) without responses" in caption for caption in captions)
+    # The header and footer follow the live data
+    assert any("to October 5, 2025**" in block.value for block in app.markdown)
+    today = time.strftime('%B')
+    assert any("Dashboard last updated: " + today in block.value for block in app.markdown)
@@ -0,0 +1,77 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import backend
+from backend import PandasBackend, SQLBackend, build_database
+from data import METRICS, TARGETS, generate_responses
+from promotions import PROMOTION_CALENDAR
+
+ENGINES = ['db', 'duckdb', 'arrow']
+
+
+@pytest.fixture(scope='module')
+def stores(tmp_path_factory):
+    # The same sample responses in memory and in each engine's store
+    responses = generate_responses(responses_per_day=4)
+    directory = tmp_path_factory.mktemp('stores')
+    paths = {}
+    for engine in ENGINES:
+        paths[engine] = str(directory / f"responses.{engine}")
+        build_database(paths[engine], responses)
+    return PandasBackend(responses), paths
+
+
+def sorted_frame(frame, keys):
+    return frame.sort_values(keys).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_sql_aggregates_match_memory(stores, engine):
+    memory, paths = stores
+    sql = SQLBackend(paths[engine])
+    keys = ['metric', 'period', 'store']
+    expected = sorted_frame(memory.monthly_summary(TARGETS), keys)
+    actual = sorted_frame(sql.monthly_summary(TARGETS), keys)
+    assert np.allclose(actual['average_score'], expected['average_score'])
+    keys = ['promotion', 'metric', 'store']
+    expected = sorted_frame(memory.promotion_uplift(PROMOTION_CALENDAR), keys)
+    actual = sorted_frame(sql.promotion_uplift(PROMOTION_CALENDAR), keys)
+    assert np.allclose(actual['uplift'], expected['uplift'])
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_events_sort_by_severity_rank(stores, engine):
+    memory, paths = stores
+    expected = memory.events(sort_by='severity', ascending=False)
+    actual = SQLBackend(paths[engine]).events(sort_by='severity', ascending=False)
+    assert actual['severity'].tolist() == expected['severity'].tolist()
+
+
+def test_quotes_in_names_are_bound_not_spliced(stores, monkeypatch, tmp_path):
+    _, paths = stores
+    path = str(tmp_path / 'quoted.db')
+    with sqlite3.connect(paths['db']) as source, sqlite3.connect(path) as target:
+        source.backup(target)
+        name = 'Site\'s "Design"'
+        target.execute(f'ALTER TABLE responses RENAME COLUMN "Site Design" TO "Site\'s ""Design"""')
+    monkeypatch.setattr(backend, 'ALL_STORES', "All 'Stores'")
+    monkeypatch.setattr(backend, 'METRICS', [name if metric == 'Site Design' else metric for metric in METRICS])
+    sql = SQLBackend(path)
+    index, counts = sql.score_histograms()
+    assert (index['metric'] == name).any() and counts.sum() > 0
+    assert (sql.monthly_summary(TARGETS)['store'] == "All 'Stores'").any()
+    assert (sql.promotion_uplift(PROMOTION_CALENDAR)['store'] == "All 'Stores'").any()
+
+
+def test_running_reader_follows_a_rebuilt_arrow_dataset(tmp_path):
+    path = str(tmp_path / 'live.arrow')
+    build_database(path, generate_responses(end='2025-06-30', responses_per_day=2))
+    sql = SQLBackend(path)
+    before, months = sql.data_version(), sql.months()
+    histograms = sql.score_histograms()[1].sum()
+    build_database(path, generate_responses(end='2025-07-31', responses_per_day=2))
+    assert sql.data_version() != before
+    assert len(sql.months()) == len(months) + 1
+    assert sql.score_histograms()[1].sum() > histograms
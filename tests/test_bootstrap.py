@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from bootstrap import SCORE_LEVELS, bootstrap_means, confidence_intervals, score_histograms
+
+
+def test_histograms_count_scores_per_group():
+    responses = pd.DataFrame({'A': [10, 9, 9, 3.4], 'B': [0, 10, 10, 11]})
+    groups = pd.DataFrame({'store': ['x', 'y', 'y', 'x']})
+    index, counts = score_histograms(responses, ['A', 'B'], groups)
+    assert index.to_dict('list') == {'metric': ['A', 'A', 'B', 'B'], 'store': ['x', 'y', 'x', 'y']}
+    expected = np.zeros((4, SCORE_LEVELS), dtype=np.int64)
+    expected[0, [3, 10]] = 1      # 3.4 rounds to 3
+    expected[1, 9] = 2
+    expected[2, [0, 10]] = 1      # 11 is clipped to 10
+    expected[3, 10] = 2
+    assert np.array_equal(counts, expected)
+
+
+def test_bootstrap_is_seeded_and_independent_of_chunking():
+    counts = np.random.default_rng(0).integers(0, 20, (7, SCORE_LEVELS))
+    means = bootstrap_means(counts, n_boot=50, seed=3)
+    assert means.shape == (7, 50)
+    assert np.array_equal(means, bootstrap_means(counts, n_boot=50, seed=3, chunk_size=2))
+    point = counts @ np.arange(SCORE_LEVELS) / counts.sum(axis=1)
+    assert np.allclose(means.mean(axis=1), point, atol=0.3)
+
+
+def test_interval_flags_groups_clearly_below_target():
+    counts = np.zeros((2, SCORE_LEVELS), dtype=np.int64)
+    counts[0, 7] = 500
+    counts[1, [8, 10]] = 250
+    index = pd.DataFrame({'metric': ['A', 'A'], 'store': ['x', 'y']})
+    result = confidence_intervals(index, counts, {'A': 9.0}, n_boot=200)
+    assert result['average_score'].tolist() == [7.0, 9.0]
+    assert result['significantly_below_target'].tolist() == [True, False]
+    assert (result['ci_lower'] <= result['average_score']).all()
+    assert (result['ci_upper'] >= result['average_score']).all()
@@ -0,0 +1,148 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import streamlit as st
+
+import caches
+from caches import CacheBudget, object_bytes
+from warmup import CacheWarmer
+
+KB = 1024
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    st.cache_data.clear()
+    yield
+    st.cache_data.clear()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(caches, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def views(budget, **options):
+    # A view returning `kb` KB; calls records every computation
+    calls = []
+
+    @budget.cache_data(**options)
+    def view(kb, label='view'):
+        calls.append((kb, label))
+        return np.zeros(kb * KB // 8)
+
+    return view, calls
+
+
+def cached_args(budget):
+    return [args for _, args in budget.entries]
+
+
+def test_least_recently_used_entries_leave_first():
+    budget = CacheBudget(budget_bytes=9 * KB)
+    view, calls = views(budget)
+    for kb in (3, 4, 2):
+        view(kb)
+    view(3)
+    # 3 + 4 + 2 + 5 KB is over the budget: 4 was used least recently, then 2
+    view(5)
+    assert cached_args(budget) == [(3, 'view'), (5, 'view')]
+    assert budget.stats['view'] == {'hits': 1, 'misses': 4, 'evictions': 2}
+    assert budget.total_bytes() <= 9 * KB
+    view(4)
+    assert calls[-1] == (4, 'view') and len(calls) == 5
+
+
+def test_the_entry_just_used_is_kept_over_budget():
+    budget = CacheBudget(budget_bytes=KB)
+    view, _ = views(budget)
+    view(2)
+    assert cached_args(budget) == [(2, 'view')] and budget.stats['view']['evictions'] == 0
+
+
+def test_budget_spans_every_cache():
+    budget = CacheBudget(budget_bytes=6 * KB)
+    first, _ = views(budget)
+
+    @budget.cache_data()
+    def other(kb):
+        return np.zeros(kb * KB // 8)
+
+    first(4)
+    other(4)
+    assert [name for name, _ in budget.entries] == ['other']
+    assert budget.report().set_index('cache').loc['view', 'evictions'] == 1
+
+
+def test_expired_entries_leave_the_books(clock):
+    budget = CacheBudget(budget_bytes=100 * KB)
+    view, _ = views(budget, ttl=60)
+    view(1)
+    clock.now += 30
+    view(2)
+    assert budget.resident(view, 1) and budget.resident(view, 2)
+    clock.now += 31
+    assert not budget.resident(view, 1) and budget.resident(view, 2)
+    assert cached_args(budget) == [(2, 'view')]
+
+
+def test_max_entries_are_mirrored():
+    budget = CacheBudget(budget_bytes=100 * KB)
+    view, _ = views(budget, max_entries=2)
+    for kb in (1, 2, 3):
+        view(kb)
+    assert cached_args(budget) == [(2, 'view'), (3, 'view')]
+
+
+def test_calls_share_an_entry_however_arguments_are_passed():
+    budget = CacheBudget(budget_bytes=100 * KB)
+    view, calls = views(budget)
+    view(1)
+    view(kb=1)
+    view(1, 'view')
+    assert len(calls) == 1 and len(budget.entries) == 1
+    assert budget.resident(view, 1) and budget.resident(view, kb=1, label='view')
+
+
+def test_background_threads_share_the_cache():
+    budget = CacheBudget(budget_bytes=100 * KB)
+    view, calls = views(budget)
+    thread = threading.Thread(target=view, args=(1,))
+    thread.start()
+    thread.join()
+    view(1)
+    assert len(calls) == 1 and budget.stats['view'] == {'hits': 1, 'misses': 1, 'evictions': 0}
+
+
+def test_clear_drops_the_books_and_the_cache():
+    budget = CacheBudget(budget_bytes=100 * KB)
+    view, calls = views(budget)
+    view(1)
+    view.clear()
+    assert budget.total_bytes() == 0 and not budget.resident(view, 1)
+    view(1)
+    assert len(calls) == 2
+
+
+def test_warmer_skips_cached_views_and_stops_at_the_shared_budget():
+    budget = CacheBudget(budget_bytes=10 * KB)
+    view, calls = views(budget)
+    view(4)
+    warmer = CacheWarmer(lambda version: [(view, (kb,)) for kb in (4, 6, 2, 1)], budget_bytes=2 ** 20,
+                         workers=2, cache_budget=budget)
+    warmer.schedule('v1')
+    for thread in threading.enumerate():
+        if thread.name == 'cache-warmer':
+            thread.join(5)
+    # 4 KB was cached already; after 6 KB the budget is full
+    assert calls == [(4, 'view'), (6, 'view')]
+    assert warmer.status['state'] == 'budget reached' and warmer.status['warmed'] == 2
+
+
+def test_shared_objects_are_counted_once():
+    array = np.zeros(KB)
+    assert object_bytes([array, array]) < object_bytes([array, np.zeros(KB)])
@@ -0,0 +1,28 @@
+from cards import CARD_CSS, card_grid, month_card, priority_card, skeleton
+from registry import REGISTRY
+
+
+def test_priority_cards_follow_the_registry_rules():
+    for rank, rule in enumerate(REGISTRY['priority']):
+        card = priority_card('Site Design', rule['label'], rule['score'], 9.1, 0.2, -0.05)
+        assert f'priority-{rank}' in card and rule['icon'] in card
+        assert f".priority-{rank} {{ border-left-color: {rule['color']}; }}" in CARD_CSS
+
+
+def test_unknown_priority_score_gets_the_plain_card():
+    card = priority_card('Site Design', 'Unranked', 99, 9.1, 0.2, -0.05)
+    assert 'class="card priority-card ' in card and '•' in card
+
+
+def test_card_text_is_escaped():
+    card = month_card('<June>', 'June 2025', 30, 'A & B', '9.10', '9.00', '9.20', 120, 3, 10.0,
+                      REGISTRY['classification']['labels'][-1], True)
+    assert '&lt;June&gt;' in card and 'A &amp; B' in card and 'month-card poor' in card
+    assert 'Significantly below target' in card
+    assert skeleton('<chart>').count('&lt;chart&gt;') == 1
+
+
+def test_card_grid_is_one_element():
+    grid = card_grid(['<div>a</div>', '<div>b</div>'], columns=2)
+    assert grid.startswith('<div class="card-grid"') and 'repeat(2,' in grid
+    assert grid.endswith('<div>a</div><div>b</div></div>')
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from cohorts import CohortMatrix
+
+
+def orders(rows):
+    return pd.DataFrame(rows, columns=['customer_id', 'date']).assign(date=lambda frame: pd.to_datetime(frame['date']))
+
+
+def test_retention_and_repeat_rate():
+    cohorts = CohortMatrix(first=pd.Timestamp('2025-01-01'))
+    cohorts.add(orders([(1, '2025-01-05'), (2, '2025-01-20'), (1, '2025-01-25')]))
+    cohorts.add(orders([(1, '2025-02-03'), (3, '2025-02-10'), (2, '2025-03-01'), (3, '2025-03-02')]))
+    retention = cohorts.retention()
+    assert retention['cohort'].tolist() == ['January 2025', 'February 2025', 'March 2025']
+    assert retention['customers'].tolist() == [2, 1, 0]
+    assert retention['Month 1'].tolist()[:2] == [0.5, 1.0]
+    assert retention['Month 2'][0] == 0.5 and np.isnan(retention['Month 2'][1])
+    repeat = cohorts.repeat_rate()
+    assert repeat['returning'].tolist() == [0, 1, 2]
+    assert repeat['repeat_rate'].tolist()[1:] == [0.5, 2 / 3]
+
+
+def test_late_order_moves_a_customer_to_an_earlier_cohort():
+    cohorts = CohortMatrix(first=pd.Timestamp('2025-01-01'))
+    cohorts.add(orders([(1, '2025-01-05'), (2, '2025-02-05')]))
+    before = cohorts.copy()
+    cohorts.add(orders([(2, '2025-01-30')]))
+    assert cohorts.retention()['customers'].tolist() == [2, 0]
+    assert before.retention()['customers'].tolist() == [1, 1]
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from comments import CommentIndex
+
+
+def comments(rows):
+    return pd.DataFrame(rows, columns=['date', 'store', 'comment']).assign(date=lambda frame: pd.to_datetime(frame['date']))
+
+
+def sample_index():
+    index = CommentIndex(first=pd.Timestamp('2025-06-01'))
+    index.add(comments([
+        ('2025-06-01', 'Tamarac', "Delivery was late"),
+        ('2025-06-02', 'Naples', "Great staff"),
+        ('2025-06-03', 'Tamarac', None),
+    ]))
+    index.add(comments([
+        ('2025-07-01', 'Naples', "Late delivery, rude staff"),
+        ('2025-07-02', 'Tamarac', "Deliveries always late"),
+    ]))
+    return index
+
+
+def test_blank_comments_are_skipped():
+    assert len(sample_index()) == 4
+
+
+def test_search_matches_all_words_newest_first():
+    total, found = sample_index().search("late delivery")
+    assert total == 2
+    assert found['comment'].tolist() == ["Late delivery, rude staff", "Delivery was late"]
+
+
+def test_prefix_and_store_filter():
+    index = sample_index()
+    total, found = index.search("deliver*", store='Tamarac')
+    assert total == 2
+    assert found['date'].tolist() == [pd.Timestamp('2025-07-02'), pd.Timestamp('2025-06-01')]
+    assert index.search("sofa")[0] == 0
+
+
+def test_segments_merge_without_losing_postings():
+    index = CommentIndex()
+    for day in range(20):
+        index.add(comments([(f'2025-06-{day + 1:02d}', 'Tamarac', f"late order {day}")]))
+    assert index.search("late", limit=5)[0] == 20
+    assert len(index.search("late", limit=5)[1]) == 5
+
+
+def test_theme_counts_per_period_and_store():
+    counts = sample_index().theme_counts({'Overall': {'Delivery': ['delivery', 'deliveries'], 'Staff': ['staff']}})
+    delivery = counts[(counts['theme'] == 'Delivery')].set_index(['period', 'store'])['mentions'].to_dict()
+    assert delivery == {('June 2025', 'Tamarac'): 1, ('June 2025', 'Naples'): 0,
+                        ('July 2025', 'Tamarac'): 1, ('July 2025', 'Naples'): 1}
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from cube import CalendarCube, calendar_cells
+
+
+def scores(dates, values):
+    return pd.DataFrame({'date': pd.to_datetime(dates), 'metric': 'A', 'store': 'x',
+                         'score_sum': np.asarray(values, dtype=float), 'responses': 1.0})
+
+
+def test_week_one_of_different_years_stays_apart():
+    cube = CalendarCube(['A'])
+    cube.add(calendar_cells(scores(['2024-01-01', '2025-01-01', '2025-12-29'], [8, 9, 10]), {'A': 9.5}))
+    weeks, grid = cube.average_grid('A')
+    assert weeks == ['2024-W01', '2025-W01', '2026-W01']
+    assert grid[0, 0] == 8 and grid[1, 2] == 9 and grid[2, 0] == 10
+
+
+def test_month_slice_and_failure_rate():
+    cube = CalendarCube(['A'])
+    cube.add(calendar_cells(scores(['2025-03-03', '2025-03-10', '2025-04-07'], [8, 10, 9]), {'A': 9.0}))
+    weeks, grid = cube.average_grid('A', 'March 2025')
+    assert weeks == ['2025-W10', '2025-W11']
+    assert grid[:, 0].tolist() == [8, 10]
+    assert np.isnan(grid[:, 1:]).all()
+    # Mondays: one of three days below target
+    assert np.isclose(cube.weekday_failure_rate()[0], 100 / 3)
+
+
+def test_subtracting_cells_undoes_them():
+    cells = calendar_cells(scores(['2025-03-03'], [8]), {'A': 9.0})
+    cube = CalendarCube(['A'])
+    cube.add(cells)
+    copy = cube.copy()
+    copy.add(cells, sign=-1)
+    assert not any(block.any() for block in copy.blocks.values())
+    assert all(block.any() for block in cube.blocks.values())
+
+
+def test_appends_replace_only_the_blocks_they_touch():
+    cube = CalendarCube(['A'])
+    cube.add(calendar_cells(scores(pd.date_range('2020-01-01', '2025-03-02'), 9), {'A': 9.0}))
+    copy = cube.copy()
+    copy.add(calendar_cells(scores(['2025-03-03'], [8]), {'A': 9.0}))
+    shared = [key for key in cube.blocks if copy.blocks[key] is cube.blocks[key]]
+    assert len(shared) == len(cube.blocks) - 1
+    # Storage grows with the weeks of history, not with months x weeks
+    assert sum(block.shape[2] for block in cube.blocks.values()) < 2 * 52 * 6
+    assert copy.average_grid('A', 'March 2025')[1][1, 0] == 8
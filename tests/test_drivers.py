@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from drivers import DriverMoments
+
+METRICS = ['outcome', 'a', 'b']
+
+
+def responses(seed=0, n=400):
+    rng = np.random.default_rng(seed)
+    a, b = rng.normal(size=n), rng.normal(size=n)
+    return pd.DataFrame({
+        'date': pd.to_datetime('2025-01-01') + pd.to_timedelta(rng.integers(0, 5, n), unit='D'),
+        'store': rng.choice(['x', 'y'], n),
+        'outcome': 2 * a + b + 0.1 * rng.normal(size=n),
+        'a': a,
+        'b': b,
+    })
+
+
+def test_merged_moments_match_a_direct_computation():
+    frame = responses()
+    moments = DriverMoments(METRICS)
+    moments.add(frame.iloc[:150])
+    moments.add(frame.iloc[150:])
+    n, mean, comoment = moments.summary(stores=['x'])
+    subset = frame[frame['store'] == 'x'][METRICS].to_numpy()
+    assert n == len(subset)
+    assert np.allclose(mean, subset.mean(axis=0))
+    assert np.allclose(comoment, np.cov(subset, rowvar=False) * (len(subset) - 1))
+
+
+def test_drivers_rank_the_stronger_driver_first():
+    moments = DriverMoments(METRICS)
+    moments.add(responses())
+    table = moments.drivers('outcome', ['a', 'b'])
+    assert table['driver'].tolist() == ['a', 'b']
+    assert table.attrs['r_squared'] > 0.99
+    assert np.isclose(table['share'].sum(), table.attrs['r_squared'])
+
+
+def test_frame_round_trip():
+    moments = DriverMoments(METRICS)
+    moments.add(responses())
+    restored = DriverMoments.from_frame(moments.to_frame(), METRICS)
+    assert np.allclose(restored.comoment, moments.comoment)
+    assert np.allclose(restored.mean, moments.mean)
+
+
+def test_too_few_responses_give_no_betas():
+    moments = DriverMoments(METRICS)
+    moments.add(responses(n=3))
+    assert moments.drivers('outcome', ['a', 'b'])['beta'].isna().all()
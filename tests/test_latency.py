@@ -0,0 +1,118 @@
+import os
+import time
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from backend import build_database
+from comments import generate_comments
+from data import generate_orders, generate_responses
+
+DASHBOARD_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dashboard.py')
+
+# Dataset size: ~500k responses by default. LATENCY_BUDGET_SCALE stretches
+# the time budgets on slower machines.
+RESPONSES_PER_DAY = int(os.environ.get('LATENCY_RESPONSES_PER_DAY', 1000))
+BUDGET_SCALE = float(os.environ.get('LATENCY_BUDGET_SCALE', 1))
+
+# Seconds and chart KB allowed for one rerun of each view. Every rerun
+# redraws all four tabs, with the views for the new value not yet cached
+# and no background warming (about 1s and 40-60 KB when this was written).
+BUDGETS = {
+    'first load': (60, 100),
+    'daily month': (2.5, 80),
+    'percentile band': (2.5, 80),
+    'calendar metric': (2.5, 80),
+    'monthly metric': (2.5, 80),
+    'monthly store': (2.5, 80),
+    'range preset': (2.5, 80),
+    'failure threshold': (2.5, 80),
+    'severity filter': (2.5, 80),
+    'promotion filter': (2.5, 80),
+    'event sort': (2.5, 80),
+    'risk metric': (2.5, 80),
+    'driver filter': (2.5, 80),
+    'comment search': (2.5, 80),
+}
+
+
+@pytest.fixture(scope='module')
+def database(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('latency') / 'large.db')
+    responses = generate_responses(responses_per_day=RESPONSES_PER_DAY)
+    responses['comment'] = generate_comments(responses)
+    build_database(path, responses, generate_orders(new_customers_per_day=RESPONSES_PER_DAY))
+    return path
+
+
+@pytest.fixture
+def app(database, monkeypatch, tmp_path):
+    monkeypatch.setenv('DASHBOARD_DB', database)
+    monkeypatch.setenv('DASHBOARD_PAYLOAD_REPORT', '1')
+    monkeypatch.setenv('DASHBOARD_PROGRESSIVE', '0')
+    monkeypatch.setenv('DASHBOARD_WARM', '0')
+    monkeypatch.setenv('DASHBOARD_USAGE_FILE', str(tmp_path / 'usage.json'))
+    # Every test starts from cold views (the backend itself stays loaded)
+    st.cache_data.clear()
+    app = AppTest.from_file(DASHBOARD_SCRIPT, default_timeout=300)
+    timed_run(app, 'first load')
+    return app
+
+
+def timed_run(app, view):
+    # One rerun, checked against the view's time and payload budgets
+    app.session_state['chart_payload'] = {}
+    started = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - started
+    assert not app.exception, [exception.value for exception in app.exception]
+    payload_kb = sum(app.session_state['chart_payload'].values()) / 1024
+    seconds, kb = BUDGETS[view]
+    assert elapsed <= seconds * BUDGET_SCALE, f"{view}: rerun took {elapsed:.2f}s (budget {seconds * BUDGET_SCALE:g}s)"
+    assert payload_kb <= kb, f"{view}: charts sent {payload_kb:.0f} KB (budget {kb} KB)"
+
+
+def set_and_run(app, view, widget, value):
+    widget.set_value(value)
+    timed_run(app, view)
+
+
+def test_daily_timeline(app):
+    for month in app.selectbox(key='daily_month_filter').options[1:]:
+        set_and_run(app, 'daily month', app.selectbox(key='daily_month_filter'), month)
+    for grain in ['Week', 'Off']:
+        set_and_run(app, 'percentile band', app.radio(key='percentile_band'), grain)
+    for metric in app.selectbox(key='calendar_metric').options[1:3]:
+        set_and_run(app, 'calendar metric', app.selectbox(key='calendar_metric'), metric)
+
+
+def test_monthly_comparison(app):
+    for metric in app.selectbox(key='metric_selector').options:
+        set_and_run(app, 'monthly metric', app.selectbox(key='metric_selector'), metric)
+    for store in app.selectbox(key='store_selector').options[1:]:
+        set_and_run(app, 'monthly store', app.selectbox(key='store_selector'), store)
+    for preset in app.selectbox(key='range_preset').options[1:]:
+        set_and_run(app, 'range preset', app.selectbox(key='range_preset'), preset)
+
+
+def test_critical_events(app):
+    for threshold in [25, 50]:
+        set_and_run(app, 'failure threshold', app.slider(key='failure_filter'), threshold)
+    set_and_run(app, 'severity filter', app.multiselect(key='severity_filter_enhanced'), ['Critical', 'High'])
+    for promotion in app.selectbox(key='promotion_filter_enhanced').options[1:3]:
+        set_and_run(app, 'promotion filter', app.selectbox(key='promotion_filter_enhanced'), promotion)
+    for sort_by in ['failure_percentage', 'severity']:
+        set_and_run(app, 'event sort', app.selectbox(key='events_sort_enhanced'), sort_by)
+    set_and_run(app, 'event sort', app.radio(key='events_order_enhanced'), 'Descending')
+
+
+def test_risk_analysis(app):
+    for metric in app.selectbox(key='risk_metric_selector').options:
+        set_and_run(app, 'risk metric', app.selectbox(key='risk_metric_selector'), metric)
+    for outcome in app.selectbox(key='driver_outcome').options[1:]:
+        set_and_run(app, 'driver filter', app.selectbox(key='driver_outcome'), outcome)
+    set_and_run(app, 'driver filter', app.selectbox(key='driver_store'), app.selectbox(key='driver_store').options[1])
+    set_and_run(app, 'driver filter', app.selectbox(key='driver_period'), app.selectbox(key='driver_period').options[-1])
+    for query in ['hidden fees', 'deliver*']:
+        set_and_run(app, 'comment search', app.text_input(key='comment_search'), query)
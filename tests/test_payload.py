@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from payload import compact_array, compact_figure
+
+
+def test_mixed_customdata_keeps_column_types():
+    customdata = np.array([
+        [9.123456, True, 12, 'Tamarac'],
+        [8.987654, False, 7, 'Naples'],
+    ], dtype=object)
+    compact = compact_array(customdata)
+    assert compact == [
+        [9.123, True, 12, 'Tamarac'],
+        [8.988, False, 7, 'Naples'],
+    ]
+    # 1.0 == True, so compare the types as well
+    assert [type(value) for value in compact[0]] == [float, bool, int, str]
+
+
+def test_float_and_integer_arrays():
+    assert compact_array(np.array([1.23456, 2.5])) == [1.235, 2.5]
+    assert compact_array(np.array([1, 2, 3])) == [1, 2, 3]
+    long = compact_array(np.arange(20))
+    assert long.dtype == np.uint8 and long.tolist() == list(range(20))
+
+
+def test_compact_figure_rounds_points():
+    fig = compact_figure(go.Figure(go.Scatter(x=[0.123456, 1.0], y=[2.000001, 3.333333])))
+    assert list(fig.data[0].x) == [0.123, 1.0]
+    assert list(fig.data[0].y) == [2.0, 3.333]
+
+
+def test_long_float_arrays_are_float32():
+    values = np.linspace(0, 10, 40)
+    compact = compact_array(values)
+    assert compact.dtype == np.float32 and np.allclose(compact, values, atol=1e-5)
+    assert compact_array(values, binary=False) == np.round(values, 3).tolist()
+
+
+def test_hover_text_stays_json():
+    values = np.linspace(0, 10, 40)
+    fig = compact_figure(go.Figure(go.Scatter(x=values, y=values, text=values)))
+    spec = json.loads(pio.to_json(fig, validate=False))['data'][0]
+    assert spec['y']['dtype'] == 'f4'
+    assert [float(value) for value in spec['text']] == np.round(values, 3).tolist()
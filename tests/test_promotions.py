@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import build_events_df
+from promotions import NO_PROMOTION, PROMOTION_CALENDAR, in_promotion, load_promotions, promotion_effects, promotion_on
+
+CALENDAR = pd.DataFrame({'name': ['Sale', 'Flash'], 'start': pd.to_datetime(['2025-01-02', '2025-01-03']),
+                         'end': pd.to_datetime(['2025-01-04', '2025-01-03']), 'effect': [1.0, 0.5]})
+
+
+def test_days_match_inclusive_windows():
+    dates = pd.to_datetime(['2025-01-05', '2025-01-01', '2025-01-03', '2025-01-04', '2025-01-02'])
+    assert promotion_on(dates, CALENDAR).tolist() == [NO_PROMOTION, NO_PROMOTION, 'Flash', 'Sale', 'Sale']
+    assert in_promotion(dates, CALENDAR).tolist() == [False, False, True, True, True]
+    assert np.allclose(promotion_effects(dates, CALENDAR), [0, 0, 1.5, 1, 1])
+
+
+def test_calendar_rows_are_validated(tmp_path):
+    path = tmp_path / 'promotions.csv'
+    path.write_text("name,start,end\nSale,2025-01-05,2025-01-01\n")
+    with pytest.raises(ValueError, match="rows 2"):
+        load_promotions(str(path))
+
+
+def test_curated_events_follow_the_calendar():
+    anomalies = pd.DataFrame({'date': pd.to_datetime([]), 'metric': [], 'store': [], 'direction': [],
+                              'anomaly_score': [], 'flagged': np.array([], dtype=bool)})
+    events = build_events_df(anomalies)
+    assert (events['promotion'] == promotion_on(events['date'])).all()
+    assert ((events['promotion'] != NO_PROMOTION) == in_promotion(events['date'], PROMOTION_CALENDAR)).all()
+    labels = events.set_index('date')['promotion']
+    assert labels[pd.Timestamp('2025-07-20')] == 'Summer Clearance 20% OFF'
+    assert labels[pd.Timestamp('2025-09-15')] == 'Fall Collection Launch'
+    assert labels[pd.Timestamp('2025-09-22')] == NO_PROMOTION
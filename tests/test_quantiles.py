@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from bootstrap import SCORE_LEVELS
+from quantiles import histogram_quantiles, merge_histograms, percentile_rollups
+
+
+def test_quantiles_interpolate_within_a_score():
+    counts = np.zeros((3, SCORE_LEVELS))
+    counts[0, 8] = 10                  # every response is an 8
+    counts[1, [6, 10]] = 5             # half 6, half 10
+    result = histogram_quantiles(counts, [0.1, 0.5, 0.9])
+    assert np.allclose(result[0], [7.6, 8.0, 8.4])
+    assert np.isclose(result[1, 1], 6.5)
+    assert np.isnan(result[2]).all()   # no responses
+
+
+def test_merge_sums_rows_sharing_the_key():
+    index = pd.DataFrame({'metric': ['A', 'A', 'B'], 'store': ['x', 'y', 'x']})
+    counts = np.arange(3 * SCORE_LEVELS).reshape(3, SCORE_LEVELS)
+    merged_index, merged = merge_histograms(index, counts, ['metric'])
+    assert merged_index['metric'].tolist() == ['A', 'B']
+    assert np.array_equal(merged, [counts[0] + counts[1], counts[2]])
+
+
+def test_rollups_cover_all_stores_regions_and_stores():
+    index = pd.DataFrame({'metric': 'A', 'store': ['x', 'y', 'z']})
+    counts = np.zeros((3, SCORE_LEVELS), dtype=np.int64)
+    counts[:, 9] = [1, 2, 3]
+    rollups = percentile_rollups(index, counts, ['metric'], {'North': ['x', 'y'], 'South': ['z']})
+    responses = dict(zip(rollups['level'] + ':' + rollups['group'], rollups['responses']))
+    assert responses == {'All:All Stores': 6, 'Region:North': 3, 'Region:South': 3,
+                         'Store:x': 1, 'Store:y': 2, 'Store:z': 3}
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from bootstrap import SCORE_LEVELS
+from ranges import RangeSums
+
+
+def histograms():
+    # Store x scores 8 on day 0 and 10 on day 2; store y scores 6 on day 1
+    index = pd.DataFrame({'date': pd.to_datetime(['2025-01-01', '2025-01-03', '2025-01-02']),
+                          'metric': 'A', 'store': ['x', 'x', 'y']})
+    counts = np.zeros((3, SCORE_LEVELS), dtype=np.int64)
+    counts[0, 8] = 2
+    counts[1, 10] = 2
+    counts[2, 6] = 1
+    return index, counts
+
+
+def test_range_stats_match_the_responses():
+    sums = RangeSums(*histograms(), ['A'], ['x', 'y'])
+    stats = sums.range_stats(['2025-01-01'], ['2025-01-03']).set_index('store')
+    assert stats.loc['x', 'responses'] == 4 and stats.loc['x', 'mean'] == 9
+    assert np.isclose(stats.loc['x', 'variance'], np.var([8, 8, 10, 10], ddof=1))
+    assert stats.loc['All Stores', 'responses'] == 5
+    assert np.isnan(stats.loc['y', 'variance'])
+
+
+def test_end_dates_are_inclusive_and_clipped():
+    sums = RangeSums(*histograms(), ['A'], ['x', 'y'])
+    n = sums.totals(['2024-12-01', '2025-01-02', '2025-01-03'], ['2025-01-01', '2025-01-02', '2026-01-01'],
+                    stores=['All Stores'])[0, 0, 0]
+    assert n.tolist() == [2, 1, 2]
+    assert sums.last == pd.Timestamp('2025-01-03')
+
+
+def test_compare_two_ranges():
+    compared = RangeSums(*histograms(), ['A'], ['x', 'y']).compare(
+        ('2025-01-01', '2025-01-01'), ('2025-01-03', '2025-01-03'), stores=['x'])
+    assert compared.loc[0, 'mean_a'] == 8 and compared.loc[0, 'mean_b'] == 10
+    assert compared.loc[0, 'difference'] == 2
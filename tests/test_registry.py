@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from registry import REGISTRY, band_index, classify_scores, load_registry, priority_levels, risk_levels, trend_labels
+
+
+def test_trend_edges_are_stable():
+    # Improving above 0.1, declining below -0.1; both edges are stable
+    labels = trend_labels([-0.11, -0.1, 0.0, 0.1, 0.11])
+    assert labels.tolist() == ['Declining', 'Stable', 'Stable', 'Stable', 'Improving']
+
+
+def test_gap_edges_fall_in_the_lower_band():
+    assert risk_levels([0.2, 0.21, 0.5, 0.51]).tolist() == ['Low Risk', 'Medium Risk', 'Medium Risk', 'High Risk']
+    assert classify_scores([9.0, 8.5, 8.49], [9.0, 9.0, 9.0]).tolist() == ['Excellent', 'Good', 'Needs Improvement']
+
+
+def test_ties_above_move_only_their_edge():
+    bands = {'edges': [1.0, 2.0], 'labels': ['a', 'b', 'c'], 'ties': ['below', 'above']}
+    assert band_index([1.0, 1.5, 2.0, 2.5], bands).tolist() == [0, 1, 2, 2]
+
+
+def test_priority_rules_in_order():
+    labels, scores = priority_levels([0.6, 0.4, 0.0, 0.0], [-0.2, 0.0, -0.15, 0.0])
+    assert scores.tolist() == [4, 3, 2, 1]
+    assert labels[-1] == REGISTRY['priority'][-1]['label']
+
+
+def test_invalid_ties_are_rejected(tmp_path):
+    registry = json.loads(json.dumps(REGISTRY))
+    registry['trend']['ties'] = ['above']
+    path = tmp_path / 'metrics.json'
+    path.write_text(json.dumps(registry), encoding='utf-8')
+    with pytest.raises(ValueError, match='ties'):
+        load_registry(str(path))
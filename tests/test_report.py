@@ -0,0 +1,31 @@
+import io
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from backend import PandasBackend
+from data import STORES, generate_responses
+from report import DAILY_COLUMNS, build_report, write_sheet
+
+
+def test_rows_past_the_limit_continue_on_new_sheets():
+    workbook = Workbook(write_only=True)
+    rows = pd.DataFrame({'date': pd.date_range('2025-01-01', periods=5), 'store': 'Naples', 'metric': 'A',
+                         'responses': range(5), 'average_score': 9.0})
+    written = write_sheet(workbook, 'Daily Scores', DAILY_COLUMNS, [rows.iloc[:2], rows.iloc[2:]], max_rows=3)
+    assert written == {'Daily Scores': 2, 'Daily Scores (2)': 2, 'Daily Scores (3)': 1}
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    sheets = load_workbook(buffer, read_only=True)
+    assert [row[3] for row in sheets['Daily Scores (3)'].iter_rows(values_only=True)] == ['Responses', 4]
+
+
+def test_report_sheets():
+    backend = PandasBackend(generate_responses(responses_per_day=2))
+    buffer = io.BytesIO()
+    written = build_report(buffer, backend)
+    assert written['Daily Scores'] == len(backend.daily_scores)
+    assert written['Events'] == len(backend.events())
+    sheets = load_workbook(buffer, read_only=True).sheetnames
+    assert sheets[:4] == ['Daily Scores', 'Monthly Comparison', 'Events', 'Priority Matrix']
+    assert sheets[4:] == [f'Store - {store}' for store in STORES]
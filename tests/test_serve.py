@@ -0,0 +1,63 @@
+import asyncio
+import os
+
+from serve import AFFINITY_COOKIE, AffinityProxy, memory_mb
+
+
+def request(cookie=None):
+    lines = [b'GET / HTTP/1.1', b'Host: localhost']
+    if cookie is not None:
+        lines.append(b'Cookie: other=1; ' + cookie.encode())
+    return b'\r\n'.join(lines) + b'\r\n\r\n'
+
+
+def test_pinned_browsers_go_back_to_their_worker():
+    proxy = AffinityProxy([9001, 9002, 9003])
+    assert proxy.pick(request(f'{AFFINITY_COOKIE}=2')) == (2, True)
+    # An unknown worker number is treated as a new browser
+    assert proxy.pick(request(f'{AFFINITY_COOKIE}=7')) == (0, False)
+
+
+def test_new_browsers_go_to_the_least_busy_worker():
+    proxy = AffinityProxy([9001, 9002, 9003])
+    proxy.active = [2, 0, 1]
+    assert proxy.pick(request()) == (1, False)
+    proxy.active = [0, 0, 0]
+    proxy.served = [3, 1, 1]
+    assert proxy.pick(request()) == (1, False)
+
+
+def test_proxy_sets_and_follows_the_affinity_cookie():
+    async def worker(reader, writer, port):
+        await reader.readuntil(b'\r\n\r\n')
+        body = str(port).encode()
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s' % (len(body), body))
+        await writer.drain()
+        writer.close()
+
+    async def fetch(port, cookie=None):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(request(cookie))
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        return head.decode(), body.decode()
+
+    async def scenario():
+        servers = [await asyncio.start_server(lambda r, w, i=i: worker(r, w, i), '127.0.0.1', 0) for i in range(2)]
+        ports = [server.sockets[0].getsockname()[1] for server in servers]
+        proxy = await asyncio.start_server(AffinityProxy(ports).handle, '127.0.0.1', 0)
+        port = proxy.sockets[0].getsockname()[1]
+        head, body = await fetch(port)
+        assert f'Set-Cookie: {AFFINITY_COOKIE}={body};' in head
+        head, pinned = await fetch(port, f'{AFFINITY_COOKIE}={1 - int(body)}')
+        assert pinned == str(1 - int(body)) and 'Set-Cookie' not in head
+        for server in servers + [proxy]:
+            server.close()
+
+    asyncio.run(scenario())
+
+
+def test_memory_of_a_process():
+    rss, pss = memory_mb(os.getpid())
+    assert (rss > 0 and pss > 0) or (rss != rss and pss != pss)
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from snapshot import export_snapshot, markdown_html, slugify, snapshot_views
+
+
+@pytest.fixture
+def in_memory(monkeypatch, tmp_path):
+    # Render workers inherit the environment: in-memory data, no warming
+    monkeypatch.delenv('DASHBOARD_DB', raising=False)
+    monkeypatch.setenv('DASHBOARD_WARM', '0')
+    monkeypatch.setenv('DASHBOARD_USAGE_FILE', str(tmp_path / 'usage.json'))
+    return tmp_path
+
+
+def test_slugs_are_url_safe():
+    assert slugify("Daily Timeline: June 2025") == 'daily-timeline-june-2025'
+    assert slugify("  Ease of Checkout!  ") == 'ease-of-checkout'
+
+
+def test_markdown_is_converted_and_escaped():
+    html = markdown_html("### Key <b>findings</b>\n- **Pricing** fell\n- *Site Design* rose\n---\nSee `notes`")
+    assert html == ("<h3>Key &lt;b&gt;findings&lt;/b&gt;</h3>"
+                    "<ul><li><strong>Pricing</strong> fell</li><li><em>Site Design</em> rose</li></ul>"
+                    "<hr><p>See <code>notes</code></p>")
+
+
+def test_views_cover_every_tab_with_unique_slugs(in_memory):
+    views = snapshot_views()
+    slugs = [view['slug'] for view in views]
+    assert len(slugs) == len(set(slugs))
+    assert {view['tab'] for view in views} == {None, 0, 1, 2, 3}
+    assert views[0] == {'slug': 'overview', 'title': "All tabs (default filters)", 'tab': None, 'widgets': {}}
+
+
+def test_partial_exports_keep_earlier_pages(in_memory):
+    output = in_memory / 'snapshot'
+    views = {view['slug']: view for view in snapshot_views()}
+    daily = next(slug for slug in views if slug.startswith('daily-'))
+    risk = next(slug for slug in views if slug.startswith('risk-'))
+
+    manifest = export_snapshot(str(output), workers=2, views=[views[daily], views[risk]])
+    assert [item['slug'] for item in manifest] == [daily, risk]
+    page = (output / f'{daily}.html').read_text(encoding='utf-8')
+    assert 'Plotly.newPlot' in page and 'Daily Timeline</h2>' in page
+    assert 'Risk Analysis</h2>' not in page
+    data = json.loads((output / 'data' / f'{risk}.json').read_text(encoding='utf-8'))
+    assert data['widgets'] == views[risk]['widgets'] and data['charts']
+
+    # Re-rendering one view replaces it and keeps the other in the index
+    (output / f'{risk}.html').write_text('stale', encoding='utf-8')
+    export_snapshot(str(output), workers=1, views=[views[risk]])
+    listed = json.loads((output / 'data' / 'views.json').read_text(encoding='utf-8'))['views']
+    assert [item['slug'] for item in listed] == [daily, risk]
+    assert (output / f'{risk}.html').read_text(encoding='utf-8') != 'stale'
+    index = (output / 'index.html').read_text(encoding='utf-8')
+    assert f'href="{daily}.html"' in index and f'href="{risk}.html"' in index
@@ -0,0 +1,58 @@
+import pandas as pd
+import pyarrow.parquet as pq
+
+from data import METRICS, STORES
+from synthetic import BLOCK_DAYS, generate, model, store_names, write
+
+
+def small_model(**options):
+    return model(pd.Timestamp('2025-05-30'), pd.Timestamp('2025-07-14'), store_names(3), responses_per_day=5,
+                 **options)
+
+
+def test_extra_stores_follow_the_configured_ones():
+    names = store_names(len(STORES) + 2)
+    assert names[:len(STORES)] == list(STORES)
+    assert names[-1] == f"Store {len(STORES) + 2:03d}"
+    assert store_names(2) == list(STORES)[:2]
+
+
+def test_blocks_cover_every_day_in_order():
+    config = small_model()
+    frames = list(generate(config))
+    assert len(frames) == -(-config['days'] // BLOCK_DAYS)
+    dates = pd.concat(frames)['date']
+    assert dates.is_monotonic_increasing
+    assert dates.min() == pd.Timestamp('2025-05-30') and dates.max() == pd.Timestamp('2025-07-14')
+
+
+def test_output_does_not_depend_on_workers():
+    config = small_model(seed=3)
+    serial = pd.concat(generate(config), ignore_index=True)
+    parallel = pd.concat(generate(config, workers=2), ignore_index=True)
+    pd.testing.assert_frame_equal(serial, parallel)
+    other = pd.concat(generate(small_model(seed=4)), ignore_index=True)
+    assert not serial[METRICS].equals(other[METRICS])
+
+
+def test_scores_stay_on_the_survey_scale():
+    responses = pd.concat(generate(small_model(incidents_per_year=50.0)), ignore_index=True)
+    scores = responses[METRICS].to_numpy()
+    assert scores.min() >= 1 and scores.max() <= 10
+    assert set(responses['store'].unique()) == set(store_names(3))
+
+
+def test_chunked_files_hold_every_row(tmp_path):
+    config = small_model()
+    expected = pd.concat(generate(config), ignore_index=True)
+    parquet = str(tmp_path / 'responses.parquet')
+    assert write(generate(config), parquet, chunk_rows=500) == len(expected)
+    assert pq.ParquetFile(parquet).num_row_groups > 1
+    loaded = pd.read_parquet(parquet)
+    assert len(loaded) == len(expected) and loaded['date'].max() == expected['date'].max()
+
+    csv = str(tmp_path / 'responses.csv')
+    assert write(generate(config), csv, chunk_rows=500) == len(expected)
+    loaded = pd.read_csv(csv, parse_dates=['date'])
+    assert list(loaded.columns) == ['date', 'store'] + list(METRICS)
+    assert (loaded['date'] == expected['date']).all()
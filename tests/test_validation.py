@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from data import METRICS, generate_responses
+from live import LiveFeed, TailFileSource
+from validation import QUARANTINE_COLUMNS, SeenIds, missing_days, quarantine, validate_responses
+
+
+def batch(days=2):
+    responses = generate_responses(start='2025-06-02', end=f'2025-06-0{1 + days}', responses_per_day=2)
+    # As read from a CSV export
+    responses = responses.astype({'store': str}).assign(
+        day_of_week=responses['date'].dt.day_name(), date=responses['date'].dt.strftime('%Y-%m-%d'))
+    responses.insert(0, 'response_id', np.arange(len(responses)))
+    return responses
+
+
+def test_reason_codes():
+    raw = batch()
+    raw.loc[0, 'store'] = 'Miami'
+    raw.loc[1, METRICS[0]] = 11
+    raw.loc[2, 'date'] = 'not a date'
+    raw.loc[3, 'response_id'] = raw.loc[4, 'response_id']
+    raw.loc[5, 'day_of_week'] = 'Funday'
+    raw.loc[1, 'store'] = 'Miami'
+    clean, rejected, report = validate_responses(raw, now='2025-07-01')
+    reasons = rejected.set_index('response_id')['reason']
+    assert reasons[0] == 'unknown_store'
+    assert reasons[1] == 'unknown_store|score_out_of_range'
+    assert 'bad_date' in reasons[2]
+    assert reasons[4] == 'duplicate_response'
+    assert len(clean) == len(raw) - 5 and report['rejected'] == 5
+    assert clean[METRICS].dtypes.eq(np.int8).all()
+
+
+def test_ids_from_earlier_batches_are_duplicates():
+    raw = batch()
+    seen = SeenIds()
+    first, _, _ = validate_responses(raw.iloc[:10], seen=seen)
+    second, rejected, _ = validate_responses(raw.iloc[5:], seen=seen)
+    assert len(first) == 10 and len(second) == len(raw) - 10
+    assert (rejected['reason'] == 'duplicate_response').all() and len(rejected) == 5
+
+
+def test_seen_ids_forget_the_oldest():
+    seen = SeenIds(capacity=3)
+    seen.add(['a', 'b'])
+    seen.add(['c', 'd'])
+    assert len(seen) == 3 and seen.contains(['a', 'b', 'd']).tolist() == [False, True, True]
+
+
+def test_truncated_tail_file_is_not_counted_twice(tmp_path):
+    class Sink:
+        rows = 0
+
+        def append(self, rows):
+            self.rows += len(rows)
+
+    path = tmp_path / 'tail.csv'
+    raw = batch()
+    raw.to_csv(path, index=False)
+    sink = Sink()
+    feed = LiveFeed(sink, [TailFileSource(str(path))], min_interval=0)
+    assert feed.poll()
+    # Rewritten from the top with the same rows plus one new one
+    raw.iloc[:3].to_csv(path, index=False)
+    extra = batch(days=3).iloc[[-1]].assign(response_id=1000)
+    extra.to_csv(path, mode='a', index=False, header=False)
+    assert feed.poll()
+    assert sink.rows == len(raw) + 1 and feed.rows_rejected == 3
+
+
+def test_quarantine_keeps_one_column_layout(tmp_path):
+    path = str(tmp_path / 'quarantine.csv')
+    raw = batch().assign(store='Miami')
+    _, rejected, _ = validate_responses(raw.iloc[:2])
+    quarantine(rejected, path, source='a.csv')
+    _, rejected, _ = validate_responses(raw.iloc[2:4].drop(columns=['response_id', 'day_of_week']))
+    quarantine(rejected, path, source='b.csv')
+    rows = pd.read_csv(path)
+    assert list(rows.columns) == QUARANTINE_COLUMNS and len(rows) == 4
+    assert rows['source'].tolist() == ['a.csv'] * 2 + ['b.csv'] * 2
+    assert rows['response_id'].isna().tolist() == [False, False, True, True]
+
+
+def test_quarantine_moves_another_layout_aside(tmp_path):
+    path = tmp_path / 'quarantine.csv'
+    path.write_text("old,header\n1,2\n")
+    _, rejected, _ = validate_responses(batch().assign(store='Miami').iloc[:1])
+    quarantine(rejected, str(path))
+    assert list(pd.read_csv(path).columns) == QUARANTINE_COLUMNS
+    assert len(list(tmp_path.glob('quarantine.csv.*'))) == 1
+
+
+def test_missing_days():
+    gaps = missing_days(pd.to_datetime(['2025-06-01', '2025-06-04', '2025-06-02']))
+    assert gaps.strftime('%m-%d').tolist() == ['06-03']
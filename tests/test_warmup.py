@@ -0,0 +1,101 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import streamlit as st
+
+import caches
+from caches import CacheBudget
+from warmup import BackgroundLoader, CacheWarmer, UsageTracker
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    st.cache_data.clear()
+    yield
+    st.cache_data.clear()
+
+
+def test_loader_reports_a_call_once_it_has_finished():
+    release = threading.Event()
+    calls = []
+
+    def slow(value):
+        release.wait(5)
+        calls.append(value)
+
+    loader = BackgroundLoader(workers=1)
+    assert not loader.ready(slow, 1)
+    release.set()
+    assert loader.ready(slow, 1, wait=5)
+    assert loader.ready(slow, 1) and calls == [1]
+    assert BackgroundLoader(enabled=False).ready(slow, 2) and calls == [1]
+
+
+def test_loader_remembers_a_bounded_number_of_calls():
+    loader = BackgroundLoader(workers=1, remember=2)
+    for value in range(3):
+        assert loader.ready(abs, value, wait=5)
+    assert list(loader._finished) == [('builtins', 'abs', 1), ('builtins', 'abs', 2)]
+
+
+def test_loader_runs_evicted_views_again():
+    budget = CacheBudget(budget_bytes=2 ** 20)
+    calls = []
+
+    @budget.cache_data()
+    def view(value):
+        calls.append(value)
+        return np.zeros(value)
+
+    loader = BackgroundLoader(workers=1, budget=budget)
+    assert loader.ready(view, 8, wait=5) and calls == [8]
+    assert loader.ready(view, 8)
+    view.clear()
+    assert loader.ready(view, 8, wait=5) and calls == [8, 8]
+
+
+def test_loader_runs_expired_views_again(monkeypatch):
+    budget = CacheBudget(budget_bytes=2 ** 20)
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(caches, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+
+    @budget.cache_data(ttl=60)
+    def view(value):
+        return np.zeros(value)
+
+    loader = BackgroundLoader(workers=1, budget=budget)
+    assert loader.ready(view, 8, wait=5) and budget.stats['view']['misses'] == 1
+    clock.now += 61
+    assert not budget.resident(view, 8)
+    assert loader.ready(view, 8, wait=5) and budget.resident(view, 8)
+    assert budget.stats['view']['misses'] + budget.stats['view']['hits'] == 2
+
+
+def test_warmer_runs_the_plan_until_its_budget_is_spent():
+    warmed = []
+
+    def job(value):
+        warmed.append(value)
+        return np.zeros(1000)
+
+    warmer = CacheWarmer(lambda version: [(job, (value,)) for value in range(6)], budget_bytes=10000, workers=2)
+    assert warmer.schedule('v1') and not warmer.schedule('v1')
+    for thread in threading.enumerate():
+        if thread.name == 'cache-warmer':
+            thread.join(5)
+    # Jobs run two at a time; the first pair already passes the budget
+    assert warmer.status['state'] == 'budget reached' and sorted(warmed) == [0, 1]
+    assert warmer.status['warmed'] == 2
+
+
+def test_usage_ranking_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'usage.json')
+    usage = UsageTracker(path)
+    for metric in ['Site Design', 'Pricing', 'Pricing']:
+        usage.record('monthly', metric, ['All Stores'])
+    usage.save()
+    restored = UsageTracker(path)
+    assert restored.ranked('monthly', [('Ease of Checkout', ('All Stores',))]) == [
+        ('Pricing', ('All Stores',)), ('Site Design', ('All Stores',)), ('Ease of Checkout', ('All Stores',))]
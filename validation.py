@@ -0,0 +1,171 @@
+import itertools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from data import METRICS, STORES
+
+# Row-level reason codes, checked as whole-column predicates
+REASONS = {
+    'bad_date': "date missing or not parseable",
+    'future_date': "date is after the ingestion time",
+    'weekday_mismatch': "day_of_week label does not match the date",
+    'unknown_store': "store is not one of the configured stores",
+    'missing_score': "one or more metric scores missing",
+    'non_numeric_score': "one or more metric scores not numeric",
+    'score_out_of_range': "one or more metric scores outside 0-10",
+    'non_integer_score': "one or more metric scores not a whole number",
+    'duplicate_response': "response_id already seen in this or an earlier batch",
+}
+# Response ids remembered across live batches; the oldest are forgotten first
+SEEN_ID_CAPACITY = 1000000
+
+# Quarantine file layout: the survey columns, then why, where and when
+QUARANTINE_COLUMNS = (['response_id', 'date', 'day_of_week', 'store'] + METRICS
+                      + ['comment', 'reason', 'source', 'quarantined_at'])
+
+
+class SeenIds:
+    # Bounded memory of accepted response ids, so a row sent again in a later
+    # batch (or re-read after a tail file is rotated or truncated) is
+    # rejected as a duplicate. Ids are compared as text; a dict keeps them in
+    # arrival order for eviction.
+    def __init__(self, capacity=SEEN_ID_CAPACITY):
+        self.capacity = capacity
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def contains(self, ids):
+        return np.fromiter((i in self.ids for i in ids), dtype=bool, count=len(ids))
+
+    def add(self, ids):
+        self.ids.update(dict.fromkeys(ids))
+        excess = len(self.ids) - self.capacity
+        if excess > 0:
+            for key in list(itertools.islice(self.ids, excess)):
+                del self.ids[key]
+
+
+def parse_dates(values):
+    # Survey exports repeat a handful of distinct dates, so only those are parsed
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.normalize()
+    codes, uniques = pd.factorize(values)
+    parsed = pd.DatetimeIndex(pd.to_datetime(pd.Series(uniques, dtype=object), errors='coerce')).normalize()
+    dates = parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(dates, index=values.index)
+
+
+def validate_responses(frame, stores=STORES, now=None, seen=None):
+    # Split a raw batch into typed clean rows and rejected rows carrying a
+    # `reason` column (codes joined with '|'). Returns (clean, rejected, report).
+    # With `seen` (a SeenIds), ids accepted by earlier batches are duplicates
+    # too, and this batch's clean ids are added to it.
+    started = time.perf_counter()
+    missing = [col for col in ['date', 'store'] + METRICS if col not in frame.columns]
+    if missing:
+        raise ValueError(f"Survey batch is missing columns: {', '.join(missing)}")
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+
+    dates = parse_dates(frame['date'])
+    store = frame['store']
+    if not isinstance(store.dtype, pd.CategoricalDtype):
+        store = store.astype(str).astype('category')
+    raw = frame[METRICS]
+    scores = raw.apply(pd.to_numeric, errors='coerce')
+    values = scores.to_numpy(dtype=float)
+    present = raw.notna().to_numpy()
+    numeric = ~np.isnan(values)
+
+    checks = {
+        'bad_date': dates.isna().to_numpy(),
+        'future_date': (dates > now).to_numpy(),
+        'unknown_store': ~store.isin(stores).to_numpy() if stores is not None else np.zeros(len(frame), bool),
+        'missing_score': (~present).any(axis=1),
+        'non_numeric_score': (present & ~numeric).any(axis=1),
+        'score_out_of_range': (numeric & ((values < 0) | (values > 10))).any(axis=1),
+        'non_integer_score': (numeric & (values != np.round(values))).any(axis=1),
+    }
+    if 'day_of_week' in frame.columns:
+        checks['weekday_mismatch'] = (dates.notna() & (frame['day_of_week'] != dates.dt.day_name())).to_numpy()
+    ids = None
+    if 'response_id' in frame.columns:
+        checks['duplicate_response'] = frame['response_id'].duplicated().to_numpy()
+        if seen is not None:
+            ids = frame['response_id'].astype(str).where(frame['response_id'].notna())
+            checks['duplicate_response'] = checks['duplicate_response'] | seen.contains(ids)
+
+    bad = np.zeros(len(frame), dtype=bool)
+    for mask in checks.values():
+        bad |= mask
+
+    keep = ~bad
+    if ids is not None:
+        seen.add(ids[keep].dropna())
+    clean = pd.DataFrame({'date': dates.to_numpy()[keep], 'store': store.array[keep]})
+    clean[METRICS] = values[keep].astype(np.int8)
+    clean['store'] = clean['store'].cat.remove_unused_categories()
+    if 'comment' in frame.columns:
+        # Free text is optional and passed through as is
+        clean['comment'] = frame['comment'].to_numpy(dtype=object)[keep]
+
+    rejected = frame[bad].copy()
+    reasons = pd.Series('', index=rejected.index)
+    for code, mask in checks.items():
+        reasons = reasons.where(~mask[bad], reasons + '|' + code)
+    rejected['reason'] = reasons.str[1:]
+
+    elapsed = time.perf_counter() - started
+    report = {
+        'rows': len(frame),
+        'clean': len(clean),
+        'rejected': int(bad.sum()),
+        'by_reason': {code: int(mask.sum()) for code, mask in checks.items() if mask.any()},
+        'seconds': elapsed,
+        'clean_rows_per_second': len(clean) / elapsed if elapsed > 0 else float('inf'),
+    }
+    return clean, rejected, report
+
+
+def missing_days(dates):
+    # Calendar days with no responses between the first and last date
+    dates = pd.DatetimeIndex(pd.to_datetime(dates)).normalize().unique()
+    if dates.empty:
+        return pd.DatetimeIndex([])
+    return pd.date_range(dates.min(), dates.max()).difference(dates)
+
+
+def quarantine(rejected, path, source=''):
+    # Append rejected rows (with their reasons) to a CSV for later review.
+    # Every batch is written with the same QUARANTINE_COLUMNS, whatever
+    # columns it came with, so appended rows stay aligned with the header;
+    # a file with another header is moved aside to `<path>.<mtime>`
+    if rejected.empty:
+        return
+    rows = rejected.assign(source=source, quarantined_at=pd.Timestamp.now().isoformat(timespec='seconds'))
+    rows = rows.reindex(columns=QUARANTINE_COLUMNS)
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as handle:
+            header = handle.readline().rstrip('\r\n')
+        if header != ','.join(rows.columns):
+            os.replace(path, f"{path}.{int(os.path.getmtime(path))}")
+    rows.to_csv(path, mode='a', index=False, header=not os.path.exists(path))
+
+
+def merge_reports(total, report):
+    # Running totals across batches
+    if total is None:
+        return dict(report, by_reason=dict(report['by_reason']))
+    merged = {key: total[key] + report[key] for key in ['rows', 'clean', 'rejected', 'seconds']}
+    merged['by_reason'] = dict(total['by_reason'])
+    for code, count in report['by_reason'].items():
+        merged['by_reason'][code] = merged['by_reason'].get(code, 0) + count
+    merged['clean_rows_per_second'] = merged['clean'] / merged['seconds'] if merged['seconds'] > 0 else float('inf')
+    return merged
@@ -0,0 +1,180 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+
+import numpy as np
+import pandas as pd
+
+
+def freeze(value):
+    # Lists (e.g. multiselect values) become tuples so keys stay hashable
+    return tuple(freeze(item) for item in value) if isinstance(value, (list, tuple)) else value
+
+
+class UsageTracker:
+    # How often each view was opened, keyed like ('monthly', metric, store).
+    # Counts are saved to a JSON file so the ranking survives restarts and
+    # deploys.
+    def __init__(self, path=None, save_every=50):
+        self.path = path
+        self.save_every = save_every
+        self.counts = Counter()
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as handle:
+                self.counts.update({freeze(key): count for key, count in json.load(handle)})
+
+    def record(self, view, *params):
+        with self._lock:
+            self.counts[(view,) + freeze(params)] += 1
+            self._unsaved += 1
+            due = self._unsaved >= self.save_every
+        if due:
+            self.save()
+
+    def ranked(self, view, defaults=()):
+        # Parameters of `view`, most opened first; defaults that were never
+        # opened follow in their given order
+        with self._lock:
+            observed = {key[1:]: count for key, count in self.counts.items() if key[0] == view}
+        return list(dict.fromkeys(sorted(observed, key=observed.get, reverse=True) + [freeze(d) for d in defaults]))
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            rows = [[list(key), count] for key, count in self.counts.items()]
+            self._unsaved = 0
+        partial = f"{self.path}.tmp"
+        with open(partial, 'w', encoding='utf-8') as handle:
+            json.dump(rows, handle)
+        os.replace(partial, self.path)
+
+
+def result_bytes(value):
+    # Rough in-memory size of a cached result
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(result_bytes(key) + result_bytes(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(result_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class CacheWarmer:
+    # Runs a warm-up plan in background threads whenever the data version
+    # changes. `plan(version)` returns (function, args) jobs, most important
+    # first; jobs run `workers` at a time until the memory budget is spent or
+    # a newer version arrives. With a `cache_budget` (CacheBudget), jobs
+    # still cached are skipped and warming stops once the shared budget is
+    # full, as further results would only evict other entries.
+    def __init__(self, plan, budget_bytes, workers=2, usage=None, cache_budget=None):
+        self.plan = plan
+        self.budget_bytes = budget_bytes
+        self.workers = workers
+        self.usage = usage
+        self.cache_budget = cache_budget
+        self.version = None
+        self.status = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, version):
+        with self._lock:
+            if version == self.version:
+                return False
+            self.version = version
+        threading.Thread(target=self._run, args=(version,), name='cache-warmer', daemon=True).start()
+        return True
+
+    def _run(self, version):
+        started = time.perf_counter()
+        jobs = self.plan(version)
+        status = {'version': version, 'state': 'running', 'jobs': len(jobs), 'warmed': 0, 'bytes': 0, 'errors': 0}
+        self.status = status
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='cache-warmer') as pool:
+            for start in range(0, len(jobs), self.workers):
+                if self.version != version:
+                    status['state'] = 'superseded'
+                    break
+                if status['bytes'] >= self.budget_bytes or self._shared_budget_full():
+                    status['state'] = 'budget reached'
+                    break
+                batch = []
+                for function, args in jobs[start:start + self.workers]:
+                    if self.cache_budget is not None and self.cache_budget.resident(function, *args):
+                        status['warmed'] += 1
+                    else:
+                        batch.append(pool.submit(function, *args))
+                for future in batch:
+                    try:
+                        status['bytes'] += result_bytes(future.result())
+                        status['warmed'] += 1
+                    except Exception:
+                        status['errors'] += 1
+            else:
+                status['state'] = 'done'
+        status['seconds'] = time.perf_counter() - started
+        if self.usage is not None:
+            self.usage.save()
+
+    def _shared_budget_full(self):
+        return self.cache_budget is not None and self.cache_budget.total_bytes() >= self.cache_budget.budget_bytes
+
+
+class BackgroundLoader:
+    # Runs slow cached loaders on a thread pool so the page can show
+    # placeholders instead of blocking. `ready(function, *args)` starts the
+    # call if needed and says whether it has finished, waiting up to `wait`
+    # seconds so quick loads still render in the same run; once it has,
+    # calling the function directly is a cache hit. Results are not kept
+    # here, only which calls have finished; with a `budget` (CacheBudget) a
+    # finished call whose entry was since evicted or expired is run again.
+    def __init__(self, workers=4, enabled=True, remember=512, budget=None):
+        self.enabled = enabled
+        self.remember = remember
+        self.budget = budget
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='loader')
+        self._pending = {}
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ready(self, function, *args, wait=0.0):
+        if not self.enabled:
+            return True
+        key = (function.__module__, function.__qualname__) + freeze(args)
+        with self._lock:
+            if key in self._finished:
+                if self.budget is None or self.budget.resident(function, *args):
+                    self._finished.move_to_end(key)
+                    return True
+                del self._finished[key]
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self._pool.submit(self._call, function, args)
+        if wait:
+            futures_wait([future], timeout=wait)
+        if not future.done():
+            return False
+        with self._lock:
+            self._pending.pop(key, None)
+            self._finished[key] = True
+            while len(self._finished) > self.remember:
+                self._finished.popitem(last=False)
+        return True
+
+    @staticmethod
+    def _call(function, args):
+        # Errors are left for the direct call, which raises them in the page
+        try:
+            function(*args)
+        except Exception:
+            pass